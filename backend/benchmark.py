@@ -0,0 +1,416 @@
+"""
+Benchmark every API route in-process against the database in DATABASE_URL.
+
+Each route is called through the ASGI app (no network) a number of times
+after a warm-up. Latency percentiles, SQL statements per request and the
+process's peak RSS are written to a JSON file; passing the previous file as
+--baseline prints the change per route and flags regressions.
+
+The response cache is off unless --with-cache is given, so the numbers
+reflect the work done in crud. Write routes create and remove their own
+rows; seed the database first (see seed_data.py).
+
+Usage:
+    python seed_data.py --rows 100000 --reset
+    python benchmark.py --output benchmark.json
+    python benchmark.py --baseline benchmark.json --output benchmark-new.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import crud, database, models
+
+TODAY = date.today()
+THIS_MONTH = TODAY.strftime("%Y-%m")
+# Streams that never finish on their own, so a request can't be timed
+UNTIMED_ROUTES = {("GET", "/events")}
+SAMPLE_EXPENSE = {
+    "title": "Benchmark expense",
+    "amount": 1234.5,
+    "category": "Food",
+    "date": TODAY.isoformat(),
+    "description": "Created by benchmark.py",
+    "is_emi": False,
+}
+SAMPLE_CSV = "title,amount,category,date,payment_mode_id\n"
+
+
+def sample_payment_mode():
+    return {"name": f"Benchmark {time.perf_counter_ns()}", "type": "credit_card", "icon": "CreditCard", "color": "#FF6B6B"}
+
+
+class Context:
+    """Ids of existing rows the routes are called with, plus rows created along the way"""
+
+    def __init__(self, client: TestClient):
+        db = database.SessionLocal()
+        try:
+            payment_mode = db.query(models.PaymentMode).order_by(models.PaymentMode.id).first()
+            if payment_mode is None:
+                raise SystemExit("The database has no payment modes, seed it first with seed_data.py")
+            self.payment_mode_id = payment_mode.id
+        finally:
+            db.close()
+        self.client = client
+
+    def create_expense(self, **overrides):
+        response = self.client.post("/expenses/", json=dict(SAMPLE_EXPENSE, payment_mode_id=self.payment_mode_id, **overrides))
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def create_payment_mode(self):
+        response = self.client.post("/payment-modes/", json=sample_payment_mode())
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def create_budget(self):
+        response = self.client.post("/budgets/", json={"category": "Benchmark", "amount": 1000, "month": THIS_MONTH})
+        response.raise_for_status()
+        return response.json()["id"]
+
+
+def scenarios(ctx: Context):
+    """
+    (name, method, path, request kwargs factory, setup, teardown) for every route.
+
+    setup runs untimed before each call and returns the values formatted into
+    the path; teardown removes whatever the call created.
+    """
+    def none():
+        return {}
+
+    def remove_expense(values, response):
+        expense_id = values.get("expense_id") or (response.json().get("id") if response.is_success else None)
+        if expense_id:
+            ctx.client.delete(f"/expenses/{expense_id}")
+
+    bulk_csv = SAMPLE_CSV + "".join(
+        f"Benchmark row {row},{row + 1}.5,Food,{TODAY.isoformat()},{ctx.payment_mode_id}\n" for row in range(100)
+    )
+
+    def remove_bulk_rows(values, response):
+        db = database.SessionLocal()
+        try:
+            ids = [row.id for row in db.query(models.Expense.id).filter(models.Expense.title.like("Benchmark row %"))]
+        finally:
+            db.close()
+        for expense_id in ids:
+            ctx.client.delete(f"/expenses/{expense_id}")
+
+    def import_batch_rows(payment_mode_id: int, count: int = 50):
+        # One bulk import instead of a request per row, then look the new ids up
+        csv = SAMPLE_CSV + "".join(
+            f"Benchmark batch row {row},{row + 1}.5,Food,{TODAY.isoformat()},{payment_mode_id}\n" for row in range(count)
+        )
+        ctx.client.post("/expenses/bulk", files={"file": ("benchmark.csv", csv, "text/csv")}).raise_for_status()
+        db = database.SessionLocal()
+        try:
+            return [row.id for row in db.query(models.Expense.id).filter(models.Expense.title.like("Benchmark batch row %"))]
+        finally:
+            db.close()
+
+    def remove_batch_rows(expense_ids):
+        operations = [{"op": "delete", "id": expense_id} for expense_id in expense_ids]
+        ctx.client.post("/expenses/batch", json={"operations": operations}).raise_for_status()
+
+    batch = {"ids": []}
+
+    def batch_setup():
+        batch["ids"] = import_batch_rows(ctx.payment_mode_id)
+        return {}
+
+    def batch_operations():
+        ids = batch["ids"]
+        return {"json": {"operations": (
+            [{"op": "update", "id": expense_id, "changes": {"category": "Benchmark"}} for expense_id in ids[:20]]
+            + [{"op": "mark_paid", "id": expense_id} for expense_id in ids[20:40]]
+            + [{"op": "delete", "id": expense_id} for expense_id in ids[40:]]
+        )}}
+
+    def bill_setup():
+        # A payment mode of its own, so the seeded bills stay unpaid
+        payment_mode_id = ctx.create_payment_mode()
+        batch["ids"] = import_batch_rows(payment_mode_id)
+        return {"payment_mode_id": payment_mode_id}
+
+    def remove_bill(values, response):
+        remove_batch_rows(batch["ids"])
+        ctx.client.delete(f"/payment-modes/{values['payment_mode_id']}")
+
+    def sync_since(ago: timedelta):
+        # A client that last synced this long ago
+        position = (datetime.now(timezone.utc) - ago, 0)
+        return {"params": {"since": crud.encode_sync_token(position, position)}}
+
+    expense = lambda: {"expense_id": ctx.create_expense()}
+    emi_expense = lambda: {"expense_id": ctx.create_expense(is_emi=True, emi_tenure=12, emi_interest_rate=14,
+                                                             emi_processing_fees=199, emi_gst=35.82)}
+    no_teardown = None
+
+    return [
+        ("root", "GET", "/", none, None, no_teardown),
+        ("health_db", "GET", "/health/db", none, None, no_teardown),
+        ("cache_metrics", "GET", "/metrics/cache", none, None, no_teardown),
+        ("startup_metrics", "GET", "/metrics/startup", none, None, no_teardown),
+        ("list_payment_modes", "GET", "/payment-modes/", none, None, no_teardown),
+        ("create_payment_mode", "POST", "/payment-modes/",
+         lambda: {"json": sample_payment_mode()}, None,
+         lambda values, response: ctx.client.delete(f"/payment-modes/{response.json()['id']}")),
+        ("update_payment_mode", "PUT", "/payment-modes/{payment_mode_id}", lambda: {"json": {"color": "#123456"}},
+         lambda: {"payment_mode_id": ctx.create_payment_mode()},
+         lambda values, response: ctx.client.delete(f"/payment-modes/{values['payment_mode_id']}")),
+        ("delete_payment_mode", "DELETE", "/payment-modes/{payment_mode_id}", none,
+         lambda: {"payment_mode_id": ctx.create_payment_mode()}, no_teardown),
+        ("create_expense", "POST", "/expenses/",
+         lambda: {"json": dict(SAMPLE_EXPENSE, payment_mode_id=ctx.payment_mode_id)}, None, remove_expense),
+        ("bulk_import_100", "POST", "/expenses/bulk",
+         lambda: {"files": {"file": ("benchmark.csv", bulk_csv, "text/csv")}}, None, remove_bulk_rows),
+        ("list_expenses", "GET", "/expenses/", lambda: {"params": {"limit": 100}}, None, no_teardown),
+        # Large lists through the default path and the fast=true path side by side
+        ("list_expenses_5000", "GET", "/expenses/", lambda: {"params": {"limit": 5000}}, None, no_teardown),
+        ("list_expenses_5000_fast", "GET", "/expenses/", lambda: {"params": {"limit": 5000, "fast": True}}, None, no_teardown),
+        ("list_expenses_5000_fields", "GET", "/expenses/",
+         lambda: {"params": {"limit": 5000, "fields": "title,amount,category,date,is_paid"}}, None, no_teardown),
+        ("export_expenses", "GET", "/expenses/export", lambda: {"params": {"start_date": f"{THIS_MONTH}-01"}}, None, no_teardown),
+        ("expenses_page", "GET", "/expenses/page", lambda: {"params": {"limit": 100}}, None, no_teardown),
+        ("expenses_compact", "GET", "/expenses/compact", lambda: {"params": {"limit": 100}}, None, no_teardown),
+        ("search_expenses", "GET", "/expenses/search", lambda: {"params": {"q": "groc"}}, None, no_teardown),
+        ("search_expenses_filtered", "GET", "/expenses/search",
+         lambda: {"params": {"q": "food del", "category": "Food", "start_date": f"{THIS_MONTH}-01"}}, None, no_teardown),
+        ("expense_changes", "GET", "/expenses/changes", lambda: sync_since(timedelta(hours=1)), None, no_teardown),
+        ("update_expense", "PUT", "/expenses/{expense_id}", lambda: {"json": {"amount": 99.5}}, expense, remove_expense),
+        ("delete_expense", "DELETE", "/expenses/{expense_id}", none, expense, no_teardown),
+        ("mark_paid", "POST", "/expenses/{expense_id}/mark-paid", none, emi_expense, remove_expense),
+        ("mark_unpaid", "POST", "/expenses/{expense_id}/mark-unpaid", none, emi_expense, remove_expense),
+        ("expense_batch_50", "POST", "/expenses/batch", batch_operations, batch_setup,
+         lambda values, response: remove_batch_rows(batch["ids"][:40])),
+        ("emi_list", "GET", "/emi/", none, None, no_teardown),
+        ("emi_dues", "GET", "/emi/dues", lambda: {"params": {"month": THIS_MONTH}}, None, no_teardown),
+        ("emi_calculate", "POST", "/emi/calculate",
+         lambda: {"json": {"principal": 50000, "tenure": 12, "interest_rate": 14, "processing_fees": 199, "gst": 35.82}},
+         None, no_teardown),
+        ("emi_calculate_batch", "POST", "/emi/calculate/batch",
+         lambda: {"json": {"principal": [50000 + step * 1000 for step in range(100)], "tenure": [12], "interest_rate": [14],
+                           "include_schedule": True}}, None, no_teardown),
+        ("bills", "GET", "/bills/", lambda: {"params": {"month": TODAY.strftime("%m"), "year": TODAY.year}}, None, no_teardown),
+        ("bill_expenses", "GET", "/bills/{payment_mode_id}/expenses",
+         lambda: {"params": {"month": TODAY.strftime("%m"), "year": TODAY.year}},
+         lambda: {"payment_mode_id": ctx.payment_mode_id}, no_teardown),
+        ("bills_fast", "GET", "/bills/", lambda: {"params": {"month": TODAY.strftime("%m"), "year": TODAY.year, "fast": True}},
+         None, no_teardown),
+        ("bill_expenses_1000", "GET", "/bills/{payment_mode_id}/expenses", lambda: {"params": {"limit": 1000}},
+         lambda: {"payment_mode_id": ctx.payment_mode_id}, no_teardown),
+        ("bill_expenses_1000_fast", "GET", "/bills/{payment_mode_id}/expenses", lambda: {"params": {"limit": 1000, "fast": True}},
+         lambda: {"payment_mode_id": ctx.payment_mode_id}, no_teardown),
+        ("bill_mark_paid_50", "POST", "/bills/{payment_mode_id}/mark-paid",
+         lambda: {"params": {"month": TODAY.strftime("%m"), "year": TODAY.year}}, bill_setup, remove_bill),
+        ("list_budgets", "GET", "/budgets/", none, None, no_teardown),
+        ("budget_usage_matrix", "GET", "/budgets/usage", none, None, no_teardown),
+        ("create_budget", "POST", "/budgets/", lambda: {"json": {"category": "Benchmark", "amount": 1000, "month": THIS_MONTH}},
+         None, lambda values, response: ctx.client.delete(f"/budgets/{response.json()['id']}")),
+        ("update_budget", "PUT", "/budgets/{budget_id}", lambda: {"json": {"amount": 2000}},
+         lambda: {"budget_id": ctx.create_budget()},
+         lambda values, response: ctx.client.delete(f"/budgets/{values['budget_id']}")),
+        ("delete_budget", "DELETE", "/budgets/{budget_id}", none, lambda: {"budget_id": ctx.create_budget()}, no_teardown),
+        ("dashboard_summary", "GET", "/dashboard/summary", none, None, no_teardown),
+        ("dashboard_overview", "GET", "/dashboard/overview", none, None, no_teardown),
+        ("dashboard_category_breakdown", "GET", "/dashboard/category-breakdown", none, None, no_teardown),
+        ("dashboard_budget_usage", "GET", "/dashboard/budget-usage", none, None, no_teardown),
+        ("dashboard_insights", "GET", "/dashboard/insights", none, None, no_teardown),
+        ("dashboard_expense_trends", "GET", "/dashboard/expense-trends", none, None, no_teardown),
+        ("dashboard_expense_trends_yearly", "GET", "/dashboard/expense-trends",
+         lambda: {"params": {"bucket": "month", "group_by": "category"}}, None, no_teardown),
+    ]
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_route(ctx: Context, counter, scenario, iterations: int, warmup: int):
+    """
+    Time a scenario. Any non-2xx response makes it a failure: the result then
+    carries the statuses and the first error instead of timings, as timing an
+    error path would pass for the route's performance.
+    """
+    name, method, path, request_kwargs, setup, teardown = scenario
+    latencies, queries, statuses = [], [], set()
+    failures, first_error = 0, None
+    for run in range(warmup + iterations):
+        values = setup() if setup else {}
+        kwargs = request_kwargs()
+        counter["queries"] = 0
+        started = time.perf_counter()
+        response = ctx.client.request(method, path.format(**values), **kwargs)
+        elapsed = time.perf_counter() - started
+        statuses.add(response.status_code)
+        if not 200 <= response.status_code < 300:
+            failures += 1
+            first_error = first_error or f"{response.status_code} {response.text[:200]}"
+        if run >= warmup:
+            latencies.append(elapsed * 1000)
+            queries.append(counter["queries"])
+        if teardown:
+            teardown(values, response)
+
+    if failures:
+        return {
+            "method": method,
+            "path": path,
+            "status": sorted(statuses),
+            "iterations": iterations,
+            "failed": failures,
+            "error": first_error,
+        }
+
+    latencies.sort()
+    return {
+        "method": method,
+        "path": path,
+        "status": sorted(statuses),
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "queries": max(queries) if queries else 0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(results, baseline, tolerance: float):
+    """Print per-route changes against a previous run and return the names of regressed routes"""
+    regressions = []
+    print(f"\n{'route':<34}{'p95 ms':>10}{'baseline':>10}{'change':>9}{'queries':>9}")
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if result.get("failed"):
+            regressions.append(name)
+            print(f"{name:<34}{'-':>10}{'-':>10}{'':>9}{'':>9}  FAILED")
+            continue
+        if previous is None or previous.get("failed"):
+            print(f"{name:<34}{result['p95_ms']:>10.2f}{'-':>10}{'new':>9}{result['queries']:>9}")
+            continue
+        change = (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] if previous["p95_ms"] else 0.0
+        more_queries = result["queries"] > previous["queries"]
+        regressed = change > tolerance or more_queries
+        if regressed:
+            regressions.append(name)
+        queries = f"{previous['queries']}->{result['queries']}" if more_queries else str(result["queries"])
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<34}{result['p95_ms']:>10.2f}{previous['p95_ms']:>10.2f}{change:>+9.0%}{queries:>9}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API routes in-process")
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls per route (default 50)")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed calls per route first (default 3)")
+    parser.add_argument("--routes", help="comma separated route names to run (default all)")
+    parser.add_argument("--output", default="benchmark.json", help="where to write the results (default benchmark.json)")
+    parser.add_argument("--baseline", help="previous results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown before flagging, as a fraction (default 0.2)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 if any route regressed")
+    parser.add_argument("--with-cache", action="store_true", help="keep the dashboard and bills response cache enabled")
+    args = parser.parse_args()
+
+    # The response cache reads its switch when the app is imported
+    if not args.with_cache:
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    import main as api
+
+    counter = {"queries": 0}
+
+    def count_query(*_):
+        counter["queries"] += 1
+
+    engines = [database.engine] + ([database.async_engine.sync_engine] if database.async_engine is not None else [])
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count_query)
+
+    db = database.SessionLocal()
+    try:
+        expense_rows = db.query(models.Expense).count()
+    finally:
+        db.close()
+
+    with TestClient(api.app) as client:
+        ctx = Context(client)
+        selected = set(args.routes.split(",")) if args.routes else None
+        all_scenarios = scenarios(ctx)
+
+        # Fail loudly when a route is added to main.py without a scenario here
+        covered = {(method, path) for _, method, path, *_ in all_scenarios} | UNTIMED_ROUTES
+        missing = [
+            f"{method} {route.path}"
+            for route in api.app.routes if isinstance(route, APIRoute)
+            for method in route.methods if (method, route.path) not in covered
+        ]
+        if missing:
+            print(f"Routes without a benchmark scenario: {', '.join(sorted(missing))}")
+
+        results = {}
+        for scenario in all_scenarios:
+            if selected and scenario[0] not in selected:
+                continue
+            results[scenario[0]] = run_route(ctx, counter, scenario, args.iterations, args.warmup)
+            result = results[scenario[0]]
+            if result.get("failed"):
+                print(f"{scenario[0]:<34}FAILED {result['failed']}/{args.warmup + args.iterations} requests: {result['error']}")
+                continue
+            print(f"{scenario[0]:<34}p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+                  f"p99 {result['p99_ms']:>8.2f}ms  queries {result['queries']:>3}  rss {result['peak_rss_mb']}MB")
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "dialect": database.engine.dialect.name,
+        "async_reads": database.DATABASE_ASYNC,
+        "response_cache": args.with_cache,
+        "expense_rows": expense_rows,
+        "iterations": args.iterations,
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"\nWrote {len(results)} routes to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("expense_rows") != expense_rows:
+            print(f"Note: baseline ran against {baseline.get('expense_rows')} expenses, this run against {expense_rows}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} route(s) regressed: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                return 1
+
+    failed = [name for name, result in results.items() if result.get("failed")]
+    if failed:
+        print(f"\n{len(failed)} scenario(s) failed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
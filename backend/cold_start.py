@@ -0,0 +1,100 @@
+"""
+Cold-start timings.
+
+main.py records how long its import took and the lifespan hook how long
+startup (the schema check) took; ColdStartMiddleware records how long the
+first request took to start its response. Together with the process start
+time read from /proc (on Linux), GET /metrics/startup reports where the
+time went between the process starting and the first response, and the
+first request logs the same as one line.
+"""
+import logging
+import os
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _process_started() -> Optional[float]:
+    """perf_counter() reading at the time the process was created, when /proc has it"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is field 22 of the whole line
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.perf_counter() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _ms(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    return round((end - start) * 1000, 1) if start is not None and end is not None else None
+
+
+class ColdStart:
+    def __init__(self):
+        self.process_started = _process_started()
+        self.import_started = None
+        self.import_finished = None
+        self.startup_started = None
+        self.startup_finished = None
+        self.schema_updated = None
+        self.first_request_started = None
+        self.first_response_started = None
+        self.first_request_path = None
+
+    def record_import(self, started: float):
+        self.import_started, self.import_finished = started, time.perf_counter()
+
+    def record_startup(self, started: float, schema_updated: Optional[bool]):
+        self.startup_started, self.startup_finished = started, time.perf_counter()
+        self.schema_updated = schema_updated
+
+    def stats(self) -> dict:
+        """Milliseconds per phase; None for phases not reached or not measurable here"""
+        return {
+            # Interpreter and server start-up before main.py was imported
+            "before_import_ms": _ms(self.process_started, self.import_started),
+            "import_ms": _ms(self.import_started, self.import_finished),
+            "startup_ms": _ms(self.startup_started, self.startup_finished),
+            "schema_updated": self.schema_updated,
+            "first_request_path": self.first_request_path,
+            "first_request_ms": _ms(self.first_request_started, self.first_response_started),
+            "process_to_first_response_ms": _ms(self.process_started, self.first_response_started),
+        }
+
+
+cold_start = ColdStart()
+
+
+class ColdStartMiddleware:
+    """ASGI middleware timing the first HTTP request up to the start of its response"""
+
+    def __init__(self, app):
+        self.app = app
+        self.seen_first_request = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.seen_first_request:
+            await self.app(scope, receive, send)
+            return
+
+        self.seen_first_request = True
+        cold_start.first_request_path = scope["path"]
+        cold_start.first_request_started = time.perf_counter()
+
+        async def send_and_time(message):
+            if message["type"] == "http.response.start":
+                cold_start.first_response_started = time.perf_counter()
+                stats = cold_start.stats()
+                logger.info(
+                    "Cold start: %s ms before import, %s ms import, %s ms startup (schema updated: %s), "
+                    "first request %s %s ms, %s ms from process start to first response",
+                    stats["before_import_ms"], stats["import_ms"], stats["startup_ms"], stats["schema_updated"],
+                    scope["path"], stats["first_request_ms"], stats["process_to_first_response_ms"]
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_and_time)
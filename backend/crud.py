@@ -1,12 +1,19 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
-from datetime import date, datetime, timedelta
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, and_, extract, case, cast, Integer, Date, insert, update, bindparam, tuple_, exists, select, literal, null, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from pydantic import ValidationError
+from datetime import date, datetime, timedelta, timezone
+import base64
+import binascii
 import calendar
+import json
 from dateutil.relativedelta import relativedelta
 import math
-from typing import Optional
+from typing import Optional, Tuple
 
-import models, schemas
+import models, schemas, search, spending_anomalies, payment_mode_cache
 
 # EMI Calculation Functions
 def calculate_emi(principal: float, tenure: int, interest_rate: float, processing_fees: float = 0, gst: float = 0):
@@ -37,16 +44,112 @@ def calculate_emi(principal: float, tenure: int, interest_rate: float, processin
         'total_processing_fees': round(total_processing_fees, 2)
     }
 
+# Data Version
+DATA_VERSION_ID = 1
+
+def get_data_version(db: Session) -> int:
+    """Current value of the write counter shared by every worker through the database"""
+    return db.query(models.DataVersion.version).filter(models.DataVersion.id == DATA_VERSION_ID).scalar() or 0
+
+def _bump_data_version(db: Session, version_id: int = DATA_VERSION_ID):
+    """Increment a version counter inside the caller's transaction so it commits with the change"""
+    bumped = db.query(models.DataVersion).filter(models.DataVersion.id == version_id).update(
+        {models.DataVersion.version: models.DataVersion.version + 1}, synchronize_session=False
+    )
+    if not bumped:
+        db.add(models.DataVersion(id=version_id, version=1))
+
+def _bump_payment_modes_version(db: Session):
+    """Payment-mode writes move both counters: cached responses and every worker's catalogue go stale"""
+    _bump_data_version(db)
+    _bump_data_version(db, payment_mode_cache.PAYMENT_MODES_VERSION_ID)
+    payment_mode_cache.cache.forget(db)
+
+# Change Events
+CHANGE_EVENT_RETENTION = timedelta(days=1)
+
+def _record_change(db: Session, event_type: str, **data):
+    """Add a change event inside the caller's transaction so it is published only if the write commits"""
+    _record_changes(db, [(event_type, data)])
+
+def _record_changes(db: Session, changes):
+    """Add (event type, data) change events in one statement"""
+    db.connection().execute(insert(models.ChangeEvent.__table__), [
+        {"type": event_type, "data": json.dumps(data, separators=(",", ":"))} for event_type, data in changes
+    ])
+    # Reconnecting clients can only be replayed what is still here
+    cutoff = datetime.now(timezone.utc) - CHANGE_EVENT_RETENTION
+    db.query(models.ChangeEvent).filter(
+        models.ChangeEvent.created_at < _sync_bound(db, cutoff)
+    ).delete(synchronize_session=False)
+
+def _expense_change(entry):
+    """What an expense contributes to the aggregates, from its rollup entry"""
+    if entry is None:
+        return None
+    (month, category, payment_mode_id), (amount, _, paid_amount, emi_amount) = entry
+    return {
+        "month": month,
+        "category": category,
+        "payment_mode_id": payment_mode_id,
+        "amount": amount,
+        "paid_amount": paid_amount,
+        "emi_amount": emi_amount
+    }
+
+def _record_expense_change(db: Session, event_type: str, expense_id: int, before=None, after=None):
+    """Expense event carrying its contribution before and after, so clients can patch totals"""
+    _record_expense_changes(db, [(event_type, expense_id, before, after)])
+
+def _record_expense_changes(db: Session, changes):
+    """Expense events from (event type, expense id, rollup entry before, rollup entry after)"""
+    _record_changes(db, [
+        (event_type, {"expense_id": expense_id, "before": _expense_change(before), "after": _expense_change(after)})
+        for event_type, expense_id, before, after in changes
+    ])
+
+def get_latest_change_event_id(db: Session) -> int:
+    return db.query(func.max(models.ChangeEvent.id)).scalar() or 0
+
+def get_change_events(db: Session, after_id: int, limit: int = 500, up_to_id: Optional[int] = None):
+    """Change events with ids after after_id (up to up_to_id), oldest first, as dicts"""
+    query = db.query(models.ChangeEvent.id, models.ChangeEvent.type, models.ChangeEvent.data).filter(
+        models.ChangeEvent.id > after_id
+    )
+    if up_to_id is not None:
+        query = query.filter(models.ChangeEvent.id <= up_to_id)
+    return [
+        {"id": event_id, "type": event_type, **json.loads(data)}
+        for event_id, event_type, data in query.order_by(models.ChangeEvent.id).limit(limit)
+    ]
+
+def get_oldest_change_event_id(db: Session) -> int:
+    return db.query(func.min(models.ChangeEvent.id)).scalar() or 0
+
 # Payment Modes CRUD
 def create_payment_mode(db: Session, payment_mode: schemas.PaymentModeCreate):
     db_payment_mode = models.PaymentMode(**payment_mode.dict())
     db.add(db_payment_mode)
+    db.flush()
+    _record_change(db, "payment_mode.created", payment_mode_id=db_payment_mode.id)
+    _bump_payment_modes_version(db)
     db.commit()
     db.refresh(db_payment_mode)
     return db_payment_mode
 
 def get_payment_modes(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.PaymentMode).offset(skip).limit(limit).all()
+    """Payment modes by id, from the in-process catalogue"""
+    return payment_mode_cache.cache.get(db).ordered[skip:skip + limit]
+
+def _attach_payment_modes(db: Session, expenses):
+    """
+    Fill in the payment_mode of loaded expenses from the catalogue, instead
+    of joining or lazy-loading it. For expenses only read for a response.
+    """
+    modes = payment_mode_cache.cache.get(db).modes
+    for expense in expenses:
+        set_committed_value(expense, "payment_mode", modes.get(expense.payment_mode_id))
+    return expenses
 
 def get_payment_mode(db: Session, payment_mode_id: int):
     return db.query(models.PaymentMode).filter(models.PaymentMode.id == payment_mode_id).first()
@@ -57,6 +160,8 @@ def update_payment_mode(db: Session, payment_mode_id: int, payment_mode: schemas
         update_data = payment_mode.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_payment_mode, field, value)
+        _record_change(db, "payment_mode.updated", payment_mode_id=payment_mode_id)
+        _bump_payment_modes_version(db)
         db.commit()
         db.refresh(db_payment_mode)
     return db_payment_mode
@@ -64,12 +169,27 @@ def update_payment_mode(db: Session, payment_mode_id: int, payment_mode: schemas
 def delete_payment_mode(db: Session, payment_mode_id: int):
     db_payment_mode = get_payment_mode(db, payment_mode_id)
     if db_payment_mode:
+        # Expenses of a deleted mode are detached, so their rollup rows merge
+        # into the rows without a payment mode
+        table = models.MonthlyCategoryTotal
+        fields = ("total_amount", "expense_count", "paid_amount", "emi_amount")
+        moved = table.payment_mode_id == payment_mode_id
+        deltas = {
+            (row.month, row.category, None): tuple(value or 0 for value in row[2:])
+            for row in db.query(table.month, table.category, *[getattr(table, field) for field in fields]).filter(moved)
+        }
+        db.query(table).filter(moved).delete(synchronize_session=False)
+        if deltas:
+            _adjust_monthly_totals(db, deltas)
         db.delete(db_payment_mode)
+        _record_change(db, "payment_mode.deleted", payment_mode_id=payment_mode_id)
+        _bump_payment_modes_version(db)
         db.commit()
     return db_payment_mode
 
 # Expenses CRUD
-def create_expense(db: Session, expense: schemas.ExpenseCreate):
+def _prepare_expense_data(expense: schemas.ExpenseCreate):
+    """Turn a validated expense into column values, filling in EMI amounts"""
     expense_data = expense.dict()
     
     # Handle EMI calculation
@@ -88,8 +208,18 @@ def create_expense(db: Session, expense: schemas.ExpenseCreate):
         # Update the amount to the total EMI amount
         expense_data['amount'] = emi_calc['total_amount']
     
-    db_expense = models.Expense(**expense_data)
+    return expense_data
+
+def create_expense(db: Session, expense: schemas.ExpenseCreate):
+    db_expense = models.Expense(**_prepare_expense_data(expense))
     db.add(db_expense)
+    db.flush()
+    if db_expense.is_emi:
+        _regenerate_installments(db, db_expense)
+    after = _rollup_entry(db_expense)
+    _track_expense_totals(db, after=after)
+    _record_expense_change(db, "expense.created", db_expense.id, after=after)
+    _bump_data_version(db)
     db.commit()
     db.refresh(db_expense)
     
@@ -99,17 +229,91 @@ def create_expense(db: Session, expense: schemas.ExpenseCreate):
     
     return db_expense
 
-def get_expenses(
-    db: Session, 
-    skip: int = 0, 
-    limit: int = 100, 
+def bulk_create_expenses(db: Session, rows, batch_size: int = 500, max_errors: int = 1000):
+    """
+    Insert expenses from an iterable of (row_number, values) pairs in batches.
+
+    Each batch is validated against ExpenseCreate and written with one executemany
+    INSERT and its rollup deltas in a single transaction. Invalid rows are skipped
+    and reported (up to max_errors) without aborting the import. A values entry
+    may also be an exception raised while parsing that row.
+    """
+    known_payment_modes = set(payment_mode_cache.cache.get(db).modes)
+    result = {"created": 0, "failed": 0, "errors": []}
+
+    def record_error(row_number, error):
+        result["failed"] += 1
+        if len(result["errors"]) < max_errors:
+            result["errors"].append({"row": row_number, "error": error})
+
+    def flush(batch):
+        try:
+            # Core insert on the session's connection skips ORM bookkeeping for the batch
+            table = models.Expense.__table__
+            plain_rows = [expense_data for _, expense_data in batch if not expense_data.get('is_emi')]
+            emi_rows = [expense_data for _, expense_data in batch if expense_data.get('is_emi')]
+            if plain_rows:
+                db.connection().execute(insert(table), plain_rows)
+            if emi_rows:
+                # Ordered RETURNING costs a round trip per row on some backends, so only EMIs
+                # (which need their ids for the installment ledger) go through it
+                expense_ids = db.connection().execute(
+                    insert(table).returning(table.c.id, sort_by_parameter_order=True), emi_rows
+                ).scalars().all()
+                installments = [
+                    row
+                    for expense_id, expense_data in zip(expense_ids, emi_rows)
+                    for row in _installments_for(expense_id, expense_data)
+                ]
+                if installments:
+                    db.connection().execute(insert(models.EmiInstallment.__table__), installments)
+            entries = [_rollup_entry(expense_data) for _, expense_data in batch]
+            _apply_rollup_changes(db, added=entries)
+            # One event per batch; clients refetch the months it touched
+            _record_change(db, "expenses.imported", count=len(batch), months=sorted({key[0] for key, _ in entries if key[0]}))
+            _bump_data_version(db)
+            db.commit()
+            result["created"] += len(batch)
+        except SQLAlchemyError as e:
+            db.rollback()
+            for row_number, _ in batch:
+                record_error(row_number, f"Batch insert failed: {e.__class__.__name__}")
+
+    batch = []
+    for row_number, values in rows:
+        if isinstance(values, Exception):
+            record_error(row_number, str(values))
+            continue
+        try:
+            expense = schemas.ExpenseCreate(**values)
+            if expense.payment_mode_id not in known_payment_modes:
+                raise ValueError(f"Payment mode {expense.payment_mode_id} does not exist")
+            expense_data = _prepare_expense_data(expense)
+        except ValidationError as e:
+            record_error(row_number, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+            continue
+        except (ValueError, TypeError, ZeroDivisionError) as e:
+            record_error(row_number, str(e) or e.__class__.__name__)
+            continue
+
+        batch.append((row_number, expense_data))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+
+    if batch:
+        flush(batch)
+    return result
+
+def _filter_expenses(
+    query,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     category: Optional[str] = None,
     payment_mode_id: Optional[int] = None
 ):
-    query = db.query(models.Expense)
-    
     if start_date:
         query = query.filter(models.Expense.date >= start_date)
     if end_date:
@@ -118,42 +322,367 @@ def get_expenses(
         query = query.filter(models.Expense.category == category)
     if payment_mode_id:
         query = query.filter(models.Expense.payment_mode_id == payment_mode_id)
+    return query
+
+def get_expenses(
+    db: Session, 
+    skip: int = 0, 
+    limit: int = 100, 
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    payment_mode_id: Optional[int] = None,
+    as_rows: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+):
+    """
+    Get expenses newest first.
+
+    as_rows returns plain dicts shaped like schemas.Expense instead of ORM
+    objects; fields (see parse_expense_fields) also limits the dicts, and
+    the columns read, to those fields.
+    """
+    if as_rows or fields is not None:
+        fields = fields or EXPENSE_RESPONSE_FIELDS
+        query = _filter_expenses(_expense_row_query(db, fields), start_date, end_date, category, payment_mode_id)
+        rows = query.order_by(models.Expense.date.desc(), models.Expense.id.desc()).offset(skip).limit(limit).all()
+        return _expense_row_dicts(db, rows, fields)
+
+    query = _filter_expenses(db.query(models.Expense), start_date, end_date, category, payment_mode_id)
     
-    return query.order_by(models.Expense.date.desc()).offset(skip).limit(limit).all()
+    return _attach_payment_modes(
+        db, query.order_by(models.Expense.date.desc(), models.Expense.id.desc()).offset(skip).limit(limit).all()
+    )
+
+# Response fields in the order schemas.Expense serializes them
+EXPENSE_RESPONSE_FIELDS = tuple(schemas.Expense.model_fields)
+_FLOAT_RESPONSE_FIELDS = frozenset(
+    field for field, info in schemas.Expense.model_fields.items() if info.annotation in (float, Optional[float])
+)
+
+def parse_expense_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Expense fields named in a comma separated fields= value, in response order; id is always included"""
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(EXPENSE_RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown expense fields: {', '.join(sorted(unknown))}. "
+            f"Choose from: {', '.join(EXPENSE_RESPONSE_FIELDS)}"
+        )
+    requested.add("id")
+    return tuple(field for field in EXPENSE_RESPONSE_FIELDS if field in requested)
+
+def _expense_row_query(db: Session, fields: Tuple[str, ...] = EXPENSE_RESPONSE_FIELDS):
+    """Query selecting the columns behind the given response fields as plain tuples"""
+    columns = [getattr(models.Expense, field) for field in fields if field != "payment_mode"]
+    if "payment_mode" not in fields:
+        return db.query(*columns)
+    # The nested payment mode comes from the catalogue, by id
+    return db.query(*columns, models.Expense.payment_mode_id)
+
+def _expense_row_dicts(db: Session, rows, fields: Tuple[str, ...] = EXPENSE_RESPONSE_FIELDS):
+    """
+    Turn _expense_row_query tuples into dicts that encode to the same JSON as
+    schemas.Expense (limited to fields). Columns added after the selected
+    ones are ignored.
+    """
+    columns = tuple(field for field in fields if field != "payment_mode")
+    float_columns = [field for field in columns if field in _FLOAT_RESPONSE_FIELDS]
+    with_payment_mode = "payment_mode" in fields
+    payment_modes = payment_mode_cache.cache.get(db).rows if with_payment_mode else None
+    split = len(columns)
+    result = []
+    for row in rows:
+        values = dict(zip(columns, row[:split]))
+        for field in float_columns:
+            if values[field] is not None:
+                values[field] = float(values[field])
+        if with_payment_mode:
+            values["payment_mode"] = payment_modes.get(row[split])
+            values = {field: values[field] for field in fields}
+        result.append(values)
+    return result
+
+EXPENSE_EXPORT_COLUMNS = (
+    "id", "title", "amount", "category", "date", "description", "payment_mode_id",
+    "is_emi", "emi_tenure", "emi_processing_fees", "emi_interest_rate", "emi_gst",
+    "emi_monthly_amount", "emi_total_amount", "emi_principal_amount",
+    "is_paid", "paid_date", "paid_amount", "created_at", "updated_at"
+)
+
+def iter_expense_export_rows(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    payment_mode_id: Optional[int] = None,
+    batch_size: int = 1000
+):
+    """
+    Yield expense rows as plain tuples in EXPENSE_EXPORT_COLUMNS order, newest first.
+
+    Rows are fetched batch_size at a time (a server-side cursor on PostgreSQL),
+    so memory stays flat however many rows match.
+    """
+    columns = [getattr(models.Expense, column) for column in EXPENSE_EXPORT_COLUMNS]
+    query = _filter_expenses(db.query(*columns), start_date, end_date, category, payment_mode_id)
+    query = query.order_by(models.Expense.date.desc(), models.Expense.id.desc()).execution_options(yield_per=batch_size)
+    for row in query:
+        yield tuple(row)
+
+# Ids in cursors and tokens are compared with 64-bit integer columns
+MAX_POSITION_ID = 2 ** 63 - 1
+
+def _position_id(value) -> int:
+    """The id of a decoded cursor or token position, raising ValueError unless the database can compare it"""
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= MAX_POSITION_ID:
+        raise ValueError(f"Invalid position id: {value!r}")
+    return value
+
+def encode_expense_cursor(expense_date: date, expense_id: int) -> str:
+    """Encode the (date, id) position of an expense as an opaque cursor"""
+    payload = json.dumps([expense_date.isoformat(), expense_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_expense_cursor(cursor: str):
+    """Decode a cursor produced by encode_expense_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        expense_date, expense_id = json.loads(base64.urlsafe_b64decode(padded))
+        return date.fromisoformat(expense_date), _position_id(expense_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def get_expenses_page(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    payment_mode_id: Optional[int] = None,
+    with_payment_mode: bool = True
+):
+    """
+    Get one page of expenses, newest first, using keyset pagination.
+
+    Returns the expenses and the cursor of the next page (None on the last page).
+    Pass with_payment_mode=False when the caller resolves payment modes itself.
+    """
+    query = _filter_expenses(db.query(models.Expense), start_date, end_date, category, payment_mode_id)
+
+    if cursor:
+        cursor_date, cursor_id = decode_expense_cursor(cursor)
+        query = query.filter(tuple_(models.Expense.date, models.Expense.id) < tuple_(cursor_date, cursor_id))
+
+    expenses = query.order_by(models.Expense.date.desc(), models.Expense.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(expenses) > limit:
+        expenses = expenses[:limit]
+        next_cursor = encode_expense_cursor(expenses[-1].date, expenses[-1].id)
+    if with_payment_mode:
+        _attach_payment_modes(db, expenses)
+    return expenses, next_cursor
+
+def get_payment_modes_for(db: Session, expenses):
+    """The distinct payment modes referenced by a list of expenses, ordered by id"""
+    payment_mode_ids = {expense.payment_mode_id for expense in expenses if expense.payment_mode_id is not None}
+    if not payment_mode_ids:
+        return []
+    modes = payment_mode_cache.cache.get(db).modes
+    return [modes[mode_id] for mode_id in sorted(payment_mode_ids) if mode_id in modes]
+
+def search_expenses(
+    db: Session,
+    q: str,
+    skip: int = 0,
+    limit: int = 50,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    payment_mode_id: Optional[int] = None,
+    as_rows: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+):
+    """
+    Expenses whose title or description contain words starting with every
+    word of q, best match first (newest first among equals), out of the
+    newest search.SEARCH_CANDIDATES matches. Takes the filters, as_rows and
+    fields of get_expenses; raises ValueError if q has no words.
+    """
+    matches = _filter_expenses(
+        search.match_query(db.get_bind().dialect.name, q), start_date, end_date, category, payment_mode_id
+    ).limit(max(search.SEARCH_CANDIDATES, skip + limit)).subquery("matches")
+    if as_rows or fields is not None:
+        fields = fields or EXPENSE_RESPONSE_FIELDS
+        query = _expense_row_query(db, fields)
+    else:
+        query = db.query(models.Expense)
+    query = query.join(matches, matches.c.expense_id == models.Expense.id).order_by(
+        matches.c.rank, models.Expense.date.desc(), models.Expense.id.desc()
+    ).offset(skip).limit(limit)
+    if as_rows or fields is not None:
+        return _expense_row_dicts(db, query.all(), fields)
+    return _attach_payment_modes(db, query.all())
+
+# Delta Sync
+# A fresh token starts this far back, so rows written by transactions that
+# were still open when the previous sync ran are picked up next time
+SYNC_OVERLAP = timedelta(seconds=5)
+SYNC_TOMBSTONE_RETENTION = timedelta(days=90)
+
+def _as_utc(value: datetime) -> datetime:
+    """Timezone-aware UTC datetime; naive values (SQLite) are already UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _sync_bound(db: Session, value: datetime):
+    """A timestamp to compare with updated_at/deleted_at columns"""
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite compares the stored text: 'YYYY-MM-DD HH:MM:SS' from CURRENT_TIMESTAMP,
+        # with '.ffffff' appended when the value was set from Python
+        value = _as_utc(value)
+        return literal(value.strftime("%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S"))
+    return _as_utc(value)
+
+def encode_sync_token(expense_position, deletion_position) -> str:
+    """Encode the (timestamp, id) positions reached in the expense and deletion logs as an opaque token"""
+    payload = json.dumps([
+        expense_position[0].isoformat(), expense_position[1],
+        deletion_position[0].isoformat(), deletion_position[1]
+    ]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_sync_token(token: str):
+    """Decode a token produced by encode_sync_token, raising ValueError if it is malformed"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        expense_at, expense_id, deleted_at, deletion_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (
+            (_as_utc(datetime.fromisoformat(expense_at)), _position_id(expense_id)),
+            (_as_utc(datetime.fromisoformat(deleted_at)), _position_id(deletion_id))
+        )
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid sync token: {token}") from e
+
+def get_expense_changes(db: Session, since: Optional[str] = None, limit: int = 500):
+    """
+    Expenses created or updated and ids deleted since a sync token.
+
+    Both logs are read in (timestamp, id) order from where the token left
+    off, at most limit entries each; has_more asks the client to call again
+    straight away. Without a token, or with one that is malformed or older
+    than the tombstone retention, the response only carries reset and a
+    token to sync from after reloading everything.
+    """
+    now = _as_utc(db.query(func.now()).scalar())
+    fresh = (now - SYNC_OVERLAP, 0)
+    reset = {
+        "items": [],
+        "deleted_ids": [],
+        "payment_modes": [],
+        "next_token": encode_sync_token(fresh, fresh),
+        "has_more": False,
+        "reset": True
+    }
+    if since is None:
+        return reset
+    try:
+        expense_position, deletion_position = decode_sync_token(since)
+    except ValueError:
+        # e.g. stored by an older client; reloading is the only way back in step
+        return reset
+    if deletion_position[0] < now - SYNC_TOMBSTONE_RETENTION:
+        return reset
+
+    expenses = _attach_payment_modes(db, db.query(models.Expense).filter(
+        tuple_(models.Expense.updated_at, models.Expense.id)
+        > tuple_(_sync_bound(db, expense_position[0]), expense_position[1])
+    ).order_by(models.Expense.updated_at, models.Expense.id).limit(limit + 1).all())
+
+    # An id that exists again (SQLite can reuse the highest id) is reported as a change, not a delete
+    deletions = db.query(models.ExpenseDeletion).filter(
+        tuple_(models.ExpenseDeletion.deleted_at, models.ExpenseDeletion.id)
+        > tuple_(_sync_bound(db, deletion_position[0]), deletion_position[1]),
+        ~exists().where(models.Expense.id == models.ExpenseDeletion.expense_id)
+    ).order_by(models.ExpenseDeletion.deleted_at, models.ExpenseDeletion.id).limit(limit + 1).all()
+
+    # Renamed or recoloured payment modes change the nested payment_mode of rows the client already has
+    payment_modes = db.query(models.PaymentMode).filter(
+        models.PaymentMode.updated_at >= _sync_bound(db, expense_position[0])
+    ).order_by(models.PaymentMode.id).all()
+
+    has_more = len(expenses) > limit or len(deletions) > limit
+    expenses, deletions = expenses[:limit], deletions[:limit]
+    # While paging, each log continues after its last entry; once both are
+    # read to the end, the next sync starts from fresh
+    if has_more:
+        if expenses:
+            expense_position = (expenses[-1].updated_at, expenses[-1].id)
+        if deletions:
+            deletion_position = (deletions[-1].deleted_at, deletions[-1].id)
+    else:
+        expense_position = deletion_position = fresh
+
+    return {
+        "items": expenses,
+        "deleted_ids": [deletion.expense_id for deletion in deletions],
+        "payment_modes": payment_modes,
+        "next_token": encode_sync_token(expense_position, deletion_position),
+        "has_more": has_more,
+        "reset": False
+    }
 
 def get_expense(db: Session, expense_id: int):
     return db.query(models.Expense).filter(models.Expense.id == expense_id).first()
 
+def _prepare_expense_update(current, update_data):
+    """Complete the column values of an update to an expense (or its column values), recalculating EMI amounts"""
+    get = _field_getter(current)
+    
+    # Convert string date to date object if present
+    if 'date' in update_data and update_data['date']:
+        update_data['date'] = datetime.strptime(update_data['date'], '%Y-%m-%d').date()
+    
+    # Handle EMI calculation if EMI fields are being updated
+    if any(key.startswith('emi_') for key in update_data.keys()) or update_data.get('is_emi'):
+        if update_data.get('is_emi'):
+            principal = update_data.get('amount', get('amount'))
+            tenure = update_data.get('emi_tenure', get('emi_tenure') or 0)
+            interest_rate = update_data.get('emi_interest_rate', get('emi_interest_rate') or 0)
+            processing_fees = update_data.get('emi_processing_fees', get('emi_processing_fees') or 0)
+            gst = update_data.get('emi_gst', get('emi_gst') or 0)
+            
+            emi_calc = calculate_emi(principal, tenure, interest_rate, processing_fees, gst)
+            
+            update_data['emi_principal_amount'] = principal
+            update_data['emi_monthly_amount'] = emi_calc['monthly_amount']
+            update_data['emi_total_amount'] = emi_calc['total_amount']
+            # Update the amount to the total EMI amount
+            update_data['amount'] = emi_calc['total_amount']
+    return update_data
+
 def update_expense(db: Session, expense_id: int, expense: schemas.ExpenseUpdate):
     db_expense = get_expense(db, expense_id)
     if db_expense:
-        update_data = expense.dict(exclude_unset=True)
-        
-        # Convert string date to date object if present
-        if 'date' in update_data and update_data['date']:
-            from datetime import datetime
-            update_data['date'] = datetime.strptime(update_data['date'], '%Y-%m-%d').date()
-        
-        # Handle EMI calculation if EMI fields are being updated
-        if any(key.startswith('emi_') for key in update_data.keys()) or update_data.get('is_emi'):
-            if update_data.get('is_emi'):
-                principal = update_data.get('amount', db_expense.amount)
-                tenure = update_data.get('emi_tenure', db_expense.emi_tenure or 0)
-                interest_rate = update_data.get('emi_interest_rate', db_expense.emi_interest_rate or 0)
-                processing_fees = update_data.get('emi_processing_fees', db_expense.emi_processing_fees or 0)
-                gst = update_data.get('emi_gst', db_expense.emi_gst or 0)
-                
-                emi_calc = calculate_emi(principal, tenure, interest_rate, processing_fees, gst)
-                
-                update_data['emi_principal_amount'] = principal
-                update_data['emi_monthly_amount'] = emi_calc['monthly_amount']
-                update_data['emi_total_amount'] = emi_calc['total_amount']
-                # Update the amount to the total EMI amount
-                update_data['amount'] = emi_calc['total_amount']
+        before = _rollup_entry(db_expense)
+        schedule_before = (db_expense.is_emi, db_expense.date, db_expense.emi_tenure, db_expense.emi_monthly_amount)
+        update_data = _prepare_expense_update(db_expense, expense.dict(exclude_unset=True))
         
         for field, value in update_data.items():
             setattr(db_expense, field, value)
         db_expense.updated_at = datetime.utcnow()
+        schedule_after = (db_expense.is_emi, db_expense.date, db_expense.emi_tenure, db_expense.emi_monthly_amount)
+        if schedule_after != schedule_before:
+            _regenerate_installments(db, db_expense)
+        elif db_expense.is_emi:
+            _sync_installments_paid(db, db_expense)
+        after = _rollup_entry(db_expense)
+        _track_expense_totals(db, before=before, after=after)
+        _record_expense_change(db, "expense.updated", expense_id, before=before, after=after)
+        _bump_data_version(db)
         db.commit()
         db.refresh(db_expense)
     return db_expense
@@ -161,17 +690,36 @@ def update_expense(db: Session, expense_id: int, expense: schemas.ExpenseUpdate)
 def delete_expense(db: Session, expense_id: int):
     db_expense = get_expense(db, expense_id)
     if db_expense:
+        before = _rollup_entry(db_expense)
+        _track_expense_totals(db, before=before)
+        _record_expense_change(db, "expense.deleted", expense_id, before=before)
+        db.query(models.EmiInstallment).filter(
+            models.EmiInstallment.expense_id == expense_id
+        ).delete(synchronize_session=False)
         db.delete(db_expense)
+        _log_expense_deletions(db, [expense_id])
+        _bump_data_version(db)
         db.commit()
     return db_expense
 
 
 
+def _log_expense_deletions(db: Session, expense_ids):
+    """Leave tombstones for syncing clients and drop the ones past retention"""
+    db.connection().execute(
+        insert(models.ExpenseDeletion.__table__), [{"expense_id": expense_id} for expense_id in expense_ids]
+    )
+    cutoff = datetime.now(timezone.utc) - SYNC_TOMBSTONE_RETENTION
+    db.query(models.ExpenseDeletion).filter(
+        models.ExpenseDeletion.deleted_at < _sync_bound(db, cutoff)
+    ).delete(synchronize_session=False)
+
 def mark_expense_as_paid(db: Session, expense_id: int, paid_amount: Optional[float] = None, paid_date: Optional[str] = None):
     """Mark an expense as paid"""
     expense = db.query(models.Expense).filter(models.Expense.id == expense_id).first()
     if not expense:
         return None
+    before = _rollup_entry(expense)
     
     # For EMI expenses, increment the paid amount by one month's EMI
     if expense.is_emi:
@@ -197,6 +745,12 @@ def mark_expense_as_paid(db: Session, expense_id: int, paid_amount: Optional[flo
     else:
         expense.paid_date = date.today()
     
+    if expense.is_emi:
+        _sync_installments_paid(db, expense)
+    after = _rollup_entry(expense)
+    _track_expense_totals(db, before=before, after=after)
+    _record_expense_change(db, "expense.paid", expense_id, before=before, after=after)
+    _bump_data_version(db)
     db.commit()
     db.refresh(expense)
     return expense
@@ -206,120 +760,422 @@ def mark_expense_as_unpaid(db: Session, expense_id: int):
     expense = db.query(models.Expense).filter(models.Expense.id == expense_id).first()
     if not expense:
         return None
+    before = _rollup_entry(expense)
     
     expense.is_paid = False
     expense.paid_date = None
     expense.paid_amount = None
     
+    if expense.is_emi:
+        _sync_installments_paid(db, expense)
+    after = _rollup_entry(expense)
+    _track_expense_totals(db, before=before, after=after)
+    _record_expense_change(db, "expense.unpaid", expense_id, before=before, after=after)
+    _bump_data_version(db)
     db.commit()
     db.refresh(expense)
     return expense
 
-def get_bill_payment_modes(db: Session, month: Optional[str] = None, year: Optional[int] = None):
-    """Get payment modes with bill details for credit card tracking"""
-    # Get all payment modes that have expenses
-    payment_modes = db.query(models.PaymentMode).join(models.Expense).distinct().all()
-    
-    result = []
-    for payment_mode in payment_modes:
-        # Build query for expenses
-        query = db.query(models.Expense).filter(models.Expense.payment_mode_id == payment_mode.id)
-        
-        # Filter by month/year if provided
-        if month and year:
-            start_date = datetime.strptime(f"{year}-{month}-01", "%Y-%m-%d").date()
-            end_date = (start_date + relativedelta(months=1)) - timedelta(days=1)
+# Batch Mutations
+MAX_BATCH_OPERATIONS = 1000
+BATCH_OPERATIONS = ("update", "delete", "mark_paid", "mark_unpaid")
+# Columns the rollup, installment and EMI calculations read
+_BATCH_COLUMNS = (
+    "id", "date", "amount", "category", "payment_mode_id", "is_emi", "is_paid", "paid_amount", "paid_date",
+    "emi_tenure", "emi_interest_rate", "emi_processing_fees", "emi_gst", "emi_monthly_amount", "emi_total_amount"
+)
+
+def _batch_rows(db: Session, expense_ids):
+    """{id: column values} of the given expenses"""
+    columns = [getattr(models.Expense, column) for column in _BATCH_COLUMNS]
+    return {row.id: row._asdict() for row in db.query(*columns).filter(models.Expense.id.in_(expense_ids))}
+
+def _mark_paid_values(paid_amount: Optional[float], paid_date: date):
+    """
+    SET clause of mark_expense_as_paid as SQL: EMIs are paid one more monthly
+    installment (capped at the total, which also marks them paid), other
+    expenses are paid in full
+    """
+    table = models.Expense
+    total = func.coalesce(func.nullif(table.emi_total_amount, 0), table.amount)
+    incremented = func.coalesce(table.paid_amount, 0) + func.coalesce(table.emi_monthly_amount, 0)
+    full_amount = table.amount if not paid_amount else literal(paid_amount)
+    return {
+        table.paid_amount: case(
+            (table.is_emi == True, case((incremented >= total, total), else_=incremented)),
+            else_=full_amount
+        ),
+        table.is_paid: case((table.is_emi == True, incremented >= total), else_=True),
+        table.paid_date: paid_date,
+        table.updated_at: datetime.utcnow()
+    }
+
+def _sync_batch_installments(db: Session, before_rows, after_rows):
+    """Regenerate the schedules of EMIs whose terms changed and re-flag paid installments of the others"""
+    table = models.EmiInstallment
+    schedule = lambda row: (row["is_emi"], row["date"], row["emi_tenure"], row["emi_monthly_amount"])
+    rescheduled = [expense_id for expense_id, row in after_rows.items() if schedule(row) != schedule(before_rows[expense_id])]
+    if rescheduled:
+        db.query(table).filter(table.expense_id.in_(rescheduled)).delete(synchronize_session=False)
+        rows = [row for expense_id in rescheduled for row in _installments_for(expense_id, after_rows[expense_id])]
+        if rows:
+            db.connection().execute(insert(table.__table__), rows)
+
+    rescheduled = set(rescheduled)
+    synced = {
+        expense_id: row for expense_id, row in after_rows.items()
+        if row["is_emi"] and expense_id not in rescheduled
+    }
+    if synced:
+        # One UPDATE for every EMI: installments up to each expense's paid count are paid
+        paid_count = case({expense_id: _paid_installment_count(row) for expense_id, row in synced.items()}, value=table.expense_id)
+        paid_on = case({expense_id: row["paid_date"] or date.today() for expense_id, row in synced.items()}, value=table.expense_id)
+        db.query(table).filter(table.expense_id.in_(list(synced))).update({
+            table.is_paid: table.installment_number <= paid_count,
+            table.paid_date: case(
+                (table.installment_number > paid_count, None),
+                (table.is_paid == True, table.paid_date),
+                else_=paid_on
+            )
+        }, synchronize_session=False)
+
+def _apply_expense_batch(db: Session, updates=None, deletes=(), paid=None, unpaid=()):
+    """
+    Apply grouped mutations with set-based statements in one transaction.
+
+    updates maps ids to ExpenseUpdate values, paid maps ids to
+    (paid_amount, paid_date). Raises ValueError if an expense is missing.
+    """
+    updates, paid = updates or {}, paid or {}
+    expense_ids = set(updates) | set(deletes) | set(paid) | set(unpaid)
+    if not expense_ids:
+        return {"updated": 0, "deleted": 0, "marked_paid": 0, "marked_unpaid": 0}
+    before_rows = _batch_rows(db, expense_ids)
+    missing = sorted(expense_ids - set(before_rows))
+    if missing:
+        raise ValueError(f"Expenses not found: {', '.join(str(expense_id) for expense_id in missing)}")
+
+    table = models.Expense
+    if updates:
+        # Rows setting the same columns share one executemany UPDATE
+        updated_at = datetime.utcnow()
+        by_columns = {}
+        for expense_id, update_data in updates.items():
+            values = _prepare_expense_update(before_rows[expense_id], dict(update_data))
+            values["updated_at"] = updated_at
+            params = {f"new_{column}": value for column, value in values.items()}
+            by_columns.setdefault(tuple(sorted(values)), []).append(dict(params, expense_id=expense_id))
+        for columns, params in by_columns.items():
+            db.connection().execute(
+                update(table.__table__).where(table.__table__.c.id == bindparam("expense_id")).values(
+                    {column: bindparam(f"new_{column}") for column in columns}
+                ),
+                params
+            )
+
+    # Non-EMI expenses may be paid a given amount on a given date; group by both
+    by_payment = {}
+    for expense_id, payment in paid.items():
+        by_payment.setdefault(payment, []).append(expense_id)
+    for (paid_amount, paid_date), ids in by_payment.items():
+        db.query(table).filter(table.id.in_(ids)).update(
+            _mark_paid_values(paid_amount, paid_date or date.today()), synchronize_session=False
+        )
+
+    if unpaid:
+        db.query(table).filter(table.id.in_(list(unpaid))).update({
+            table.is_paid: False,
+            table.paid_date: None,
+            table.paid_amount: None,
+            table.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+
+    if deletes:
+        db.query(models.EmiInstallment).filter(
+            models.EmiInstallment.expense_id.in_(list(deletes))
+        ).delete(synchronize_session=False)
+        db.query(table).filter(table.id.in_(list(deletes))).delete(synchronize_session=False)
+        _log_expense_deletions(db, deletes)
+
+    after_rows = _batch_rows(db, expense_ids - set(deletes))
+    _sync_batch_installments(db, before_rows, after_rows)
+    before = {expense_id: _rollup_entry(row) for expense_id, row in before_rows.items()}
+    after = {expense_id: _rollup_entry(row) for expense_id, row in after_rows.items()}
+    _apply_rollup_changes(db, removed=list(before.values()), added=list(after.values()))
+
+    event_types = [("expense.updated", updates), ("expense.deleted", deletes), ("expense.paid", paid), ("expense.unpaid", unpaid)]
+    _record_expense_changes(db, [
+        (event_type, expense_id, before[expense_id], after.get(expense_id))
+        for event_type, ids in event_types
+        for expense_id in ids
+    ])
+    _bump_data_version(db)
+    db.commit()
+    return {"updated": len(updates), "deleted": len(deletes), "marked_paid": len(paid), "marked_unpaid": len(unpaid)}
+
+def apply_expense_batch(db: Session, operations):
+    """
+    Run a list of ExpenseBatchOperation as one transaction; an invalid
+    operation or a missing expense fails the whole batch with ValueError
+    """
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+    updates, deletes, paid, unpaid = {}, [], {}, []
+    seen = set()
+    for index, operation in enumerate(operations):
+        if operation.op not in BATCH_OPERATIONS:
+            raise ValueError(f"Operation {index}: unknown op {operation.op!r}, expected one of {', '.join(BATCH_OPERATIONS)}")
+        if operation.id in seen:
+            raise ValueError(f"Operation {index}: expense {operation.id} appears more than once")
+        seen.add(operation.id)
+        if operation.op == "update":
+            if operation.changes is None:
+                raise ValueError(f"Operation {index}: update needs changes")
+            updates[operation.id] = operation.changes.dict(exclude_unset=True)
+        elif operation.op == "delete":
+            deletes.append(operation.id)
+        elif operation.op == "mark_paid":
+            paid[operation.id] = (operation.paid_amount, operation.paid_date)
+        else:
+            unpaid.append(operation.id)
+    return _apply_expense_batch(db, updates=updates, deletes=deletes, paid=paid, unpaid=unpaid)
+
+def mark_bill_paid(
+    db: Session,
+    payment_mode_id: int,
+    month: Optional[str] = None,
+    year: Optional[int] = None,
+    paid_date: Optional[date] = None
+):
+    """Mark every unpaid expense of a payment mode's bill as paid (EMIs by one installment) in one transaction"""
+    date_range = _bill_date_range(month, year)
+    query = db.query(models.Expense.id).filter(
+        models.Expense.payment_mode_id == payment_mode_id,
+        func.coalesce(models.Expense.is_paid, False) == False
+    )
+    if date_range:
+        query = query.filter(models.Expense.date >= date_range[0], models.Expense.date <= date_range[1])
+    expense_ids = [expense_id for (expense_id,) in query]
+    return _apply_expense_batch(db, paid={expense_id: (None, paid_date) for expense_id in expense_ids})["marked_paid"]
+
+def _bill_date_range(month: Optional[str], year: Optional[int]):
+    """Return the date bounds of a bill month, or None when no month is selected"""
+    if month and year:
+        start_date = datetime.strptime(f"{year}-{month}-01", "%Y-%m-%d").date()
+        end_date = (start_date + relativedelta(months=1)) - timedelta(days=1)
+        return start_date, end_date
+    return None
+
+def _paid_amount_expr():
+    """SQL expression for the paid part of an expense: paid_amount for EMIs, amount once paid otherwise"""
+    return case(
+        (models.Expense.is_emi == True, func.coalesce(models.Expense.paid_amount, 0)),
+        (models.Expense.is_paid == True, models.Expense.amount),
+        else_=0
+    )
+
+def _paid_count_expr():
+    """SQL expression counting an expense as paid: EMIs with any payment, others once is_paid is set"""
+    return case(
+        (models.Expense.is_emi == True, case((func.coalesce(models.Expense.paid_amount, 0) > 0, 1), else_=0)),
+        (models.Expense.is_paid == True, 1),
+        else_=0
+    )
+
+def get_bill_payment_modes(
+    db: Session,
+    month: Optional[str] = None,
+    year: Optional[int] = None,
+    include_expenses: bool = True,
+    as_rows: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+):
+    """Get payment modes with bill details for credit card tracking (as plain dicts with as_rows or fields)"""
+    as_rows = as_rows or fields is not None
+    fields = fields or EXPENSE_RESPONSE_FIELDS
+    date_range = _bill_date_range(month, year)
+
+    # Totals and paid/unpaid counts for every payment mode in one grouped query;
+    # names come from the catalogue rather than a join
+    catalogue = payment_mode_cache.cache.get(db)
+    summary_query = db.query(
+        models.Expense.payment_mode_id.label('id'),
+        func.coalesce(func.sum(models.Expense.amount), 0).label('total_amount'),
+        func.coalesce(func.sum(_paid_amount_expr()), 0).label('paid_amount'),
+        func.count(models.Expense.id).label('expense_count'),
+        func.coalesce(func.sum(_paid_count_expr()), 0).label('paid_count')
+    ).filter(models.Expense.payment_mode_id.isnot(None))
+
+    if date_range:
+        summary_query = summary_query.filter(
+            and_(
+                models.Expense.date >= date_range[0],
+                models.Expense.date <= date_range[1]
+            )
+        )
+
+    summaries = [
+        summary for summary in summary_query.group_by(models.Expense.payment_mode_id).order_by(models.Expense.payment_mode_id)
+        if summary.id in catalogue.modes
+    ]
+
+    # Fetch the expenses of every card in one batch
+    expenses_by_mode = {}
+    if include_expenses and summaries:
+        if as_rows:
+            # The payment mode goes last for grouping, whether or not it was asked for
+            query = _expense_row_query(db, fields).add_columns(models.Expense.payment_mode_id)
+        else:
+            query = db.query(models.Expense)
+        query = query.filter(
+            models.Expense.payment_mode_id.in_([summary.id for summary in summaries])
+        )
+        if date_range:
             query = query.filter(
                 and_(
-                    models.Expense.date >= start_date,
-                    models.Expense.date <= end_date
+                    models.Expense.date >= date_range[0],
+                    models.Expense.date <= date_range[1]
                 )
             )
-        
-        expenses = query.all()
-        
-        if not expenses:
-            continue
-        
-        total_amount = sum(exp.amount for exp in expenses)
-        # For EMI expenses, use paid_amount; for non-EMI, use is_paid
-        paid_amount = sum(
-            exp.paid_amount or 0 if exp.is_emi else (exp.amount if exp.is_paid else 0) 
-            for exp in expenses
+        expenses = query.order_by(models.Expense.date.desc(), models.Expense.id.desc()).all()
+        if as_rows:
+            rows_by_mode = {}
+            for row in expenses:
+                rows_by_mode.setdefault(row[-1], []).append(row)
+            expenses_by_mode = {mode_id: _expense_row_dicts(db, rows, fields) for mode_id, rows in rows_by_mode.items()}
+        else:
+            for expense in _attach_payment_modes(db, expenses):
+                expenses_by_mode.setdefault(expense.payment_mode_id, []).append(expense)
+
+    if as_rows:
+        return [
+            {
+                "id": summary.id,
+                "name": catalogue.name(summary.id),
+                "total_amount": float(summary.total_amount),
+                "paid_amount": float(summary.paid_amount),
+                "unpaid_amount": float(summary.total_amount - summary.paid_amount),
+                "expense_count": summary.expense_count,
+                "paid_count": summary.paid_count,
+                "unpaid_count": summary.expense_count - summary.paid_count,
+                "expenses": expenses_by_mode.get(summary.id, [])
+            }
+            for summary in summaries
+        ]
+
+    return [
+        schemas.BillPaymentMode(
+            id=summary.id,
+            name=catalogue.name(summary.id),
+            total_amount=summary.total_amount,
+            paid_amount=summary.paid_amount,
+            unpaid_amount=summary.total_amount - summary.paid_amount,
+            expense_count=summary.expense_count,
+            paid_count=summary.paid_count,
+            unpaid_count=summary.expense_count - summary.paid_count,
+            expenses=expenses_by_mode.get(summary.id, [])
         )
-        unpaid_amount = total_amount - paid_amount
-        expense_count = len(expenses)
-        # Count as paid if it's an EMI with any paid amount, or non-EMI with is_paid=True
-        paid_count = sum(
-            1 for exp in expenses 
-            if (exp.is_emi and (exp.paid_amount or 0) > 0) or (not exp.is_emi and exp.is_paid)
+        for summary in summaries
+    ]
+
+def get_bill_expenses(
+    db: Session,
+    payment_mode_id: int,
+    month: Optional[str] = None,
+    year: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    as_rows: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+):
+    """Get one page of a payment mode's bill expenses"""
+    as_rows = as_rows or fields is not None
+    fields = fields or EXPENSE_RESPONSE_FIELDS
+    if as_rows:
+        query = _expense_row_query(db, fields)
+    else:
+        query = db.query(models.Expense)
+    query = query.filter(
+        models.Expense.payment_mode_id == payment_mode_id
+    )
+
+    date_range = _bill_date_range(month, year)
+    if date_range:
+        query = query.filter(
+            and_(
+                models.Expense.date >= date_range[0],
+                models.Expense.date <= date_range[1]
+            )
         )
-        unpaid_count = expense_count - paid_count
-        
-        result.append(schemas.BillPaymentMode(
-            id=payment_mode.id,
-            name=payment_mode.name,
-            total_amount=total_amount,
-            paid_amount=paid_amount,
-            unpaid_amount=unpaid_amount,
-            expense_count=expense_count,
-            paid_count=paid_count,
-            unpaid_count=unpaid_count,
-            expenses=expenses
-        ))
-    
-    return result
+
+    expenses = query.order_by(models.Expense.date.desc(), models.Expense.id.desc()).offset(skip).limit(limit).all()
+    return _expense_row_dicts(db, expenses, fields) if as_rows else _attach_payment_modes(db, expenses)
 
 # EMI-specific functions
+def _months_since(column, today: date):
+    """SQL version of calculate_months_passed: calendar months from a date column to today, at least 0"""
+    months = (today.year * 12 + today.month) - (
+        cast(extract("year", column), Integer) * 12 + cast(extract("month", column), Integer)
+    )
+    return case((months > 0, months), else_=0)
+
 def get_emi_expenses(db: Session, skip: int = 0, limit: int = 100):
     """Get all EMI expenses with payment status"""
-    emi_expenses = db.query(models.Expense).filter(models.Expense.is_emi == True).offset(skip).limit(limit).all()
-    
+    # Not capped at the tenure: time-based progress past the last installment
+    # reaches the total including fees
+    months_passed = _months_since(models.Expense.date, date.today())
+    total_amount = func.coalesce(func.nullif(models.Expense.emi_total_amount, 0), models.Expense.amount)
+    # Use the stored paid amount if available, otherwise calculate based on time
+    expected_paid = func.coalesce(
+        func.nullif(models.Expense.paid_amount, 0),
+        months_passed * func.coalesce(models.Expense.emi_monthly_amount, 0)
+    )
+    total_paid = case(
+        # If marked as fully paid, use the stored paid amount
+        (models.Expense.is_paid == True, func.coalesce(func.nullif(models.Expense.paid_amount, 0), models.Expense.amount)),
+        # Don't exceed the total amount
+        (expected_paid > total_amount, total_amount),
+        else_=expected_paid
+    )
+
+    rows = db.query(
+        models.Expense.id,
+        models.Expense.title,
+        models.Expense.category,
+        models.Expense.date,
+        models.Expense.payment_mode_id,
+        func.coalesce(func.nullif(models.Expense.emi_principal_amount, 0), models.Expense.amount).label('principal_amount'),
+        total_amount.label('total_amount'),
+        func.coalesce(models.Expense.emi_monthly_amount, 0).label('monthly_amount'),
+        models.Expense.emi_tenure.label('tenure'),
+        func.coalesce(models.Expense.emi_interest_rate, 0).label('interest_rate'),
+        func.coalesce(models.Expense.emi_processing_fees, 0).label('processing_fees'),
+        func.coalesce(models.Expense.emi_gst, 0).label('gst'),
+        months_passed.label('months_passed'),
+        total_paid.label('total_paid'),
+        (total_amount - total_paid).label('remaining_amount'),
+        models.Expense.is_paid,
+        models.Expense.paid_date
+    ).filter(
+        models.Expense.is_emi == True,
+        models.Expense.emi_tenure > 0
+    ).order_by(models.Expense.id).offset(skip).limit(limit).all()
+
+    catalogue = payment_mode_cache.cache.get(db)
     result = []
-    for expense in emi_expenses:
-        if not expense.emi_tenure:
-            continue
-            
-        # Calculate EMI progress
-        months_passed = calculate_months_passed(expense.date)
-        
-        # Calculate payment status
-        if expense.is_paid:
-            # If marked as fully paid, use the stored paid amount
-            total_paid = expense.paid_amount or expense.amount
-        else:
-            # Use the stored paid amount if available, otherwise calculate based on time
-            total_paid = expense.paid_amount or (months_passed * (expense.emi_monthly_amount or 0))
-            # Don't exceed the total amount
-            total_paid = min(total_paid, expense.emi_total_amount or expense.amount)
-        
-        remaining_amount = (expense.emi_total_amount or expense.amount) - total_paid
-        
+    for row in rows:
         # Calculate progress based on actual payments, not just time
-        if expense.emi_monthly_amount and expense.emi_monthly_amount > 0:
-            months_paid = int(total_paid / expense.emi_monthly_amount)
-            remaining_emi_count = max(0, expense.emi_tenure - months_paid)
+        if row.monthly_amount > 0:
+            # Same tolerance as _paid_installment_count: a total that is tenure x the
+            # monthly amount may divide to just under the tenure
+            remaining_emi_count = max(0, row.tenure - int(row.total_paid / row.monthly_amount + 1e-9))
         else:
-            remaining_emi_count = max(0, expense.emi_tenure - months_passed)
-        
+            remaining_emi_count = max(0, row.tenure - row.months_passed)
+
         result.append(schemas.EMIDetails(
-            id=expense.id,
-            title=expense.title,
-            category=expense.category,
-            date=expense.date,
-            payment_mode=expense.payment_mode.name,  # Convert to string
-            principal_amount=expense.emi_principal_amount or expense.amount,
-            total_amount=expense.emi_total_amount or expense.amount,
-            monthly_amount=expense.emi_monthly_amount or 0,
-            tenure=expense.emi_tenure,
-            interest_rate=expense.emi_interest_rate or 0,
-            processing_fees=expense.emi_processing_fees or 0,  # Add missing field
-            gst=expense.emi_gst or 0,  # Add missing field
             remaining_emi_count=remaining_emi_count,
-            total_paid=total_paid,
-            remaining_amount=remaining_amount,
-            is_paid=expense.is_paid,
-            paid_date=expense.paid_date
+            payment_mode=catalogue.name(row.payment_mode_id),
+            **{field: value for field, value in row._mapping.items() if field not in ('months_passed', 'payment_mode_id')}
         ))
     
     return result
@@ -334,6 +1190,9 @@ def calculate_months_passed(start_date: date) -> int:
 def create_budget(db: Session, budget: schemas.BudgetCreate):
     db_budget = models.Budget(**budget.dict())
     db.add(db_budget)
+    db.flush()
+    _record_change(db, "budget.created", budget_id=db_budget.id, month=db_budget.month, category=db_budget.category)
+    _bump_data_version(db)
     db.commit()
     db.refresh(db_budget)
     return db_budget
@@ -351,6 +1210,8 @@ def update_budget(db: Session, budget_id: int, budget: schemas.BudgetUpdate):
         for field, value in update_data.items():
             setattr(db_budget, field, value)
         db_budget.updated_at = datetime.utcnow()
+        _record_change(db, "budget.updated", budget_id=budget_id, month=db_budget.month, category=db_budget.category)
+        _bump_data_version(db)
         db.commit()
         db.refresh(db_budget)
     return db_budget
@@ -359,50 +1220,508 @@ def delete_budget(db: Session, budget_id: int):
     db_budget = get_budget(db, budget_id)
     if db_budget:
         db.delete(db_budget)
+        _record_change(db, "budget.deleted", budget_id=budget_id, month=db_budget.month, category=db_budget.category)
+        _bump_data_version(db)
         db.commit()
     return db_budget
 
+BUDGET_REPORT_MAX_MONTHS = 120
+
+def _parse_month(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise ValueError(f"Invalid month: {value!r}, expected YYYY-MM")
+
+def get_budget_usage_matrix(db: Session, start_month: Optional[str] = None, end_month: Optional[str] = None):
+    """Budget vs actual spend per category and month (YYYY-MM, inclusive; default this calendar year)"""
+    today = date.today()
+    start = _parse_month(start_month) if start_month else date(today.year, 1, 1)
+    end = _parse_month(end_month) if end_month else date(start.year, 12, 1)
+    if end < start:
+        raise ValueError("'to' month must not be before 'from' month")
+    month_count = (end.year - start.year) * 12 + end.month - start.month + 1
+    if month_count > BUDGET_REPORT_MAX_MONTHS:
+        raise ValueError(f"Range covers {month_count} months, at most {BUDGET_REPORT_MAX_MONTHS} are allowed")
+    months = [(start + relativedelta(months=offset)).strftime("%Y-%m") for offset in range(month_count)]
+
+    # Budgets and rollup spend stacked into one relation, then summed per (month, category)
+    budgets = select(
+        models.Budget.month.label('month'),
+        models.Budget.category.label('category'),
+        models.Budget.amount.label('budget_amount'),
+        literal(0.0).label('spent_amount'),
+        literal(1).label('budget_rows')
+    ).where(models.Budget.month.between(months[0], months[-1]))
+    spend = select(
+        models.MonthlyCategoryTotal.month,
+        models.MonthlyCategoryTotal.category,
+        literal(0.0),
+        models.MonthlyCategoryTotal.total_amount,
+        literal(0)
+    ).where(models.MonthlyCategoryTotal.month.between(months[0], months[-1]))
+    combined = union_all(budgets, spend).subquery()
+
+    rows = db.query(
+        combined.c.month,
+        combined.c.category,
+        func.sum(combined.c.budget_amount).label('budget_amount'),
+        func.sum(combined.c.spent_amount).label('spent_amount'),
+        func.sum(combined.c.budget_rows).label('budget_rows')
+    ).group_by(combined.c.month, combined.c.category).all()
+
+    cells = {(row.month, row.category): row for row in rows}
+    categories = []
+    for category in sorted({row.category for row in rows}):
+        cells_by_month = []
+        for month in months:
+            row = cells.get((month, category))
+            entry = _budget_usage_entry(
+                category,
+                row.budget_amount if row else 0,
+                row.spent_amount if row else 0
+            )
+            entry["month"] = month
+            entry["has_budget"] = bool(row and row.budget_rows)
+            cells_by_month.append(entry)
+        categories.append({
+            "category": category,
+            "months": cells_by_month,
+            "budget_amount": sum(cell["budget_amount"] for cell in cells_by_month),
+            "spent_amount": sum(cell["spent_amount"] for cell in cells_by_month)
+        })
+
+    return {"start_month": months[0], "end_month": months[-1], "months": months, "categories": categories}
+
+# EMI Installments
+def _paid_installment_count(expense) -> int:
+    """Number of leading installments covered by an EMI's paid_amount (all of them once fully paid)"""
+    get = _field_getter(expense)
+    tenure = get('emi_tenure') or 0
+    if get('is_paid'):
+        return tenure
+    monthly_amount = get('emi_monthly_amount') or 0
+    if monthly_amount <= 0:
+        return 0
+    # Tolerate float drift from repeatedly adding the monthly amount
+    return min(tenure, int((get('paid_amount') or 0) / monthly_amount + 1e-9))
+
+def _installments_for(expense_id: int, expense):
+    """Installment rows for an EMI expense: one per month after the purchase date"""
+    get = _field_getter(expense)
+    if not get('is_emi') or not get('emi_tenure') or not get('date'):
+        return []
+    paid_count = _paid_installment_count(expense)
+    paid_date = get('paid_date') or date.today()
+    return [
+        {
+            "expense_id": expense_id,
+            "installment_number": number,
+            "due_date": get('date') + relativedelta(months=number),
+            "amount": get('emi_monthly_amount') or 0,
+            "is_paid": number <= paid_count,
+            "paid_date": paid_date if number <= paid_count else None
+        }
+        for number in range(1, get('emi_tenure') + 1)
+    ]
+
+def _regenerate_installments(db: Session, expense: models.Expense):
+    db.query(models.EmiInstallment).filter(
+        models.EmiInstallment.expense_id == expense.id
+    ).delete(synchronize_session=False)
+    rows = _installments_for(expense.id, expense)
+    if rows:
+        db.connection().execute(insert(models.EmiInstallment.__table__), rows)
+
+def _sync_installments_paid(db: Session, expense: models.Expense):
+    """Flag the installments covered by the expense's paid_amount as paid and the rest as unpaid"""
+    table = models.EmiInstallment
+    paid_count = _paid_installment_count(expense)
+    db.query(table).filter(
+        table.expense_id == expense.id,
+        table.installment_number <= paid_count,
+        table.is_paid != True
+    ).update({
+        table.is_paid: True,
+        table.paid_date: expense.paid_date or date.today()
+    }, synchronize_session=False)
+    db.query(table).filter(
+        table.expense_id == expense.id,
+        table.installment_number > paid_count,
+        table.is_paid == True
+    ).update({table.is_paid: False, table.paid_date: None}, synchronize_session=False)
+
+def ensure_emi_installments(db: Session, batch_size: int = 1000):
+    """Generate installments for EMI expenses created before the ledger existed"""
+    missing_ids = [row.id for row in db.query(models.Expense.id).filter(
+        models.Expense.is_emi == True,
+        models.Expense.emi_tenure > 0,
+        ~exists().where(models.EmiInstallment.expense_id == models.Expense.id)
+    )]
+    for start in range(0, len(missing_ids), batch_size):
+        expenses = db.query(models.Expense).filter(models.Expense.id.in_(missing_ids[start:start + batch_size])).all()
+        rows = [row for expense in expenses for row in _installments_for(expense.id, expense)]
+        if rows:
+            db.connection().execute(insert(models.EmiInstallment.__table__), rows)
+            _bump_data_version(db)
+            db.commit()
+        db.expunge_all()
+    return len(missing_ids)
+
+def get_emi_dues(db: Session, month: Optional[str] = None):
+    """Get every EMI installment due in a month (YYYY-MM, default current) across all cards"""
+    if month:
+        start_date = _parse_month(month)
+    else:
+        today = date.today()
+        start_date = date(today.year, today.month, 1)
+    start_date, end_date = _month_bounds(start_date.year, start_date.month)
+
+    rows = db.query(
+        models.EmiInstallment.expense_id,
+        models.Expense.title,
+        models.Expense.category,
+        models.Expense.payment_mode_id,
+        models.EmiInstallment.installment_number,
+        models.Expense.emi_tenure.label('tenure'),
+        models.EmiInstallment.due_date,
+        models.EmiInstallment.amount,
+        models.EmiInstallment.is_paid,
+        models.EmiInstallment.paid_date
+    ).join(
+        models.Expense, models.Expense.id == models.EmiInstallment.expense_id
+    ).filter(
+        and_(models.EmiInstallment.due_date >= start_date, models.EmiInstallment.due_date <= end_date)
+    ).order_by(models.EmiInstallment.due_date, models.EmiInstallment.expense_id).all()
+
+    catalogue = payment_mode_cache.cache.get(db)
+    return [dict(row._mapping, payment_mode=catalogue.name(row.payment_mode_id)) for row in rows]
+
+# Monthly Rollup
+ROLLUP_TOLERANCE = 0.01
+
+def _field_getter(expense):
+    """Read fields the same way from an Expense or a dict of its column values"""
+    return expense.get if isinstance(expense, dict) else lambda field: getattr(expense, field)
+
+def _rollup_entry(expense):
+    """Return the rollup key and (amount, count, paid, emi) contribution of an expense or its column values"""
+    get = _field_getter(expense)
+    month = get('date').strftime("%Y-%m") if get('date') else None
+    amount = get('amount') or 0
+    # For EMI expenses, use paid_amount; for non-EMI, use is_paid
+    if get('is_emi'):
+        paid_amount = get('paid_amount') or 0
+    else:
+        paid_amount = amount if get('is_paid') else 0
+    emi_amount = amount if get('is_emi') else 0
+    return (month, get('category'), get('payment_mode_id')), (amount, 1, paid_amount, emi_amount)
+
+def _adjust_monthly_totals(db: Session, deltas):
+    """Add {key: (amount, count, paid, emi)} deltas to the rollup, creating rows as needed"""
+    table = models.MonthlyCategoryTotal
+    rows = [
+        {
+            "month": month,
+            "category": category,
+            "payment_mode_id": payment_mode_id,
+            "total_amount": total_amount,
+            "expense_count": expense_count,
+            "paid_amount": paid_amount,
+            "emi_amount": emi_amount
+        }
+        for (month, category, payment_mode_id), (total_amount, expense_count, paid_amount, emi_amount) in deltas.items()
+    ]
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        # One multi-row upsert per conflict target; keys are unique within a call
+        # so no row conflicts twice. Rows without a payment mode conflict on the
+        # partial unique index instead, as NULLs never match in the constraint
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        for with_mode in (True, False):
+            target_rows = [row for row in rows if (row["payment_mode_id"] is not None) == with_mode]
+            if not target_rows:
+                continue
+            stmt = dialect_insert(table).values(target_rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["month", "category", "payment_mode_id"] if with_mode else ["month", "category"],
+                index_where=None if with_mode else table.payment_mode_id.is_(None),
+                set_={
+                    "total_amount": table.total_amount + stmt.excluded.total_amount,
+                    "expense_count": table.expense_count + stmt.excluded.expense_count,
+                    "paid_amount": table.paid_amount + stmt.excluded.paid_amount,
+                    "emi_amount": table.emi_amount + stmt.excluded.emi_amount
+                }
+            )
+            db.execute(stmt)
+    else:
+        for row in rows:
+            updated = db.query(table).filter(
+                table.month == row["month"],
+                table.category == row["category"],
+                # IS NULL for rows without a payment mode
+                table.payment_mode_id.is_(None) if row["payment_mode_id"] is None
+                else table.payment_mode_id == row["payment_mode_id"]
+            ).update({
+                table.total_amount: table.total_amount + row["total_amount"],
+                table.expense_count: table.expense_count + row["expense_count"],
+                table.paid_amount: table.paid_amount + row["paid_amount"],
+                table.emi_amount: table.emi_amount + row["emi_amount"]
+            }, synchronize_session=False)
+            if not updated:
+                db.execute(insert(table).values(**row))
+
+    shrunk_months = {row["month"] for row in rows if row["expense_count"] < 0}
+    if shrunk_months:
+        # Now that every delta is applied, drop rows whose last expense moved
+        # away so empty categories don't linger
+        db.query(table).filter(
+            table.month.in_(shrunk_months),
+            table.expense_count <= 0
+        ).delete(synchronize_session=False)
+
+def _track_expense_totals(db: Session, before=None, after=None):
+    """Move an expense's contribution in the rollup from its old entry to its new one"""
+    _apply_rollup_changes(db, removed=[before] if before else [], added=[after] if after else [])
+
+def _apply_rollup_changes(db: Session, removed=(), added=()):
+    """Subtract and add many rollup entries in as few statements as the dialect allows"""
+    deltas = {}
+    for sign, entries in ((-1, removed), (1, added)):
+        for key, values in entries:
+            current = deltas.get(key, (0, 0, 0, 0))
+            deltas[key] = tuple(c + sign * v for c, v in zip(current, values))
+
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if deltas:
+        _adjust_monthly_totals(db, deltas)
+
+def _month_key(db: Session, column):
+    """SQL expression formatting a date column as YYYY-MM"""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+def _raw_monthly_totals(db: Session):
+    """Rollup rows computed directly from the expenses table"""
+    month = _month_key(db, models.Expense.date)
+    paid_amount = _paid_amount_expr()
+    emi_amount = case((models.Expense.is_emi == True, models.Expense.amount), else_=0)
+
+    return db.query(
+        month.label("month"),
+        models.Expense.category,
+        models.Expense.payment_mode_id,
+        func.coalesce(func.sum(models.Expense.amount), 0).label("total_amount"),
+        func.count(models.Expense.id).label("expense_count"),
+        func.coalesce(func.sum(paid_amount), 0).label("paid_amount"),
+        func.coalesce(func.sum(emi_amount), 0).label("emi_amount")
+    ).group_by(month, models.Expense.category, models.Expense.payment_mode_id)
+
+def rebuild_monthly_category_totals(db: Session):
+    """Recompute the monthly rollup from scratch and return the number of rows written"""
+    table = models.MonthlyCategoryTotal
+    db.query(table).delete(synchronize_session=False)
+    db.execute(insert(table).from_select(
+        ["month", "category", "payment_mode_id", "total_amount", "expense_count", "paid_amount", "emi_amount"],
+        _raw_monthly_totals(db).statement
+    ))
+    _bump_data_version(db)
+    db.commit()
+    return db.query(func.count(table.id)).scalar()
+
+def verify_monthly_category_totals(db: Session):
+    """Compare the rollup with the expenses table and return any mismatching keys"""
+    table = models.MonthlyCategoryTotal
+    fields = ("total_amount", "expense_count", "paid_amount", "emi_amount")
+
+    expected = {
+        (row.month, row.category, row.payment_mode_id): tuple(getattr(row, field) for field in fields)
+        for row in _raw_monthly_totals(db).all()
+    }
+    actual = {
+        (row.month, row.category, row.payment_mode_id): tuple(getattr(row, field) or 0 for field in fields)
+        for row in db.query(
+            table.month,
+            table.category,
+            table.payment_mode_id,
+            func.sum(table.total_amount).label("total_amount"),
+            func.sum(table.expense_count).label("expense_count"),
+            func.sum(table.paid_amount).label("paid_amount"),
+            func.sum(table.emi_amount).label("emi_amount")
+        ).group_by(table.month, table.category, table.payment_mode_id).all()
+        if row.expense_count
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        expected_values = expected.get(key, (0, 0, 0, 0))
+        actual_values = actual.get(key, (0, 0, 0, 0))
+        if any(abs(e - a) > ROLLUP_TOLERANCE for e, a in zip(expected_values, actual_values)):
+            mismatches.append({
+                "month": key[0],
+                "category": key[1],
+                "payment_mode_id": key[2],
+                "expected": dict(zip(fields, expected_values)),
+                "actual": dict(zip(fields, actual_values))
+            })
+    return mismatches
+
+def ensure_monthly_category_totals(db: Session):
+    """Populate the rollup on first run against a database that already has expenses"""
+    has_rollup = db.query(models.MonthlyCategoryTotal.id).first() is not None
+    has_expenses = db.query(models.Expense.id).first() is not None
+    if has_expenses and not has_rollup:
+        return rebuild_monthly_category_totals(db)
+    return None
+
 # Dashboard Analytics
-def get_dashboard_overview(db: Session):
-    # Get current month
-    now = datetime.now()
-    current_month = now.strftime("%Y-%m")
-    start_of_month = date(now.year, now.month, 1)
-    end_of_month = date(now.year, now.month, calendar.monthrange(now.year, now.month)[1])
-    
+def _month_bounds(year: int, month: int):
+    """Return the first and last day of the given month"""
+    start = date(year, month, 1)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+    return start, end
+
+INSIGHTS_HISTORY_MONTHS = 24
+
+def load_dashboard_rows(db: Session, today: Optional[date] = None, with_trends: bool = False,
+                        with_history: bool = False, with_budgets: bool = False):
+    """
+    Fetch everything the dashboard needs in a single round trip.
+
+    Rollup rows for the current and previous month are grouped by category and
+    payment mode. With a history, the INSIGHTS_HISTORY_MONTHS complete months
+    before them are grouped by category only. Older months collapse into one
+    bucket (all keys NULL) so the all-time totals come back in the same query.
+    The current month's daily totals, its budgets and the payment-mode
+    catalogue version are UNION ALL-ed onto the grouped read when requested.
+    """
+    today = today or datetime.now().date()
+    start_of_month, end_of_month = _month_bounds(today.year, today.month)
+    current_month = start_of_month.strftime("%Y-%m")
+    last_month = (start_of_month - relativedelta(months=1)).strftime("%Y-%m")
+    history_months = [
+        (start_of_month - relativedelta(months=offset)).strftime("%Y-%m")
+        for offset in range(INSIGHTS_HISTORY_MONTHS, -1, -1)
+    ]
+
+    table = models.MonthlyCategoryTotal
+    in_window = table.month.in_([last_month, current_month])
+    in_history = table.month.between(history_months[0], current_month) if with_history else in_window
+    month_key = case((in_history, table.month), else_=None)
+    category_key = case((in_history, table.category), else_=None)
+    # Grouped by id; names come from the payment-mode catalogue
+    payment_mode_key = case((in_window, table.payment_mode_id), else_=None)
+
+    parts = [
+        select(
+            literal("rollup").label('kind'),
+            month_key.label('month'),
+            category_key.label('category'),
+            payment_mode_key.label('payment_mode_id'),
+            cast(null(), Date).label('day'),
+            func.sum(table.total_amount).label('amount'),
+            func.sum(table.expense_count).label('count')
+        ).group_by(month_key, category_key, payment_mode_key).having(func.sum(table.expense_count) > 0),
+        select(
+            literal("version"), null(), null(), null(), null(), null(), models.DataVersion.version
+        ).where(models.DataVersion.id == payment_mode_cache.PAYMENT_MODES_VERSION_ID)
+    ]
+    if with_trends:
+        parts.append(select(
+            literal("daily"), null(), null(), null(),
+            models.Expense.date,
+            func.sum(models.Expense.amount),
+            func.count(models.Expense.id)
+        ).where(
+            and_(models.Expense.date >= start_of_month, models.Expense.date <= end_of_month)
+        ).group_by(models.Expense.date))
+    if with_budgets:
+        # count carries the budget id, to keep budgets of one category in creation order
+        parts.append(select(
+            literal("budget"), null(), models.Budget.category, null(), null(), models.Budget.amount, models.Budget.id
+        ).where(models.Budget.month == current_month))
+
+    rows, daily, budgets, version = [], [], [], 0
+    for row in db.execute(union_all(*parts)):
+        if row.kind == "rollup":
+            rows.append(row)
+        elif row.kind == "daily":
+            daily.append({"date": row.day, "amount": row.amount or 0, "count": row.count})
+        elif row.kind == "budget":
+            budgets.append(row)
+        else:
+            version = row.count or 0
+    catalogue = payment_mode_cache.cache.get(db, version=version)
+
+    return {
+        "today": today,
+        "current_month": current_month,
+        "last_month": last_month,
+        "rows": [
+            {
+                "month": row.month,
+                "category": row.category,
+                "payment_mode": catalogue.name(row.payment_mode_id),
+                "amount": row.amount or 0,
+                "count": row.count
+            }
+            for row in rows
+        ],
+        "daily": daily,
+        # Per-category monthly totals for the complete months plus the current one (last)
+        "history": {
+            "months": history_months,
+            "rows": [(row.month, row.category, row.amount) for row in rows if row.month is not None]
+        } if with_history else None,
+        "budgets": [
+            {"category": row.category, "amount": row.amount}
+            for row in sorted(budgets, key=lambda row: (row.category, row.count))
+        ]
+    }
+
+def _sum_by(rows, key):
+    """Sum amounts and counts of dashboard rows by the given key, keeping first-seen order"""
+    totals = {}
+    for row in rows:
+        amount, count = totals.get(row[key], (0, 0))
+        totals[row[key]] = (amount + row["amount"], count + row["count"])
+    return totals
+
+def _current_month_rows(snapshot):
+    return [row for row in snapshot["rows"] if row["month"] == snapshot["current_month"]]
+
+def _last_month_rows(snapshot):
+    return [row for row in snapshot["rows"] if row["month"] == snapshot["last_month"]]
+
+def build_dashboard_overview(snapshot):
+    current_rows = _current_month_rows(snapshot)
+
     # Total expenses
-    total_expenses = db.query(func.sum(models.Expense.amount)).scalar() or 0
-    
+    total_expenses = sum(row["amount"] for row in snapshot["rows"])
+
     # This month's expenses
-    this_month_expenses = db.query(func.sum(models.Expense.amount)).filter(
-        and_(models.Expense.date >= start_of_month, models.Expense.date <= end_of_month)
-    ).scalar() or 0
-    
+    this_month_expenses = sum(row["amount"] for row in current_rows)
+
     # Top category
-    top_category_result = db.query(
-        models.Expense.category,
-        func.sum(models.Expense.amount).label('total_amount')
-    ).filter(
-        and_(models.Expense.date >= start_of_month, models.Expense.date <= end_of_month)
-    ).group_by(models.Expense.category).order_by(func.sum(models.Expense.amount).desc()).first()
-    
-    top_category = top_category_result[0] if top_category_result else "No expenses"
-    top_category_amount = top_category_result[1] if top_category_result else 0
-    
+    category_totals = _sum_by(current_rows, "category")
+    if category_totals:
+        top_category, (top_category_amount, _) = max(category_totals.items(), key=lambda item: item[1][0])
+    else:
+        top_category, top_category_amount = "No expenses", 0
+
     # Most used payment mode
-    most_used_payment = db.query(
-        models.PaymentMode.name,
-        func.count(models.Expense.id).label('usage_count')
-    ).join(models.Expense).filter(
-        and_(models.Expense.date >= start_of_month, models.Expense.date <= end_of_month)
-    ).group_by(models.PaymentMode.name).order_by(func.count(models.Expense.id).desc()).first()
-    
-    most_used_payment_mode = most_used_payment[0] if most_used_payment else "No payments"
-    
+    payment_mode_counts = _sum_by([row for row in current_rows if row["payment_mode"]], "payment_mode")
+    if payment_mode_counts:
+        most_used_payment_mode = max(payment_mode_counts.items(), key=lambda item: item[1][1])[0]
+    else:
+        most_used_payment_mode = "No payments"
+
     # Expenses count and average
-    expenses_count = db.query(func.count(models.Expense.id)).scalar() or 0
+    expenses_count = sum(row["count"] for row in snapshot["rows"])
     average_expense = total_expenses / expenses_count if expenses_count > 0 else 0
-    
+
     return {
         "total_expenses": total_expenses,
         "total_expenses_this_month": this_month_expenses,
@@ -413,105 +1732,71 @@ def get_dashboard_overview(db: Session):
         "average_expense": average_expense
     }
 
-def get_category_breakdown(db: Session):
-    now = datetime.now()
-    start_of_month = date(now.year, now.month, 1)
-    end_of_month = date(now.year, now.month, calendar.monthrange(now.year, now.month)[1])
-    
-    total_expenses = db.query(func.sum(models.Expense.amount)).filter(
-        and_(models.Expense.date >= start_of_month, models.Expense.date <= end_of_month)
-    ).scalar() or 0
-    
+def build_category_breakdown(snapshot):
+    category_totals = _sum_by(_current_month_rows(snapshot), "category")
+    total_expenses = sum(amount for amount, _ in category_totals.values())
+
     if total_expenses == 0:
         return []
-    
-    breakdown = db.query(
-        models.Expense.category,
-        func.sum(models.Expense.amount).label('amount'),
-        func.count(models.Expense.id).label('count')
-    ).filter(
-        and_(models.Expense.date >= start_of_month, models.Expense.date <= end_of_month)
-    ).group_by(models.Expense.category).all()
-    
+
     return [
         {
-            "category": item.category,
-            "amount": item.amount,
-            "percentage": round((item.amount / total_expenses) * 100, 1),
-            "count": item.count
+            "category": category,
+            "amount": amount,
+            "percentage": round((amount / total_expenses) * 100, 1),
+            "count": count
         }
-        for item in breakdown
+        for category, (amount, count) in category_totals.items()
     ]
 
-def get_budget_usage(db: Session):
-    now = datetime.now()
-    current_month = now.strftime("%Y-%m")
-    
-    budgets = db.query(models.Budget).filter(models.Budget.month == current_month).all()
-    budget_usage = []
-    
-    for budget in budgets:
-        # Get expenses for this category in current month
-        start_of_month = date(now.year, now.month, 1)
-        end_of_month = date(now.year, now.month, calendar.monthrange(now.year, now.month)[1])
-        
-        spent_amount = db.query(func.sum(models.Expense.amount)).filter(
-            and_(
-                models.Expense.category == budget.category,
-                models.Expense.date >= start_of_month,
-                models.Expense.date <= end_of_month
-            )
-        ).scalar() or 0
-        
-        percentage_used = (spent_amount / budget.amount) * 100 if budget.amount > 0 else 0
-        is_exceeded = spent_amount > budget.amount
-        
-        budget_usage.append({
-            "category": budget.category,
-            "budget_amount": budget.amount,
-            "spent_amount": spent_amount,
-            "percentage_used": percentage_used,
-            "is_exceeded": is_exceeded
-        })
-    
-    return budget_usage
+def _budget_usage_entry(category, budget_amount, spent_amount):
+    percentage_used = (spent_amount / budget_amount) * 100 if budget_amount > 0 else 0
+    is_exceeded = spent_amount > budget_amount
+    return {
+        "category": category,
+        "budget_amount": budget_amount,
+        "spent_amount": spent_amount,
+        "percentage_used": percentage_used,
+        "is_exceeded": is_exceeded
+    }
 
-def get_insights(db: Session):
-    now = datetime.now()
-    start_of_month = date(now.year, now.month, 1)
-    end_of_month = date(now.year, now.month, calendar.monthrange(now.year, now.month)[1])
-    
+def build_budget_usage(snapshot):
+    category_totals = _sum_by(_current_month_rows(snapshot), "category")
+    return [
+        _budget_usage_entry(budget["category"], budget["amount"], category_totals.get(budget["category"], (0, 0))[0])
+        for budget in snapshot["budgets"]
+    ]
+
+def build_insights(snapshot):
+    """
+    Spending insights for the current month.
+
+    With a history (see load_dashboard_rows) categories that have a few
+    months behind them get z-score based anomalies, seasonal spikes and
+    trend breaks; the rest fall back to the month-over-month comparison.
+    """
     insights = []
-    
-    # Get this month's expenses by category
-    category_expenses = db.query(
-        models.Expense.category,
-        func.sum(models.Expense.amount).label('total_amount')
-    ).filter(
-        and_(models.Expense.date >= start_of_month, models.Expense.date <= end_of_month)
-    ).group_by(models.Expense.category).all()
-    
-    # Get last month's expenses for comparison
-    last_month_start = date(now.year, now.month - 1, 1) if now.month > 1 else date(now.year - 1, 12, 1)
-    last_month_end = date(now.year, now.month - 1, calendar.monthrange(now.year, now.month - 1)[1]) if now.month > 1 else date(now.year - 1, 12, 31)
-    
-    last_month_expenses = db.query(
-        models.Expense.category,
-        func.sum(models.Expense.amount).label('total_amount')
-    ).filter(
-        and_(models.Expense.date >= last_month_start, models.Expense.date <= last_month_end)
-    ).group_by(models.Expense.category).all()
-    
-    last_month_dict = {item.category: item.total_amount for item in last_month_expenses}
-    
-    for category_expense in category_expenses:
-        category = category_expense.category
-        current_amount = category_expense.total_amount
+    scored = set()
+    history = snapshot["history"]
+    if history is not None:
+        categories, matrix = spending_anomalies.build_matrix(history["rows"], history["months"])
+        insights.extend(spending_anomalies.detect_anomalies(categories, history["months"], matrix))
+        scored = spending_anomalies.categories_with_history(categories, matrix)
+
+    # This month's and last month's expenses by category
+    category_expenses = _sum_by(_current_month_rows(snapshot), "category")
+    last_month_dict = {
+        category: amount for category, (amount, _) in _sum_by(_last_month_rows(snapshot), "category").items()
+    }
+
+    for category, (current_amount, _) in category_expenses.items():
+        if category in scored:
+            continue
         last_amount = last_month_dict.get(category, 0)
-        
+
         if last_amount > 0:
             change_percentage = ((current_amount - last_amount) / last_amount) * 100
-            
+
             if change_percentage > 20:
                 insights.append({
                     "type": "spending_pattern",
@@ -530,43 +1815,166 @@ def get_insights(db: Session):
                     "category": category,
                     "amount": current_amount
                 })
-    
+
     # Check for high spending categories
-    total_monthly_spending = sum(item.total_amount for item in category_expenses)
-    for category_expense in category_expenses:
-        percentage = (category_expense.total_amount / total_monthly_spending) * 100 if total_monthly_spending > 0 else 0
-        
+    total_monthly_spending = sum(amount for amount, _ in category_expenses.values())
+    for category, (amount, _) in category_expenses.items():
+        percentage = (amount / total_monthly_spending) * 100 if total_monthly_spending > 0 else 0
+
         if percentage > 40:
             insights.append({
                 "type": "spending_pattern",
-                "title": f"High {category_expense.category} Spending",
-                "message": f"You're spending {percentage:.1f}% of your money on {category_expense.category}. Consider diversifying your expenses.",
+                "title": f"High {category} Spending",
+                "message": f"You're spending {percentage:.1f}% of your money on {category}. Consider diversifying your expenses.",
                 "severity": "alert",
-                "category": category_expense.category,
-                "amount": category_expense.total_amount
+                "category": category,
+                "amount": amount
             })
-    
+
     return insights
 
-def get_expense_trends(db: Session):
-    now = datetime.now()
-    start_date = date(now.year, now.month, 1)
-    end_date = date(now.year, now.month, calendar.monthrange(now.year, now.month)[1])
-    
-    # Get daily expenses for current month
-    daily_expenses = db.query(
-        models.Expense.date,
-        func.sum(models.Expense.amount).label('amount'),
-        func.count(models.Expense.id).label('count')
-    ).filter(
-        and_(models.Expense.date >= start_date, models.Expense.date <= end_date)
-    ).group_by(models.Expense.date).order_by(models.Expense.date).all()
-    
+def build_expense_trends(snapshot):
+    daily_expenses = _sum_by(snapshot["daily"], "date")
+
     return [
         {
-            "date": expense.date.strftime("%Y-%m-%d"),
-            "amount": expense.amount,
-            "count": expense.count
+            "date": expense_date.strftime("%Y-%m-%d"),
+            "amount": amount,
+            "count": count
         }
-        for expense in daily_expenses
+        for expense_date, (amount, count) in sorted(daily_expenses.items())
     ]
+
+def get_dashboard_summary(db: Session):
+    """Compute every dashboard payload from one read of the monthly rollup"""
+    snapshot = load_dashboard_rows(db, with_trends=True, with_history=True, with_budgets=True)
+    return {
+        "overview": build_dashboard_overview(snapshot),
+        "category_breakdown": build_category_breakdown(snapshot),
+        "budget_usage": build_budget_usage(snapshot),
+        "insights": build_insights(snapshot),
+        "expense_trends": build_expense_trends(snapshot)
+    }
+
+def get_dashboard_overview(db: Session):
+    return build_dashboard_overview(load_dashboard_rows(db))
+
+def get_category_breakdown(db: Session):
+    return build_category_breakdown(load_dashboard_rows(db))
+
+def get_budget_usage(db: Session):
+    return build_budget_usage(load_dashboard_rows(db, with_budgets=True))
+
+def get_insights(db: Session):
+    return build_insights(load_dashboard_rows(db, with_history=True))
+
+def get_expense_trends(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    bucket: Optional[str] = None,
+    group_by: Optional[str] = None
+):
+    """Daily totals of the current month, or bucketed totals over a range when any option is given"""
+    if start_date is None and end_date is None and bucket is None and group_by is None:
+        return build_expense_trends(load_dashboard_rows(db, with_trends=True))
+    return get_bucketed_expense_trends(db, start_date, end_date, bucket or "day", group_by)
+
+TREND_BUCKETS = {
+    # bucket: (default range ending at 'to', step between bucket starts)
+    "day": (relativedelta(months=1), relativedelta(days=1)),
+    "week": (relativedelta(weeks=12), relativedelta(weeks=1)),
+    "month": (relativedelta(years=1), relativedelta(months=1)),
+    "year": (relativedelta(years=5), relativedelta(years=1)),
+}
+TREND_GROUPS = ("category", "payment_mode")
+MAX_TREND_BUCKETS = 2000
+
+def _bucket_start(value: date, bucket: str) -> date:
+    """First day of the day/week (Monday)/month/year containing a date"""
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    if bucket == "year":
+        return value.replace(month=1, day=1)
+    return value
+
+def _bucket_key(db: Session, column, bucket: str):
+    """SQL expression formatting a date column as the YYYY-MM-DD start of its bucket"""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(func.date_trunc(bucket, column), "YYYY-MM-DD")
+    if bucket == "week":
+        # Move to the coming Sunday (or stay on it), then back to that week's Monday
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime({"day": "%Y-%m-%d", "month": "%Y-%m-01", "year": "%Y-01-01"}[bucket], column)
+
+def get_bucketed_expense_trends(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    bucket: str = "day",
+    group_by: Optional[str] = None
+):
+    """
+    Expense totals per day, week, month or year over a date range in one grouped query.
+
+    Buckets are labelled by their first day and every bucket in the range is
+    returned, with zeros where nothing was spent. With group_by each category
+    or payment mode gets its own zero-filled series, tagged in "group".
+    """
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"Invalid bucket: {bucket!r}, expected one of {', '.join(TREND_BUCKETS)}")
+    if group_by is not None and group_by not in TREND_GROUPS:
+        raise ValueError(f"Invalid group_by: {group_by!r}, expected one of {', '.join(TREND_GROUPS)}")
+    default_range, step = TREND_BUCKETS[bucket]
+    end_date = end_date or date.today()
+    # The default range covers whole buckets, e.g. the last 12 months including this one
+    start_date = start_date or (_bucket_start(end_date - default_range, bucket) + step)
+    if end_date < start_date:
+        raise ValueError("'to' date must not be before 'from' date")
+
+    buckets = []
+    current = _bucket_start(start_date, bucket)
+    while current <= end_date:
+        buckets.append(current.strftime("%Y-%m-%d"))
+        if len(buckets) > MAX_TREND_BUCKETS:
+            raise ValueError(f"Range has more than {MAX_TREND_BUCKETS} {bucket} buckets, use a larger bucket")
+        current += step
+
+    bucket_key = _bucket_key(db, models.Expense.date, bucket)
+    columns = [bucket_key.label('bucket')]
+    if group_by == "category":
+        group_key = models.Expense.category
+    elif group_by == "payment_mode":
+        # Grouped by id; names come from the payment-mode catalogue
+        group_key = models.Expense.payment_mode_id
+    if group_by:
+        columns.append(group_key.label('group'))
+
+    rows = db.query(
+        *columns,
+        func.sum(models.Expense.amount).label('amount'),
+        func.count(models.Expense.id).label('count')
+    ).filter(
+        and_(models.Expense.date >= start_date, models.Expense.date <= end_date)
+    ).group_by(*columns).all()
+
+    totals = {}
+    name = payment_mode_cache.cache.get(db).name if group_by == "payment_mode" else None
+    for row in rows:
+        group = (name(row.group) if name else row.group) if group_by else None
+        # Payment modes sharing a name add up into one series
+        amount, count = totals.get((row.bucket, group), (0, 0))
+        totals[(row.bucket, group)] = (amount + (row.amount or 0), count + row.count)
+    groups = sorted({group for _, group in totals}, key=lambda group: (group is None, group)) if group_by else [None]
+
+    trends = []
+    for group in groups:
+        for bucket_start in buckets:
+            amount, count = totals.get((bucket_start, group), (0, 0))
+            trend = {"date": bucket_start, "amount": amount, "count": count}
+            if group_by:
+                trend["group"] = group
+            trends.append(trend)
+    return trends
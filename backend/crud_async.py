@@ -0,0 +1,68 @@
+"""
+Awaitable counterparts of the functions in crud.
+
+Each wrapper takes the same arguments as its crud function. With an
+AsyncSession the sync function runs on the async connection through
+run_sync, so no worker thread is held while waiting on the database.
+With a regular Session it runs in Starlette's threadpool, as sync routes do.
+"""
+from functools import wraps
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+import crud
+from response_cache import cached
+
+
+def awaitable(fn):
+    @wraps(fn)
+    async def wrapper(db, *args, **kwargs):
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    return wrapper
+
+
+# Payment Modes
+create_payment_mode = awaitable(crud.create_payment_mode)
+get_payment_modes = awaitable(crud.get_payment_modes)
+get_payment_mode = awaitable(crud.get_payment_mode)
+update_payment_mode = awaitable(crud.update_payment_mode)
+delete_payment_mode = awaitable(crud.delete_payment_mode)
+
+# Expenses
+create_expense = awaitable(crud.create_expense)
+bulk_create_expenses = awaitable(crud.bulk_create_expenses)
+get_expenses = awaitable(crud.get_expenses)
+get_expenses_page = awaitable(crud.get_expenses_page)
+get_payment_modes_for = awaitable(crud.get_payment_modes_for)
+get_expense_changes = awaitable(crud.get_expense_changes)
+search_expenses = awaitable(crud.search_expenses)
+get_expense = awaitable(crud.get_expense)
+update_expense = awaitable(crud.update_expense)
+delete_expense = awaitable(crud.delete_expense)
+mark_expense_as_paid = awaitable(crud.mark_expense_as_paid)
+mark_expense_as_unpaid = awaitable(crud.mark_expense_as_unpaid)
+
+# Bills and EMIs (bill summaries and dashboard reads are served from response_cache)
+get_bill_payment_modes = awaitable(cached(crud.get_bill_payment_modes))
+get_bill_expenses = awaitable(crud.get_bill_expenses)
+get_emi_expenses = awaitable(crud.get_emi_expenses)
+get_emi_dues = awaitable(crud.get_emi_dues)
+
+# Budgets
+create_budget = awaitable(crud.create_budget)
+get_budgets = awaitable(crud.get_budgets)
+get_budget = awaitable(crud.get_budget)
+update_budget = awaitable(crud.update_budget)
+delete_budget = awaitable(crud.delete_budget)
+get_budget_usage_matrix = awaitable(cached(crud.get_budget_usage_matrix))
+
+# Dashboard Analytics
+get_dashboard_summary = awaitable(cached(crud.get_dashboard_summary))
+get_dashboard_overview = awaitable(cached(crud.get_dashboard_overview))
+get_category_breakdown = awaitable(cached(crud.get_category_breakdown))
+get_budget_usage = awaitable(cached(crud.get_budget_usage))
+get_insights = awaitable(cached(crud.get_insights))
+get_expense_trends = awaitable(cached(crud.get_expense_trends))
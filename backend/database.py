@@ -1,15 +1,23 @@
-from sqlalchemy import create_engine, text
+"""
+Database configuration and engines.
+
+Importing this module only reads the configuration (from the environment
+and .env): the engines are created, and connect, on first use, so scripts
+and app workers that import it start without touching the database.
+Logging is configured by the entry point (main.py), not here.
+"""
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
+import threading
 from dotenv import load_dotenv
 import logging
 
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Database URL configuration
@@ -22,36 +30,167 @@ if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
 # Fallback to SQLite for local development
 if not DATABASE_URL:
     DATABASE_URL = "sqlite:///./expense_tracker.db"
-    logger.info("Using SQLite database for local development")
-
-# Create engine
-try:
-    if DATABASE_URL.startswith("sqlite"):
-        engine = create_engine(
-            DATABASE_URL, 
-            connect_args={"check_same_thread": False}
-        )
-        logger.info("SQLite engine created successfully")
-    else:
-        engine = create_engine(DATABASE_URL)
-        logger.info("PostgreSQL engine created successfully")
-        
-    # Test connection (optional - won't block startup)
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return value.lower() in ("1", "true", "yes") if value not in (None, "") else default
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Connection pool settings
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)  # seconds, -1 disables
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", not IS_SQLITE)
+DB_STATEMENT_TIMEOUT_MS = _env_int("DB_STATEMENT_TIMEOUT_MS", 0)  # PostgreSQL only, 0 disables
+
+# SQLite performance pragmas, applied to every new connection
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+    "cache_size": _env_int("SQLITE_CACHE_SIZE", -64000),  # negative means KiB
+    "busy_timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+}
+
+def _engine_options(async_driver: bool = False) -> dict:
+    """Pool and connect arguments shared by the sync and async engines"""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    # In-memory SQLite uses a single-connection pool that takes no sizing
+    if DATABASE_URL not in ("sqlite://", "sqlite:///:memory:"):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_recycle=DB_POOL_RECYCLE)
+
+    if IS_SQLITE:
+        if async_driver:
+            # aiosqlite defaults to NullPool, which would ignore the pool settings
+            options["poolclass"] = AsyncAdaptedQueuePool
+        else:
+            options["connect_args"] = {"check_same_thread": False}
+    elif DB_STATEMENT_TIMEOUT_MS:
+        if async_driver:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-            logger.info("Database connection test successful")
-    except Exception as e:
-        logger.warning(f"Database connection test failed (this is okay during startup): {e}")
-        
-except SQLAlchemyError as e:
-    logger.error(f"Database engine creation failed: {e}")
-    raise Exception(f"Failed to create database engine: {e}")
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+_engine = None
+_async_engine = None
+_engine_lock = threading.Lock()
+_engine_hooks = []
+
+def on_engine_created(hook):
+    """Call hook(engine) with every sync engine (including the async engine's) once it exists"""
+    _engine_hooks.append(hook)
+    for engine in (_engine, _async_engine.sync_engine if _async_engine is not None else None):
+        if engine is not None:
+            hook(engine)
+
+def _created(engine):
+    if IS_SQLITE:
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    for hook in _engine_hooks:
+        hook(engine)
+
+def get_engine():
+    """The application's engine, created on first use; creating it does not connect"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                try:
+                    engine = create_engine(DATABASE_URL, **_engine_options())
+                except SQLAlchemyError as e:
+                    logger.error(f"Database engine creation failed: {e}")
+                    raise Exception(f"Failed to create database engine: {e}")
+                _created(engine)
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+                if not os.getenv("DATABASE_URL"):
+                    logger.info("Using SQLite database for local development")
+                logger.info(f"{'SQLite' if IS_SQLITE else 'PostgreSQL'} engine created successfully")
+    return _engine
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker that creates the engine when the first session is made"""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            get_engine()
+        return super().__call__(**local_kw)
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+
+# Optional async engine (DATABASE_ASYNC=true) for read-heavy routes.
+# Needs aiosqlite for SQLite or asyncpg for PostgreSQL: pip install -r requirements-async.txt
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+
+def get_async_database_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        # asyncpg takes ssl=... instead of libpq's sslmode=...
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1).replace("sslmode=", "ssl=")
+    return url
+
+AsyncSessionLocal = None
+
+def get_async_engine():
+    """The async engine when DATABASE_ASYNC is enabled (created on first use), else None"""
+    global _async_engine, AsyncSessionLocal
+    if DATABASE_ASYNC and _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        with _engine_lock:
+            if _async_engine is None:
+                try:
+                    engine = create_async_engine(get_async_database_url(DATABASE_URL), **_engine_options(async_driver=True))
+                except (SQLAlchemyError, ImportError) as e:
+                    logger.error(f"Async database engine creation failed: {e}")
+                    raise Exception(f"Failed to create async database engine (pip install -r requirements-async.txt): {e}")
+                _created(engine.sync_engine)
+                AsyncSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+                _async_engine = engine
+                logger.info("Async database engine created successfully")
+    return _async_engine
+
+async def dispose_engines():
+    """Close the pooled connections of whichever engines were created"""
+    # Pooled aiosqlite connections each hold a worker thread until closed
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+def __getattr__(name):
+    # database.engine / database.async_engine keep working, creating the engine on access
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 Base = declarative_base()
 
+def get_pool_status(pool) -> dict:
+    """Checkout statistics for a connection pool"""
+    status = {"pool_class": type(pool).__name__}
+    for stat in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, stat):
+            status[stat] = getattr(pool, stat)()
+    return status
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -59,3 +198,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,130 @@
+"""
+Vectorized EMI calculations for comparing many loan scenarios at once.
+
+calculate_emi_batch follows crud.calculate_emi operation for operation on
+NumPy arrays, and rounds in Python, so each scenario gives exactly the
+numbers the single calculator would.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Schedules hold scenarios x longest tenure months; more than this is refused
+MAX_SCHEDULE_MONTHS = 60000
+
+
+def _broadcast(name: str, values: Optional[Sequence[float]], size: int, default: float = 0.0):
+    """Turn an input list into a float array of the batch size; single values repeat"""
+    if values is None or len(values) == 0:
+        return np.full(size, default, dtype=np.float64)
+    array = np.asarray(values, dtype=np.float64)
+    if len(array) == 1:
+        return np.full(size, array[0])
+    if len(array) != size:
+        raise ValueError(f"{name} has {len(array)} values, expected 1 or {size}")
+    return array
+
+
+def _rounded(array: np.ndarray):
+    # Python's round() is correctly rounded, np.round is not always
+    return [round(value, 2) for value in array.tolist()]
+
+
+def calculate_emi_batch(
+    principal: Sequence[float],
+    tenure: Sequence[int],
+    interest_rate: Sequence[float],
+    processing_fees: Optional[Sequence[float]] = None,
+    gst: Optional[Sequence[float]] = None,
+    include_schedule: bool = False
+):
+    """
+    Calculate EMI details for many scenarios in one pass.
+
+    Each argument is a list; lists of length 1 apply to every scenario.
+    Returns columnar lists, plus one amortization schedule per scenario
+    when include_schedule is set.
+    """
+    size = max(len(principal), len(tenure), len(interest_rate), len(processing_fees or []), len(gst or []))
+    if size == 0:
+        raise ValueError("At least one scenario is required")
+
+    principal = _broadcast("principal", principal, size)
+    tenure = _broadcast("tenure", tenure, size)
+    interest_rate = _broadcast("interest_rate", interest_rate, size)
+    processing_fees = _broadcast("processing_fees", processing_fees, size)
+    gst = _broadcast("gst", gst, size)
+
+    if np.any(tenure <= 0) or np.any(tenure != np.floor(tenure)):
+        raise ValueError("tenure must be a positive whole number of months")
+    if include_schedule and size * tenure.max() > MAX_SCHEDULE_MONTHS:
+        raise ValueError(
+            f"Schedules for {size} scenarios of up to {int(tenure.max())} months exceed {MAX_SCHEDULE_MONTHS} months, "
+            "request fewer scenarios or no schedule"
+        )
+
+    no_cost = interest_rate == 0
+    monthly_rate = interest_rate / (12 * 100)  # Convert annual rate to monthly rate
+    amortized = ~no_cost & (monthly_rate > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = (1 + monthly_rate) ** tenure
+        monthly_amount = np.where(
+            amortized,
+            principal * (monthly_rate * growth) / (growth - 1),
+            principal / tenure
+        )
+    total_interest = np.where(no_cost, 0.0, (monthly_amount * tenure) - principal)
+
+    # Add processing fees and GST
+    total_processing_fees = processing_fees + gst
+    total_amount = (monthly_amount * tenure) + total_processing_fees
+    if not np.all(np.isfinite(total_amount)):
+        # Amounts too large for a float overflow to inf, which can't be returned as JSON
+        raise ValueError("EMI amounts are too large to calculate")
+
+    result = {
+        "principal": principal.tolist(),
+        "tenure": tenure.astype(int).tolist(),
+        "interest_rate": interest_rate.tolist(),
+        "processing_fees": processing_fees.tolist(),
+        "gst": gst.tolist(),
+        "monthly_amount": _rounded(monthly_amount),
+        "total_amount": _rounded(total_amount),
+        "total_interest": _rounded(total_interest),
+        "total_processing_fees": _rounded(total_processing_fees)
+    }
+    if include_schedule:
+        result["schedules"] = amortization_schedules(principal, tenure, np.where(amortized, monthly_rate, 0.0), monthly_amount)
+    return result
+
+
+def amortization_schedules(principal: np.ndarray, tenure: np.ndarray, monthly_rate: np.ndarray, monthly_amount: np.ndarray):
+    """
+    Month-by-month principal/interest split and outstanding balance for every scenario.
+
+    All scenarios advance together one month per step; each stops at its own tenure.
+    """
+    months = int(tenure.max())
+    size = len(principal)
+    interest = np.zeros((size, months))
+    principal_paid = np.zeros((size, months))
+    balance = np.zeros((size, months))
+
+    outstanding = principal.copy()
+    for month in range(months):
+        interest[:, month] = outstanding * monthly_rate
+        principal_paid[:, month] = monthly_amount - interest[:, month]
+        outstanding = np.maximum(outstanding - principal_paid[:, month], 0.0)
+        balance[:, month] = outstanding
+
+    schedules = []
+    for index in range(size):
+        length = int(tenure[index])
+        schedules.append({
+            "month": list(range(1, length + 1)),
+            "principal": _rounded(principal_paid[index, :length]),
+            "interest": _rounded(interest[index, :length]),
+            "balance": _rounded(balance[index, :length])
+        })
+    return schedules
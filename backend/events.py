@@ -0,0 +1,175 @@
+"""
+Server-sent events for live dashboard and bill updates.
+
+Write paths in crud record compact change events in the change_events table
+inside their own transaction. Each worker runs a single poller while it has
+subscribers: it reads the events committed since the last poll (by any
+worker) every EVENTS_POLL_INTERVAL seconds and puts them on the queue of
+every open stream. Events go out in id order: PostgreSQL hands out ids
+before commit, so a lower id can commit after a higher one, and an event
+following a gap is held back until the gap fills or EVENTS_GAP_WAIT
+seconds pass (a rolled-back transaction leaves a gap that never fills). Fan-out across workers therefore goes through the
+database, and an idle connection only costs a queue and a suspended
+coroutine, so a worker can hold thousands of them.
+
+A client reconnecting with Last-Event-ID (EventSource does this by itself)
+is replayed what it missed from the table; since every stream saw the
+events in id order, that is everything after its last id. When that is no longer possible
+(the events were pruned, or there are too many), it gets a reset event and
+should refetch everything.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+
+import crud
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "1"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "1000"))
+EVENTS_BATCH_SIZE = 500
+EVENTS_REPLAY_LIMIT = 1000
+# Like the delta sync overlap: how long a write transaction may take to commit
+EVENTS_GAP_WAIT = 5.0
+RECONNECT_MS = 3000
+
+_CLOSE = object()  # put on a queue whose client fell too far behind
+
+
+def format_event(event: dict) -> str:
+    """One SSE message; the event type travels in the JSON so EventSource.onmessage sees everything"""
+    return f"id: {event['id']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+class EventBroker:
+    """Polls change_events once per worker and fans new events out to the open streams"""
+
+    def __init__(self, session_factory=SessionLocal, poll_interval: float = EVENTS_POLL_INTERVAL,
+                 queue_size: int = EVENTS_QUEUE_SIZE, gap_wait: float = EVENTS_GAP_WAIT):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.gap_wait = gap_wait
+        self.last_id: Optional[int] = None
+        self._held = {}  # id of an event after a gap -> when it was first read
+        self._subscribers = set()
+        self._task = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _read(self, fn, *args):
+        db = self.session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    async def read(self, fn, *args):
+        """Run a crud read on a short-lived session in the threadpool"""
+        return await run_in_threadpool(self._read, fn, *args)
+
+    async def subscribe(self) -> asyncio.Queue:
+        if self.last_id is None:
+            # First stream since the poller stopped: only events from now on are new
+            self.last_id = await self.read(crud.get_latest_change_event_id)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            # In an empty context: a copy of this request's would carry its
+            # profile, and every poll would be counted against that request
+            self._task = contextvars.Context().run(asyncio.create_task, self._poll())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        self.last_id = event["id"]
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Rather than buffer without bound, end the stream; the client
+                # reconnects and is replayed from the table
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_CLOSE)
+
+    def release(self, events) -> int:
+        """Publish the polled events that are next in id order, or whose gap has waited long enough"""
+        now = time.monotonic()
+        expected = self.last_id + 1
+        published = 0
+        blocked = False
+        for event in events:
+            if event["id"] != expected and now - self._held.setdefault(event["id"], now) < self.gap_wait:
+                blocked = True
+            if not blocked:
+                self.publish(event)
+                published += 1
+            expected = event["id"] + 1
+        self._held = {event_id: since for event_id, since in self._held.items() if event_id > self.last_id}
+        return published
+
+    async def _poll(self):
+        try:
+            while self._subscribers:
+                try:
+                    events = await self.read(crud.get_change_events, self.last_id, EVENTS_BATCH_SIZE)
+                except SQLAlchemyError as e:
+                    logger.warning(f"Polling change events failed: {e}")
+                    events = []
+                # Held events are read again on the next poll
+                if self.release(events) < EVENTS_BATCH_SIZE:
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            # The next subscriber starts from the latest event, not from where this stopped
+            self.last_id = None
+            self._held = {}
+
+    async def stream(self, last_event_id: Optional[int] = None):
+        """SSE body for one client: a replay of what it missed, then live events and heartbeats"""
+        queue = await self.subscribe()
+        # Taken before the first yield: events published while the client reads
+        # it are on the queue already and must not be mistaken for replayed ones
+        replayed_up_to = self.last_id
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            if last_event_id is not None and last_event_id < replayed_up_to:
+                oldest = await self.read(crud.get_oldest_change_event_id)
+                missed = await self.read(crud.get_change_events, last_event_id, EVENTS_REPLAY_LIMIT + 1, replayed_up_to)
+                if last_event_id + 1 < oldest or len(missed) > EVENTS_REPLAY_LIMIT:
+                    yield format_event({"id": replayed_up_to, "type": "reset"})
+                else:
+                    for event in missed:
+                        yield format_event(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing the idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is _CLOSE:
+                    return
+                if event["id"] > replayed_up_to:
+                    yield format_event(event)
+        finally:
+            self.unsubscribe(queue)
+
+
+broker = EventBroker()
@@ -0,0 +1,115 @@
+"""
+Streaming readers and writers for bulk expense files.
+
+Rows are read one at a time as (row_number, values) pairs so an upload of
+any size is parsed with constant memory. A row that cannot be parsed yields
+the exception in place of its values, leaving the caller to report it.
+Exports are written from plain column tuples in chunks of rows.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import BinaryIO, Iterable, Optional, Sequence
+
+IMPORT_FORMATS = ("csv", "ndjson")
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _clean(values: dict):
+    """Drop empty cells so schema defaults apply"""
+    return {key.strip(): value for key, value in values.items() if key and value not in ("", None)}
+
+
+def iter_csv_rows(stream: BinaryIO, encoding: str = "utf-8-sig"):
+    reader = csv.DictReader(codecs.iterdecode(stream, encoding))
+    for row_number, row in enumerate(reader, start=1):
+        if None in row:
+            yield row_number, ValueError("Row has more cells than the header")
+            continue
+        yield row_number, _clean(row)
+
+
+def iter_ndjson_rows(stream: BinaryIO, encoding: str = "utf-8"):
+    for row_number, line in enumerate(codecs.iterdecode(stream, encoding), start=1):
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(values, dict):
+            yield row_number, ValueError("Expected a JSON object")
+            continue
+        yield row_number, _clean(values)
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]):
+    """Guess the import format from an upload's name or content type"""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    return None
+
+
+def iter_import_rows(stream: BinaryIO, format: str):
+    if format == "csv":
+        return iter_csv_rows(stream)
+    if format == "ndjson":
+        return iter_ndjson_rows(stream)
+    raise ValueError(f"Unsupported format: {format}. Use one of {', '.join(IMPORT_FORMATS)}")
+
+
+def _plain(value):
+    """Convert a column value to its text form in exports"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return _plain(value)
+
+
+def iter_csv_chunks(columns: Sequence[str], rows: Iterable[tuple], chunk_rows: int = 1000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def iter_ndjson_chunks(columns: Sequence[str], rows: Iterable[tuple], chunk_rows: int = 1000):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: _plain(value) for column, value in zip(columns, row)}))
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_export_chunks(format: str, columns: Sequence[str], rows: Iterable[tuple]):
+    if format == "csv":
+        return iter_csv_chunks(columns, rows)
+    if format == "ndjson":
+        return iter_ndjson_chunks(columns, rows)
+    raise ValueError(f"Unsupported format: {format}. Use one of {', '.join(EXPORT_FORMATS)}")
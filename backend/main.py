@@ -1,32 +1,57 @@
-from fastapi import FastAPI, HTTPException, Depends
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Union
 from datetime import datetime, date
 import calendar
+import csv
 from dateutil.relativedelta import relativedelta
 import os
-from dotenv import load_dotenv
 import logging
 
-load_dotenv()
+# Loads .env, so it goes before anything reads the environment
+import database
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
-import crud, models, schemas
-from database import SessionLocal, engine
+import crud, crud_async, schemas, expense_io, emi_calculator, response_cache, profiling, events, schema_version, payment_mode_cache
+from cold_start import cold_start, ColdStartMiddleware
+from fast_json import FastJSONResponse
+from database import SessionLocal
 
-# Create tables if they don't exist (don't drop existing data)
-try:
-    models.Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created/verified successfully")
-except Exception as e:
-    logger.error(f"Failed to create database tables: {e}")
-    # Don't fail startup - tables might already exist
+# Sampled requests time their SQL on every engine, created lazily on first use
+database.on_engine_created(profiling.instrument_engine)
 
-app = FastAPI(title="Premium Expense Tracker API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importing this module touches no database; the first connection is the schema check
+    started = time.perf_counter()
+    try:
+        schema_updated = await run_in_threadpool(schema_version.ensure_schema, database.get_engine())
+        if schema_updated:
+            logger.info("Database tables created/verified successfully")
+    except Exception as e:
+        logger.error(f"Failed to create database tables: {e}")
+        # Don't fail startup - the database may be unreachable for now, or another worker is updating it
+        schema_updated = None
+    cold_start.record_startup(started, schema_updated)
+    yield
+    await database.dispose_engines()
+
+app = FastAPI(title="Premium Expense Tracker API", version="1.0.0", lifespan=lifespan)
+# Routes declared below time validation, endpoint and serialization for sampled requests
+app.router.route_class = profiling.ProfiledRoute
 
 # Get CORS origins from environment variables
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
@@ -38,8 +63,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Sampled SQL counts and phase timings in a Server-Timing header, slow requests logged
+app.add_middleware(profiling.ProfilingMiddleware)
+# Time to the first response after a cold start, see /metrics/startup
+app.add_middleware(ColdStartMiddleware)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -48,18 +79,64 @@ def get_db():
     finally:
         db.close()
 
+# Read-only routes run on the async engine when DATABASE_ASYNC is enabled
+ReadSession = Union[Session, AsyncSession]
+get_read_db = database.get_async_db if database.DATABASE_ASYNC else get_db
+
 @app.get("/")
 def read_root():
     return {"message": "Premium Expense Tracker API"}
 
+@app.get("/health/db")
+def database_health():
+    """Check database connectivity and report connection pool usage"""
+    started = time.perf_counter()
+    engine = database.get_engine()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        status = "ok"
+    except SQLAlchemyError as e:
+        logger.warning(f"Database health check failed: {e}")
+        status = "unavailable"
+    health = {
+        "status": status,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "dialect": engine.dialect.name,
+        "pool": database.get_pool_status(engine.pool)
+    }
+    async_engine = database.get_async_engine()
+    if async_engine is not None:
+        health["async_pool"] = database.get_pool_status(async_engine.pool)
+    return health
+
+@app.get("/metrics/cache")
+def cache_metrics():
+    """Hit/miss counters of this worker's dashboard and bills response cache and payment-mode catalogue"""
+    return {**response_cache.cache.stats(), "payment_modes": payment_mode_cache.cache.stats()}
+
+@app.get("/metrics/startup")
+def startup_metrics():
+    """How long this worker took to import, start up and serve its first request"""
+    return cold_start.stats()
+
+@app.get("/events")
+async def stream_events(last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")):
+    """Server-sent change events (expense, budget and payment mode writes) for live updates"""
+    return StreamingResponse(
+        events.broker.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Payment Modes APIs
 @app.post("/payment-modes/", response_model=schemas.PaymentMode)
 def create_payment_mode(payment_mode: schemas.PaymentModeCreate, db: Session = Depends(get_db)):
     return crud.create_payment_mode(db=db, payment_mode=payment_mode)
 
 @app.get("/payment-modes/", response_model=List[schemas.PaymentMode])
-def get_payment_modes(db: Session = Depends(get_db)):
-    return crud.get_payment_modes(db=db)
+async def get_payment_modes(db: ReadSession = Depends(get_read_db)):
+    return await crud_async.get_payment_modes(db=db)
 
 @app.put("/payment-modes/{payment_mode_id}", response_model=schemas.PaymentMode)
 def update_payment_mode(payment_mode_id: int, payment_mode: schemas.PaymentModeUpdate, db: Session = Depends(get_db)):
@@ -81,29 +158,197 @@ def delete_payment_mode(payment_mode_id: int, db: Session = Depends(get_db)):
 def create_expense(expense: schemas.ExpenseCreate, db: Session = Depends(get_db)):
     return crud.create_expense(db=db, expense=expense)
 
+@app.post("/expenses/bulk", response_model=schemas.BulkImportResult)
+def bulk_import_expenses(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    batch_size: int = 500,
+    db: Session = Depends(get_db)
+):
+    """Import expenses from a CSV or NDJSON upload, reporting rows that failed"""
+    import_format = format or expense_io.detect_format(file.filename, file.content_type)
+    if import_format not in expense_io.IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Specify format=csv or format=ndjson")
+    if batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be positive")
+
+    try:
+        rows = expense_io.iter_import_rows(file.file, import_format)
+        return crud.bulk_create_expenses(db=db, rows=rows, batch_size=batch_size)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read upload: {e}")
+
 @app.get("/expenses/", response_model=List[schemas.Expense])
-def get_expenses(
+async def get_expenses(
     skip: int = 0, 
     limit: int = 100, 
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     category: Optional[str] = None,
     payment_mode_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    fast: bool = False,
+    fields: Optional[str] = None,
+    db: ReadSession = Depends(get_read_db)
 ):
-    return crud.get_expenses(
+    """
+    Get expenses newest first; fast=true skips per-row validation and encodes
+    with orjson, fields=title,amount,... returns (and reads) only those fields
+    """
+    try:
+        selected_fields = crud.parse_expense_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    expenses = await crud_async.get_expenses(
         db=db, 
         skip=skip, 
         limit=limit, 
         start_date=start_date,
         end_date=end_date,
         category=category,
-        payment_mode_id=payment_mode_id
+        payment_mode_id=payment_mode_id,
+        as_rows=fast,
+        fields=selected_fields
     )
+    return FastJSONResponse(expenses) if fast or selected_fields else expenses
+
+@app.get("/expenses/export")
+def export_expenses(
+    format: str = "csv",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    payment_mode_id: Optional[int] = None
+):
+    """Stream every matching expense as CSV or NDJSON"""
+    if format not in expense_io.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Specify format=csv or format=ndjson")
+
+    def stream():
+        # The session lives as long as the stream, not the request handler
+        db = SessionLocal()
+        try:
+            rows = crud.iter_expense_export_rows(
+                db=db,
+                start_date=start_date,
+                end_date=end_date,
+                category=category,
+                payment_mode_id=payment_mode_id
+            )
+            yield from expense_io.iter_export_chunks(format, crud.EXPENSE_EXPORT_COLUMNS, rows)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=expense_io.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="expenses.{format}"'}
+    )
+
+@app.get("/expenses/page", response_model=schemas.ExpensePage)
+async def get_expenses_page(
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    payment_mode_id: Optional[int] = None,
+    db: ReadSession = Depends(get_read_db)
+):
+    """Get expenses newest first, paging with the next_cursor of the previous response"""
+    try:
+        expenses, next_cursor = await crud_async.get_expenses_page(
+            db=db,
+            cursor=cursor,
+            limit=limit,
+            start_date=start_date,
+            end_date=end_date,
+            category=category,
+            payment_mode_id=payment_mode_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": expenses, "next_cursor": next_cursor}
+
+@app.get("/expenses/compact", response_model=schemas.CompactExpensePage)
+async def get_expenses_compact(
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    payment_mode_id: Optional[int] = None,
+    db: ReadSession = Depends(get_read_db)
+):
+    """Get a page of expenses with payment modes listed once instead of nested in every row"""
+    try:
+        expenses, next_cursor = await crud_async.get_expenses_page(
+            db=db,
+            cursor=cursor,
+            limit=limit,
+            start_date=start_date,
+            end_date=end_date,
+            category=category,
+            payment_mode_id=payment_mode_id,
+            with_payment_mode=False
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "items": expenses,
+        "payment_modes": await crud_async.get_payment_modes_for(db=db, expenses=expenses),
+        "next_cursor": next_cursor
+    }
+
+@app.get("/expenses/search", response_model=List[schemas.Expense])
+async def search_expenses(
+    q: str,
+    skip: int = 0,
+    limit: int = 50,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    payment_mode_id: Optional[int] = None,
+    fast: bool = False,
+    fields: Optional[str] = None,
+    db: ReadSession = Depends(get_read_db)
+):
+    """Full-text search of titles and descriptions, each word matched as a prefix, best match first"""
+    try:
+        selected_fields = crud.parse_expense_fields(fields)
+        expenses = await crud_async.search_expenses(
+            db=db,
+            q=q,
+            skip=skip,
+            limit=limit,
+            start_date=start_date,
+            end_date=end_date,
+            category=category,
+            payment_mode_id=payment_mode_id,
+            as_rows=fast,
+            fields=selected_fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(expenses) if fast or selected_fields else expenses
+
+@app.get("/expenses/changes", response_model=schemas.ExpenseChanges)
+async def get_expense_changes(
+    since: Optional[str] = None,
+    limit: int = 500,
+    db: ReadSession = Depends(get_read_db)
+):
+    """
+    Get expenses changed and deleted since a sync token. Call without since
+    (or on reset) before loading the full list, then pass next_token back.
+    """
+    try:
+        return await crud_async.get_expense_changes(db=db, since=since, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.put("/expenses/{expense_id}", response_model=schemas.Expense)
 def update_expense(expense_id: int, expense: schemas.ExpenseUpdate, db: Session = Depends(get_db)):
-    print(f"DEBUG: Updating expense {expense_id} with data: {expense.dict()}")
+    logger.debug(f"Updating expense {expense_id} with data: {expense.dict(exclude_unset=True)}")
     db_expense = crud.get_expense(db=db, expense_id=expense_id)
     if not db_expense:
         raise HTTPException(status_code=404, detail="Expense not found")
@@ -119,8 +364,18 @@ def delete_expense(expense_id: int, db: Session = Depends(get_db)):
 
 # EMI APIs
 @app.get("/emi/", response_model=List[schemas.EMIDetails])
-def get_emi_expenses(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_emi_expenses(db=db, skip=skip, limit=limit)
+async def get_emi_expenses(skip: int = 0, limit: int = 100, db: ReadSession = Depends(get_read_db)):
+    return await crud_async.get_emi_expenses(db=db, skip=skip, limit=limit)
+
+@app.get("/emi/dues", response_model=List[schemas.EMIInstallmentDue])
+async def get_emi_dues(
+    month: Optional[str] = None,  # YYYY-MM, defaults to the current month
+    db: ReadSession = Depends(get_read_db)
+):
+    try:
+        return await crud_async.get_emi_dues(db=db, month=month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/emi/calculate")
 def calculate_emi(
@@ -147,14 +402,79 @@ def calculate_emi(
         "total_processing_fees": emi_calc['total_processing_fees']
     }
 
+@app.post("/emi/calculate/batch", response_model=schemas.EMIBatchResult)
+def calculate_emi_batch(request: schemas.EMIBatchRequest):
+    """Calculate EMI details for many principal/tenure/rate combinations at once"""
+    try:
+        return emi_calculator.calculate_emi_batch(
+            principal=request.principal,
+            tenure=request.tenure,
+            interest_rate=request.interest_rate,
+            processing_fees=request.processing_fees,
+            gst=request.gst,
+            include_schedule=request.include_schedule
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # Bill Management APIs
 @app.get("/bills/", response_model=List[schemas.BillPaymentMode])
-def get_bills(month: Optional[str] = None, year: Optional[int] = None, db: Session = Depends(get_db)):
-    """Get all payment modes with bill details"""
-    return crud.get_bill_payment_modes(db=db, month=month, year=year)
+async def get_bills(
+    month: Optional[str] = None,
+    year: Optional[int] = None,
+    include_expenses: bool = True,
+    fast: bool = False,
+    fields: Optional[str] = None,
+    db: ReadSession = Depends(get_read_db)
+):
+    """Get all payment modes with bill details (fields= limits the fields of the listed expenses)"""
+    try:
+        selected_fields = crud.parse_expense_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    bills = await crud_async.get_bill_payment_modes(
+        db=db, month=month, year=year, include_expenses=include_expenses, as_rows=fast, fields=selected_fields
+    )
+    return FastJSONResponse(bills) if fast or selected_fields else bills
+
+@app.get("/bills/{payment_mode_id}/expenses", response_model=List[schemas.Expense])
+async def get_bill_expenses(
+    payment_mode_id: int,
+    month: Optional[str] = None,
+    year: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    fast: bool = False,
+    fields: Optional[str] = None,
+    db: ReadSession = Depends(get_read_db)
+):
+    """Get one page of a payment mode's bill expenses (fields= as for /expenses/)"""
+    try:
+        selected_fields = crud.parse_expense_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    expenses = await crud_async.get_bill_expenses(
+        db=db,
+        payment_mode_id=payment_mode_id,
+        month=month,
+        year=year,
+        skip=skip,
+        limit=limit,
+        as_rows=fast,
+        fields=selected_fields
+    )
+    return FastJSONResponse(expenses) if fast or selected_fields else expenses
 
 
 
+@app.post("/expenses/batch", response_model=schemas.ExpenseBatchResult)
+def apply_expense_batch(batch: schemas.ExpenseBatch, db: Session = Depends(get_db)):
+    """Update, delete and mark expenses paid or unpaid in one transaction; any failure rolls back the whole batch"""
+    try:
+        return crud.apply_expense_batch(db=db, operations=batch.operations)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/expenses/{expense_id}/mark-paid")
 def mark_expense_paid(
     expense_id: int, 
@@ -176,14 +496,43 @@ def mark_expense_unpaid(expense_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Expense not found")
     return {"message": "Expense marked as unpaid", "expense": expense}
 
+@app.post("/bills/{payment_mode_id}/mark-paid")
+def mark_bill_paid(
+    payment_mode_id: int,
+    month: Optional[str] = None,
+    year: Optional[int] = None,
+    paid_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Mark every unpaid expense of a bill as paid, EMIs by one installment"""
+    if not crud.get_payment_mode(db, payment_mode_id):
+        raise HTTPException(status_code=404, detail="Payment mode not found")
+    try:
+        marked = crud.mark_bill_paid(db=db, payment_mode_id=payment_mode_id, month=month, year=year, paid_date=paid_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"Marked {marked} expenses as paid", "marked_paid": marked}
+
 # Budgets APIs
 @app.post("/budgets/", response_model=schemas.Budget)
 def create_budget(budget: schemas.BudgetCreate, db: Session = Depends(get_db)):
     return crud.create_budget(db=db, budget=budget)
 
 @app.get("/budgets/", response_model=List[schemas.Budget])
-def get_budgets(db: Session = Depends(get_db)):
-    return crud.get_budgets(db=db)
+async def get_budgets(db: ReadSession = Depends(get_read_db)):
+    return await crud_async.get_budgets(db=db)
+
+@app.get("/budgets/usage", response_model=schemas.BudgetUsageMatrix)
+async def get_budget_usage_matrix(
+    start_month: Optional[str] = Query(None, alias="from"),
+    end_month: Optional[str] = Query(None, alias="to"),
+    db: ReadSession = Depends(get_read_db)
+):
+    """Budget vs actual spend per category for every month in a range (YYYY-MM)"""
+    try:
+        return await crud_async.get_budget_usage_matrix(db=db, start_month=start_month, end_month=end_month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.put("/budgets/{budget_id}", response_model=schemas.Budget)
 def update_budget(budget_id: int, budget: schemas.BudgetUpdate, db: Session = Depends(get_db)):
@@ -201,22 +550,41 @@ def delete_budget(budget_id: int, db: Session = Depends(get_db)):
     return {"message": "Budget deleted successfully"}
 
 # Dashboard APIs
+@app.get("/dashboard/summary", response_model=schemas.DashboardSummary)
+async def get_dashboard_summary(db: ReadSession = Depends(get_read_db)):
+    """Get every dashboard payload in a single response"""
+    return await crud_async.get_dashboard_summary(db=db)
+
 @app.get("/dashboard/overview")
-def get_dashboard_overview(db: Session = Depends(get_db)):
-    return crud.get_dashboard_overview(db=db)
+async def get_dashboard_overview(db: ReadSession = Depends(get_read_db)):
+    return await crud_async.get_dashboard_overview(db=db)
 
 @app.get("/dashboard/category-breakdown")
-def get_category_breakdown(db: Session = Depends(get_db)):
-    return crud.get_category_breakdown(db=db)
+async def get_category_breakdown(db: ReadSession = Depends(get_read_db)):
+    return await crud_async.get_category_breakdown(db=db)
 
 @app.get("/dashboard/budget-usage")
-def get_budget_usage(db: Session = Depends(get_db)):
-    return crud.get_budget_usage(db=db)
+async def get_budget_usage(db: ReadSession = Depends(get_read_db)):
+    return await crud_async.get_budget_usage(db=db)
 
 @app.get("/dashboard/insights")
-def get_insights(db: Session = Depends(get_db)):
-    return crud.get_insights(db=db)
+async def get_insights(db: ReadSession = Depends(get_read_db)):
+    return await crud_async.get_insights(db=db)
 
 @app.get("/dashboard/expense-trends")
-def get_expense_trends(db: Session = Depends(get_db)):
-    return crud.get_expense_trends(db=db)
+async def get_expense_trends(
+    start_date: Optional[date] = Query(None, alias="from"),
+    end_date: Optional[date] = Query(None, alias="to"),
+    bucket: Optional[str] = None,  # day, week, month or year
+    group_by: Optional[str] = None,  # category or payment_mode
+    db: ReadSession = Depends(get_read_db)
+):
+    """Daily totals of the current month, or zero-filled bucketed totals over a date range"""
+    try:
+        return await crud_async.get_expense_trends(
+            db=db, start_date=start_date, end_date=end_date, bucket=bucket, group_by=group_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+cold_start.record_import(_import_started)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -46,6 +46,13 @@ class Expense(Base):
 
     payment_mode = relationship("PaymentMode", back_populates="expenses")
 
+# Keyset pagination seeks on (date, id), optionally within one category or payment mode
+Index("ix_expenses_date_id", Expense.date.desc(), Expense.id.desc())
+Index("ix_expenses_category_date_id", Expense.category, Expense.date.desc(), Expense.id.desc())
+Index("ix_expenses_payment_mode_date_id", Expense.payment_mode_id, Expense.date.desc(), Expense.id.desc())
+# Delta sync reads changes in (updated_at, id) order
+Index("ix_expenses_updated_at_id", Expense.updated_at, Expense.id)
+
 class Budget(Base):
     __tablename__ = "budgets"
 
@@ -55,3 +62,77 @@ class Budget(Base):
     month = Column(String)  # YYYY-MM format
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+Index("ix_budgets_month_category", Budget.month, Budget.category)
+
+class MonthlyCategoryTotal(Base):
+    """Running expense totals per month, category and payment mode, kept in sync by crud"""
+    __tablename__ = "monthly_category_totals"
+    __table_args__ = (UniqueConstraint("month", "category", "payment_mode_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    month = Column(String, index=True)  # YYYY-MM format
+    category = Column(String)
+    payment_mode_id = Column(Integer, ForeignKey("payment_modes.id"), nullable=True)
+    total_amount = Column(Float, default=0)
+    expense_count = Column(Integer, default=0)
+    paid_amount = Column(Float, default=0)
+    emi_amount = Column(Float, default=0)
+
+# NULLs never conflict in the unique constraint, so rows without a payment mode
+# (e.g. after it was deleted) need their own unique index to be upserted
+Index(
+    "uq_monthly_category_totals_no_payment_mode",
+    MonthlyCategoryTotal.month, MonthlyCategoryTotal.category,
+    unique=True,
+    sqlite_where=MonthlyCategoryTotal.payment_mode_id.is_(None),
+    postgresql_where=MonthlyCategoryTotal.payment_mode_id.is_(None)
+)
+
+class EmiInstallment(Base):
+    """One scheduled monthly payment of an EMI expense"""
+    __tablename__ = "emi_installments"
+    __table_args__ = (UniqueConstraint("expense_id", "installment_number"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    expense_id = Column(Integer, ForeignKey("expenses.id", ondelete="CASCADE"))
+    installment_number = Column(Integer)  # 1..tenure
+    due_date = Column(Date, index=True)
+    amount = Column(Float)
+    is_paid = Column(Boolean, default=False)
+    paid_date = Column(Date, nullable=True)
+
+class DataVersion(Base):
+    """Single-row counter bumped by every write so cached reads can tell when data changed"""
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class SchemaVersion(Base):
+    """Single-row fingerprint of the schema the database was last brought up to date with"""
+    __tablename__ = "schema_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(String, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ExpenseDeletion(Base):
+    """Tombstone of a deleted expense, kept for a while so syncing clients learn about the delete"""
+    __tablename__ = "expense_deletions"
+
+    id = Column(Integer, primary_key=True)
+    expense_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+Index("ix_expense_deletions_deleted_at_id", ExpenseDeletion.deleted_at, ExpenseDeletion.id)
+
+class ChangeEvent(Base):
+    """Compact record of a write, read by every worker's /events poller"""
+    __tablename__ = "change_events"
+
+    id = Column(Integer, primary_key=True)
+    type = Column(String, nullable=False)  # expense.created, expense.paid, budget.updated, ...
+    data = Column(String, nullable=False)  # JSON payload
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
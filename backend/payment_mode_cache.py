@@ -0,0 +1,103 @@
+"""
+Process-wide cache of the payment-mode catalogue.
+
+Payment modes almost never change, yet nearly every read needs them: the
+payment-mode list, the nested payment_mode of every listed expense, and the
+names in the dashboard, bill, EMI and trend aggregations. Each worker keeps
+the catalogue in memory instead, so those queries can select or group by
+payment_mode_id and resolve the rest here rather than join payment_modes.
+
+The payment-mode writes in crud bump their own row of the data_version
+table (PAYMENT_MODES_VERSION_ID) inside their transaction. The first lookup
+in a session (one per request) reads that row by primary key and reloads
+the catalogue when it moved, so a change made through any worker is seen by
+all of them on their next request; later lookups in the session reuse it.
+Writes that bypass crud should bump it too.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+import models, schemas
+
+PAYMENT_MODES_VERSION_ID = 2
+# Session.info key of the catalogue already checked in that session
+_SESSION_KEY = "payment_mode_catalogue"
+# Response fields in the order schemas.PaymentMode serializes them
+PAYMENT_MODE_FIELDS = tuple(schemas.PaymentMode.model_fields)
+
+
+class PaymentModeCatalogue:
+    """Immutable snapshot of every payment mode at one version"""
+
+    def __init__(self, version: int, rows):
+        self.version = version
+        # Transient copies: never attached to a session, so any thread can read them
+        self.ordered: List[models.PaymentMode] = [models.PaymentMode(**row) for row in rows]
+        self.modes: Dict[int, models.PaymentMode] = {mode.id: mode for mode in self.ordered}
+        # Plain dicts that encode like schemas.PaymentMode, for the row-based list paths
+        self.rows: Dict[int, dict] = {row["id"]: {field: row[field] for field in PAYMENT_MODE_FIELDS} for row in rows}
+
+    def name(self, payment_mode_id: Optional[int]) -> Optional[str]:
+        mode = self.modes.get(payment_mode_id)
+        return mode.name if mode is not None else None
+
+
+class PaymentModeCache:
+    def __init__(self):
+        self._catalogue: Optional[PaymentModeCatalogue] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.reloads = 0
+
+    def get(self, db: Session, version: Optional[int] = None) -> PaymentModeCatalogue:
+        """
+        The current catalogue, reloaded first if the stored version moved; checked once per session.
+        A caller that read the version along with its own rows passes it to save the lookup.
+        """
+        catalogue = db.info.get(_SESSION_KEY)
+        if catalogue is not None:
+            return catalogue
+
+        # Read the version before the rows: a write landing in between then
+        # only causes one more reload, never a stale catalogue
+        if version is None:
+            version = db.query(models.DataVersion.version).filter(
+                models.DataVersion.id == PAYMENT_MODES_VERSION_ID
+            ).scalar() or 0
+        catalogue = self._catalogue
+        if catalogue is not None and catalogue.version == version:
+            self.hits += 1
+            db.info[_SESSION_KEY] = catalogue
+            return catalogue
+
+        columns = [getattr(models.PaymentMode, column.key) for column in models.PaymentMode.__table__.columns]
+        rows = [row._asdict() for row in db.query(*columns).order_by(models.PaymentMode.id)]
+        catalogue = PaymentModeCatalogue(version, rows)
+        with self._lock:
+            self._catalogue = catalogue
+            self.reloads += 1
+        db.info[_SESSION_KEY] = catalogue
+        return catalogue
+
+    @staticmethod
+    def forget(db: Session):
+        """Make the next lookup in this session check the version again, e.g. after a payment-mode write"""
+        db.info.pop(_SESSION_KEY, None)
+
+    def clear(self):
+        with self._lock:
+            self._catalogue = None
+
+    def stats(self):
+        catalogue = self._catalogue
+        return {
+            "payment_modes": len(catalogue.ordered) if catalogue is not None else None,
+            "version": catalogue.version if catalogue is not None else None,
+            "hits": self.hits,
+            "reloads": self.reloads,
+        }
+
+
+cache = PaymentModeCache()
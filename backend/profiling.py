@@ -0,0 +1,212 @@
+"""
+Sampled per-request profiling.
+
+For a sampled request, SQLAlchemy cursor events add up the number of
+statements and the time spent in them, and ProfiledRoute splits the rest of
+the request into request validation (parsing, dependencies), the endpoint
+itself and response serialization. The breakdown goes out in a
+Server-Timing header, and requests slower than PROFILE_SLOW_MS are logged
+with their most expensive statements. Streamed responses (the /events
+stream, exports) are profiled up to their response headers: what follows
+lasts as long as the client keeps reading.
+
+Unsampled requests only pay for a context variable lookup per statement,
+so this can stay on in production with a low PROFILE_SAMPLE_RATE.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.1"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "500"))
+PROFILE_TOP_QUERIES = int(os.getenv("PROFILE_TOP_QUERIES", "5"))
+MAX_TRACKED_STATEMENTS = 100
+STATEMENT_PREVIEW_CHARS = 300
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_seconds = 0.0
+        self.statements = {}  # statement text -> [count, seconds]
+        self.handler_started = None
+        self.endpoint_started = None
+        self.endpoint_finished = None
+        self.handler_finished = None
+        self.finished = None
+
+    def finish(self):
+        """Stop the clock and ignore later statements"""
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    def record_query(self, statement: str, seconds: float):
+        if self.finished is not None:
+            return
+        self.query_count += 1
+        self.sql_seconds += seconds
+        totals = self.statements.get(statement)
+        if totals is None:
+            if len(self.statements) >= MAX_TRACKED_STATEMENTS:
+                return
+            totals = self.statements[statement] = [0, 0.0]
+        totals[0] += 1
+        totals[1] += seconds
+
+    def phases(self, finished: float):
+        """Milliseconds per phase; phases a request never reached (e.g. 404s) are left out"""
+        phases = {"total": (finished - self.started) * 1000, "db": self.sql_seconds * 1000}
+        if self.handler_started is not None and self.endpoint_started is not None:
+            phases["validate"] = (self.endpoint_started - self.handler_started) * 1000
+        if self.endpoint_started is not None and self.endpoint_finished is not None:
+            # Endpoint time outside SQL: ORM hydration and Python work
+            phases["app"] = max(0.0, (self.endpoint_finished - self.endpoint_started) * 1000 - phases["db"])
+        if self.endpoint_finished is not None and self.handler_finished is not None:
+            phases["serialize"] = (self.handler_finished - self.endpoint_finished) * 1000
+        return phases
+
+    def top_statements(self, limit: int = PROFILE_TOP_QUERIES):
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {"statement": " ".join(statement.split())[:STATEMENT_PREVIEW_CHARS], "count": count, "ms": round(seconds * 1000, 2)}
+            for statement, (count, seconds) in ranked
+        ]
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info["profile_query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = conn.info.pop("profile_query_started", None)
+    if profile is not None and started is not None:
+        profile.record_query(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine):
+    """Record statement counts and timings of sampled requests running on this engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _timed_endpoint(endpoint):
+    """Wrap an endpoint so the profile knows when the handler body ran"""
+    def mark(attribute):
+        profile = _current_profile.get()
+        if profile is not None:
+            setattr(profile, attribute, time.perf_counter())
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            mark("endpoint_started")
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                mark("endpoint_finished")
+    else:
+        @wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            mark("endpoint_started")
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                mark("endpoint_finished")
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that records when validation, the endpoint and serialization start and end"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request):
+            profile = _current_profile.get()
+            if profile is None:
+                return await handler(request)
+            profile.handler_started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                profile.handler_finished = time.perf_counter()
+
+        return profiled_handler
+
+
+def server_timing(phases, query_count: int) -> str:
+    descriptions = {
+        "db": f"{query_count} SQL statements",
+        "validate": "Request validation",
+        "app": "Endpoint",
+        "serialize": "Serialization"
+    }
+    parts = []
+    for name, ms in phases.items():
+        part = f"{name};dur={ms:.2f}"
+        if name in descriptions:
+            part += f';desc="{descriptions[name]}"'
+        parts.append(part)
+    return ", ".join(parts)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that samples requests, adds Server-Timing and logs slow ones"""
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE, slow_ms: float = PROFILE_SLOW_MS):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        status = {"code": None}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                if not any(name.lower() == b"content-length" for name, _ in headers):
+                    # A streamed body: time to the headers only
+                    profile.finish()
+                phases = profile.phases(profile.finished or time.perf_counter())
+                headers.append((b"server-timing", server_timing(phases, profile.query_count).encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            profile.finish()
+            phases = profile.phases(profile.finished)
+            if phases["total"] >= self.slow_ms:
+                logger.warning(
+                    "Slow request %s %s -> %s: %.1fms total, %d queries in %.1fms, phases %s, top queries %s",
+                    scope["method"], scope["path"], status["code"], phases["total"], profile.query_count, phases["db"],
+                    {name: round(ms, 1) for name, ms in phases.items()}, profile.top_statements()
+                )
@@ -0,0 +1,41 @@
+"""
+Rebuild the monthly_category_totals rollup from the expenses table and verify it.
+
+Usage:
+    python rebuild_rollup.py              # rebuild, then verify
+    python rebuild_rollup.py --verify-only
+"""
+import argparse
+import sys
+
+import crud, models
+from database import SessionLocal, engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild and verify the monthly expense rollup")
+    parser.add_argument("--verify-only", action="store_true", help="only compare the rollup with the expenses table")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not args.verify_only:
+            row_count = crud.rebuild_monthly_category_totals(db)
+            print(f"Rebuilt monthly_category_totals with {row_count} rows")
+        mismatches = crud.verify_monthly_category_totals(db)
+    finally:
+        db.close()
+
+    if mismatches:
+        for mismatch in mismatches:
+            print(f"Mismatch for {mismatch['month']} / {mismatch['category']} / payment mode {mismatch['payment_mode_id']}: "
+                  f"expected {mismatch['expected']}, found {mismatch['actual']}")
+        return 1
+
+    print("Rollup matches the expenses table")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
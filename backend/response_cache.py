@@ -0,0 +1,90 @@
+"""
+In-process cache for the dashboard and bills reads.
+
+Entries are keyed by the data version counter in the database, which every
+write in crud bumps inside its own transaction. A cached value is therefore
+only served while no worker has committed a change since it was computed;
+the TTL bounds how long a value lives even without writes (the dashboard
+also depends on today's date), and the LRU bound caps memory.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+import crud
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+
+
+class ResponseCache:
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": RESPONSE_CACHE_ENABLED,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+cache = ResponseCache()
+
+
+def cached(fn):
+    """Cache a crud read by its arguments, the current data version and today's date"""
+    if not RESPONSE_CACHE_ENABLED:
+        return fn
+
+    @wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        key = (fn.__name__, crud.get_data_version(db), date.today(), args, tuple(sorted(kwargs.items())))
+        found, value = cache.get(key)
+        if found:
+            return value
+        value = fn(db, *args, **kwargs)
+        cache.set(key, value)
+        return value
+    return wrapper
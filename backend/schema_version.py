@@ -0,0 +1,91 @@
+"""
+Startup schema check.
+
+Bringing a database up to date means creating missing tables, adding the
+indexes introduced since, building the search index and backfilling the
+derived tables: dozens of round trips, which against a remote PostgreSQL
+add seconds to every cold start. Instead, the DDL the models compile to is
+fingerprinted and stored in schema_version once that work has succeeded.
+Startup then costs one query, and the work only runs again when the models
+or the search index change (or the table is missing, e.g. a new database).
+"""
+import hashlib
+import logging
+from typing import Optional
+
+from sqlalchemy import inspect, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+import crud, models, search
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_ID = 1
+ROLLUP_NULL_MODE_INDEX = "uq_monthly_category_totals_no_payment_mode"
+
+
+def schema_fingerprint(dialect) -> str:
+    """Hash of the DDL of every table, index and the search index on this dialect"""
+    statements = []
+    for table in models.Base.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)))
+        statements.extend(
+            str(CreateIndex(index).compile(dialect=dialect)) for index in sorted(table.indexes, key=lambda index: index.name)
+        )
+    statements.extend(search.ddl_statements(dialect.name))
+    return hashlib.sha256("\n".join(statements).encode("utf-8")).hexdigest()
+
+
+def stored_fingerprint(engine) -> Optional[str]:
+    """The fingerprint recorded by the last update, or None (also when the table does not exist yet)"""
+    table = models.SchemaVersion
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(table.version).where(table.id == SCHEMA_VERSION_ID)).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def update_schema(engine):
+    """Create missing tables and indexes, the search index, and backfill derived tables"""
+    models.Base.metadata.create_all(bind=engine)
+    rollup = models.MonthlyCategoryTotal.__table__
+    if ROLLUP_NULL_MODE_INDEX not in {index["name"] for index in inspect(engine).get_indexes(rollup.name)}:
+        # Rollups from before this index may hold duplicate rows without a payment
+        # mode, which would fail it; emptied, the rollup is rebuilt below
+        with engine.begin() as conn:
+            conn.execute(rollup.delete())
+    # create_all only indexes new tables, so add indexes introduced since
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    if search.ensure_search_index(engine):
+        logger.info("Full-text search index built from existing expenses")
+
+    db = Session(bind=engine)
+    try:
+        if crud.ensure_monthly_category_totals(db) is not None:
+            logger.info("Monthly rollup table populated from existing expenses")
+        backfilled = crud.ensure_emi_installments(db)
+        if backfilled:
+            logger.info(f"Generated installments for {backfilled} existing EMI expenses")
+    finally:
+        db.close()
+
+
+def ensure_schema(engine) -> bool:
+    """Bring the schema up to date if its fingerprint changed; returns whether it had to"""
+    fingerprint = schema_fingerprint(engine.dialect)
+    if stored_fingerprint(engine) == fingerprint:
+        return False
+
+    update_schema(engine)
+    db = Session(bind=engine)
+    try:
+        db.merge(models.SchemaVersion(id=SCHEMA_VERSION_ID, version=fingerprint))
+        db.commit()
+    finally:
+        db.close()
+    return True
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Annotated, Optional, List
 from datetime import date, datetime
 
 # Payment Mode Schemas
@@ -68,6 +68,22 @@ class ExpenseUpdate(BaseModel):
     paid_date: Optional[date] = None
     paid_amount: Optional[float] = None
 
+class ExpenseBatchOperation(BaseModel):
+    op: str  # update, delete, mark_paid, mark_unpaid
+    id: int
+    changes: Optional[ExpenseUpdate] = None  # update only
+    paid_amount: Optional[float] = None  # mark_paid of a non-EMI expense; defaults to its amount
+    paid_date: Optional[date] = None  # mark_paid; defaults to today
+
+class ExpenseBatch(BaseModel):
+    operations: List[ExpenseBatchOperation]
+
+class ExpenseBatchResult(BaseModel):
+    updated: int
+    deleted: int
+    marked_paid: int
+    marked_unpaid: int
+
 class Expense(ExpenseBase):
     id: int
     payment_mode: PaymentMode
@@ -80,6 +96,40 @@ class Expense(ExpenseBase):
             datetime: lambda v: v.isoformat() if v else None
         }
 
+class ExpensePage(BaseModel):
+    items: List[Expense]
+    next_cursor: Optional[str] = None
+
+class ExpenseCompact(ExpenseBase):
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class CompactExpensePage(BaseModel):
+    items: List[ExpenseCompact]
+    payment_modes: List[PaymentMode]
+    next_cursor: Optional[str] = None
+
+class ExpenseChanges(BaseModel):
+    items: List[Expense]  # expenses created or updated since the token
+    deleted_ids: List[int]
+    payment_modes: List[PaymentMode]  # payment modes edited since the token
+    next_token: str
+    has_more: bool = False  # call again with next_token right away
+    reset: bool = False  # the token is missing or too old: reload everything, then sync from next_token
+
+class BulkImportError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[BulkImportError]
+
 # Budget Schemas
 class BudgetBase(BaseModel):
     category: str
@@ -116,8 +166,24 @@ class BudgetUsage(BaseModel):
     percentage_used: float
     is_exceeded: bool
 
+class BudgetUsageMonth(BudgetUsage):
+    month: str  # YYYY-MM format
+    has_budget: bool
+
+class BudgetUsageRow(BaseModel):
+    category: str
+    months: List[BudgetUsageMonth]
+    budget_amount: float
+    spent_amount: float
+
+class BudgetUsageMatrix(BaseModel):
+    start_month: str
+    end_month: str
+    months: List[str]
+    categories: List[BudgetUsageRow]
+
 class Insight(BaseModel):
-    type: str  # spending_pattern, budget_alert, trend
+    type: str  # spending_pattern, budget_alert, trend, anomaly, recurring_spike, trend_break
     title: str
     message: str
     severity: str  # info, warning, alert
@@ -128,6 +194,7 @@ class ExpenseTrend(BaseModel):
     date: str
     amount: float
     count: int
+    group: Optional[str] = None  # category or payment mode when grouped
 
 class DashboardOverview(BaseModel):
     total_expenses: float
@@ -138,6 +205,13 @@ class DashboardOverview(BaseModel):
     expenses_count: int
     average_expense: float
 
+class DashboardSummary(BaseModel):
+    overview: DashboardOverview
+    category_breakdown: List[CategoryBreakdown]
+    budget_usage: List[BudgetUsage]
+    insights: List[Insight]
+    expense_trends: List[ExpenseTrend]
+
 # EMI Schemas
 class EMIDetails(BaseModel):
     id: int
@@ -150,7 +224,7 @@ class EMIDetails(BaseModel):
     processing_fees: float
     gst: float
     category: str
-    payment_mode: str
+    payment_mode: Optional[str] = None  # None once the payment mode is deleted
     date: date
     remaining_emi_count: int
     total_paid: float
@@ -161,6 +235,54 @@ class EMIDetails(BaseModel):
     class Config:
         from_attributes = True
 
+class EMIInstallmentDue(BaseModel):
+    expense_id: int
+    title: str
+    category: str
+    payment_mode_id: Optional[int] = None
+    payment_mode: Optional[str] = None
+    installment_number: int
+    tenure: int
+    due_date: date
+    amount: float
+    is_paid: bool
+    paid_date: Optional[date] = None
+
+# Bounds of a batch EMI calculation: schedules hold scenarios x tenure months
+MAX_EMI_SCENARIOS = 1000
+MAX_EMI_TENURE = 600  # months
+MAX_EMI_INTEREST_RATE = 100  # percent per year
+
+_EMIAmount = Annotated[float, Field(ge=0, allow_inf_nan=False)]
+
+class EMIBatchRequest(BaseModel):
+    principal: List[_EMIAmount] = Field(max_length=MAX_EMI_SCENARIOS)
+    tenure: List[Annotated[int, Field(ge=1, le=MAX_EMI_TENURE)]] = Field(max_length=MAX_EMI_SCENARIOS)
+    interest_rate: List[Annotated[float, Field(ge=0, le=MAX_EMI_INTEREST_RATE, allow_inf_nan=False)]] = Field(
+        max_length=MAX_EMI_SCENARIOS
+    )
+    processing_fees: Optional[List[_EMIAmount]] = Field(None, max_length=MAX_EMI_SCENARIOS)
+    gst: Optional[List[_EMIAmount]] = Field(None, max_length=MAX_EMI_SCENARIOS)
+    include_schedule: bool = False
+
+class EMISchedule(BaseModel):
+    month: List[int]
+    principal: List[float]
+    interest: List[float]
+    balance: List[float]
+
+class EMIBatchResult(BaseModel):
+    principal: List[float]
+    tenure: List[int]
+    interest_rate: List[float]
+    processing_fees: List[float]
+    gst: List[float]
+    monthly_amount: List[float]
+    total_amount: List[float]
+    total_interest: List[float]
+    total_processing_fees: List[float]
+    schedules: Optional[List[EMISchedule]] = None
+
 class BillPaymentMode(BaseModel):
     id: int
     name: str
@@ -170,7 +292,7 @@ class BillPaymentMode(BaseModel):
     expense_count: int
     paid_count: int
     unpaid_count: int
-    expenses: List[Expense]
+    expenses: List[Expense] = []
 
     class Config:
         from_attributes = True
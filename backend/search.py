@@ -0,0 +1,142 @@
+"""
+Full-text search over expense titles and descriptions.
+
+SQLite keeps an FTS5 index in the expenses_fts virtual table, an external
+content table over expenses that triggers keep in step with every insert,
+update and delete (including bulk and raw SQL writes). PostgreSQL uses a GIN
+index on a weighted tsvector expression instead, which it maintains itself.
+
+Queries are split into words, and every word must match the start of a word
+in the title or description ("uber eat" finds "Uber Eats"). Matches rank
+with bm25 on SQLite and ts_rank on PostgreSQL, title hits above description
+hits. A common word can match a large share of millions of rows, so only
+the newest SEARCH_CANDIDATES matches (after filters) are ranked, which keeps
+a search in the tens of milliseconds whatever it matches.
+"""
+import logging
+import re
+
+from sqlalchemy import column, func, literal_column, select, table, text
+
+import models
+
+logger = logging.getLogger(__name__)
+
+MAX_SEARCH_TERMS = 10
+SEARCH_CANDIDATES = 1000
+# Relative weight of a title match against a description match (SQLite bm25)
+TITLE_WEIGHT = 4.0
+
+_SQLITE_DDL = {
+    "expenses_fts": """
+        CREATE VIRTUAL TABLE expenses_fts USING fts5(
+            title, description,
+            content='expenses', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    """,
+    "expenses_fts_insert": """
+        CREATE TRIGGER expenses_fts_insert AFTER INSERT ON expenses BEGIN
+            INSERT INTO expenses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+    """,
+    "expenses_fts_delete": """
+        CREATE TRIGGER expenses_fts_delete AFTER DELETE ON expenses BEGIN
+            INSERT INTO expenses_fts(expenses_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """,
+    "expenses_fts_update": """
+        CREATE TRIGGER expenses_fts_update AFTER UPDATE OF title, description ON expenses BEGIN
+            INSERT INTO expenses_fts(expenses_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO expenses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+    """,
+}
+
+# The query must repeat this expression exactly for PostgreSQL to use the index
+_POSTGRES_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(expenses.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(expenses.description, '')), 'B')"
+)
+_POSTGRES_DDL = f"CREATE INDEX IF NOT EXISTS ix_expenses_search ON expenses USING gin (({_POSTGRES_VECTOR}))"
+
+_fts = table("expenses_fts", column("rowid"))
+
+
+def ddl_statements(dialect: str):
+    """The statements that create the search index on a dialect"""
+    if dialect == "sqlite":
+        return list(_SQLITE_DDL.values())
+    if dialect == "postgresql":
+        return [_POSTGRES_DDL]
+    return []
+
+
+def ensure_search_index(engine) -> bool:
+    """
+    Create the search index if it is missing. On SQLite a missing table or
+    trigger (e.g. after the expenses table was recreated) means the index may
+    be stale, so it is rebuilt from the expenses table; returns True then.
+    """
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            existing = {
+                name for (name,) in conn.execute(
+                    text("SELECT name FROM sqlite_master WHERE name IN ('expenses_fts', "
+                         "'expenses_fts_insert', 'expenses_fts_delete', 'expenses_fts_update')")
+                )
+            }
+            missing = [name for name in _SQLITE_DDL if name not in existing]
+            for name in missing:
+                conn.execute(text(_SQLITE_DDL[name]))
+            if missing:
+                conn.execute(text("INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')"))
+            return bool(missing)
+        if dialect == "postgresql":
+            conn.execute(text(_POSTGRES_DDL))
+            return False
+    logger.warning(f"Full-text search is not supported on {dialect}")
+    return False
+
+
+def search_terms(q: str):
+    """Lowercased words of a search query, at most MAX_SEARCH_TERMS"""
+    return re.findall(r"[^\W_]+", q.lower())[:MAX_SEARCH_TERMS]
+
+
+def match_query(dialect: str, q: str):
+    """
+    Select of (expense_id, rank) for expenses matching every word of q as a
+    prefix, newest first, better matches having a lower rank. The expenses
+    table is in its FROM clause so filters can be added before it is
+    limited to the candidates. Raises ValueError if q has no words.
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise ValueError("Search query needs at least one letter or digit")
+
+    if dialect == "sqlite":
+        fts = literal_column("expenses_fts")
+        # Quoted so FTS5 operators in the input are taken literally; * makes each a prefix
+        match = " ".join(f'"{term}"*' for term in terms)
+        # Ordered by the FTS rowid, FTS5 walks the matches newest first and stops at the limit
+        return select(
+            _fts.c.rowid.label("expense_id"),
+            func.bm25(fts, TITLE_WEIGHT, 1.0).label("rank")
+        ).select_from(
+            _fts.join(models.Expense, models.Expense.id == _fts.c.rowid)
+        ).where(fts.op("MATCH")(match)).order_by(_fts.c.rowid.desc())
+
+    if dialect == "postgresql":
+        vector = literal_column(_POSTGRES_VECTOR)
+        tsquery = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms))
+        return select(
+            models.Expense.id.label("expense_id"),
+            (-func.ts_rank(vector, tsquery)).label("rank")
+        ).where(vector.op("@@")(tsquery)).order_by(models.Expense.id.desc())
+
+    raise ValueError(f"Full-text search is not supported on {dialect}")
@@ -0,0 +1,192 @@
+"""
+Fill the database in DATABASE_URL with a realistic synthetic ledger.
+
+Generates payment modes, category budgets and expenses spread over the last
+few months (per-category amount distributions, EMIs with computed schedules,
+a mix of paid and unpaid bills), then rebuilds the monthly rollup, the EMI
+installments and the search index so every endpoint sees consistent data.
+
+Usage:
+    python seed_data.py --rows 100000 --reset
+    DATABASE_URL=postgresql://... python seed_data.py --rows 5000000 --months 36
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import insert
+
+import crud, models, search
+from database import SessionLocal, engine
+
+# category: (typical amount, spread of the log-normal distribution, relative frequency, sample titles)
+CATEGORIES = {
+    "Food": (350, 0.6, 30, ["Groceries", "Restaurant", "Coffee", "Food delivery"]),
+    "Transport": (250, 0.7, 15, ["Fuel", "Cab ride", "Metro card", "Parking"]),
+    "Shopping": (1500, 0.9, 12, ["Clothes", "Electronics", "Home decor", "Shoes"]),
+    "Bills": (1800, 0.5, 10, ["Electricity", "Internet", "Mobile recharge", "Water"]),
+    "Entertainment": (600, 0.7, 8, ["Movies", "Concert", "Streaming", "Games"]),
+    "Health": (900, 0.8, 6, ["Pharmacy", "Doctor visit", "Lab tests", "Gym"]),
+    "Travel": (6000, 0.9, 4, ["Flights", "Hotel", "Train tickets", "Holiday"]),
+    "Education": (3000, 0.8, 3, ["Course", "Books", "Workshop", "Tuition"]),
+    "Rent": (18000, 0.2, 2, ["Rent"]),
+    "Other": (500, 1.0, 10, ["Gift", "Donation", "Miscellaneous", "Repairs"]),
+}
+PAYMENT_MODE_TYPES = [
+    ("credit_card", "CreditCard", "#FF6B6B"),
+    ("debit_card", "CreditCard", "#4ECDC4"),
+    ("upi", "Smartphone", "#45B7D1"),
+    ("bank_account", "Building", "#96CEB4"),
+]
+EMI_TENURES = [3, 6, 9, 12, 18, 24]
+EMI_RATES = [0, 12, 14, 16, 18]
+# Every row carries every column so a batch can go out as one executemany
+EMPTY_EMI = {
+    "is_emi": False, "emi_tenure": None, "emi_interest_rate": None, "emi_processing_fees": None,
+    "emi_gst": None, "emi_monthly_amount": None, "emi_total_amount": None, "emi_principal_amount": None,
+    "is_paid": False, "paid_amount": None, "paid_date": None,
+}
+
+
+def create_payment_modes(db, count: int, rnd: random.Random):
+    """Add payment modes (mostly credit cards, as bills are tracked per card) and return (id, type) pairs"""
+    existing = {mode.name for mode in db.query(models.PaymentMode.name)}
+    modes = []
+    for index in range(count):
+        mode_type, icon, color = PAYMENT_MODE_TYPES[0] if index % 2 == 0 else rnd.choice(PAYMENT_MODE_TYPES)
+        name = f"{mode_type.replace('_', ' ').title()} {index + 1}"
+        if name in existing:
+            continue
+        modes.append(models.PaymentMode(name=name, type=mode_type, icon=icon, color=color))
+    if modes:
+        db.add_all(modes)
+        # Running servers reload their payment-mode catalogue when this moves
+        crud._bump_payment_modes_version(db)
+    db.commit()
+    return db.query(models.PaymentMode.id, models.PaymentMode.type).order_by(models.PaymentMode.id).all()
+
+
+def generate_expense(rnd: random.Random, categories, weights, payment_modes, credit_cards, start: date, days: int,
+                     today: date, emi_ratio: float, paid_ratio: float):
+    """Column values of one random expense"""
+    category = rnd.choices(categories, weights)[0]
+    typical, spread, _, titles = CATEGORIES[category]
+    expense_date = start + timedelta(days=rnd.randrange(days))
+    row = dict(EMPTY_EMI, title=rnd.choice(titles), category=category, date=expense_date, description=None)
+
+    if credit_cards and rnd.random() < emi_ratio:
+        # Big-ticket purchases converted to EMIs on a credit card
+        amount = round(rnd.lognormvariate(0, 0.6) * 40000, 2)
+        tenure = rnd.choice(EMI_TENURES)
+        interest_rate = rnd.choice(EMI_RATES)
+        processing_fees = 0 if interest_rate == 0 else round(rnd.uniform(0, 500), 2)
+        gst = round(processing_fees * 0.18, 2)
+        emi = crud.calculate_emi(amount, tenure, interest_rate, processing_fees, gst)
+        due = min(tenure, (today.year - expense_date.year) * 12 + today.month - expense_date.month)
+        paid_installments = due if rnd.random() < paid_ratio else rnd.randint(0, due)
+        row.update({
+            "amount": amount,
+            "payment_mode_id": rnd.choice(credit_cards),
+            "is_emi": True,
+            "emi_tenure": tenure,
+            "emi_interest_rate": interest_rate,
+            "emi_processing_fees": processing_fees,
+            "emi_gst": gst,
+            "emi_monthly_amount": emi["monthly_amount"],
+            "emi_total_amount": emi["total_amount"],
+            "emi_principal_amount": amount,
+            "is_paid": paid_installments == tenure,
+            "paid_amount": round(paid_installments * emi["monthly_amount"], 2) or None,
+            "paid_date": min(today, expense_date + relativedelta(months=paid_installments)) if paid_installments else None,
+        })
+        return row
+
+    amount = round(min(rnd.lognormvariate(0, spread) * typical, typical * 50), 2)
+    row.update({"amount": amount, "payment_mode_id": rnd.choice(payment_modes)})
+    if rnd.random() < paid_ratio:
+        row.update({
+            "is_paid": True,
+            "paid_amount": amount,
+            "paid_date": min(today, expense_date + timedelta(days=rnd.randint(0, 30))),
+        })
+    return row
+
+
+def create_budgets(db, categories, start: date, today: date, rnd: random.Random):
+    """A budget per category for every seeded month that doesn't have one yet"""
+    existing = {(budget.month, budget.category) for budget in db.query(models.Budget.month, models.Budget.category)}
+    budgets = []
+    month = start.replace(day=1)
+    while month <= today:
+        for category in categories:
+            typical, _, frequency, _ = CATEGORIES[category]
+            key = (month.strftime("%Y-%m"), category)
+            if key not in existing:
+                budgets.append({"month": key[0], "category": category, "amount": round(typical * frequency * rnd.uniform(0.5, 1.5), -2)})
+        month += relativedelta(months=1)
+    if budgets:
+        db.connection().execute(insert(models.Budget.__table__), budgets)
+        db.commit()
+    return len(budgets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database with synthetic expenses")
+    parser.add_argument("--rows", type=int, default=10000, help="number of expenses to generate (default 10000)")
+    parser.add_argument("--payment-modes", type=int, default=6, help="number of payment modes (default 6)")
+    parser.add_argument("--categories", type=int, default=len(CATEGORIES), help=f"number of categories to use, at most {len(CATEGORIES)}")
+    parser.add_argument("--months", type=int, default=24, help="months of history ending today (default 24)")
+    parser.add_argument("--emi-ratio", type=float, default=0.05, help="share of expenses bought on EMI (default 0.05)")
+    parser.add_argument("--paid-ratio", type=float, default=0.6, help="share of expenses paid, and of EMIs paid up to date (default 0.6)")
+    parser.add_argument("--batch-size", type=int, default=20000, help="rows per insert batch (default 20000)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed, the same seed gives the same ledger")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    if args.reset:
+        models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    rnd = random.Random(args.seed)
+    today = date.today()
+    start = today.replace(day=1) - relativedelta(months=args.months - 1)
+    days = (today - start).days + 1
+    categories = list(CATEGORIES)[:max(1, args.categories)]
+    weights = [CATEGORIES[category][2] for category in categories]
+
+    db = SessionLocal()
+    try:
+        modes = create_payment_modes(db, args.payment_modes, rnd)
+        payment_modes = [mode_id for mode_id, _ in modes]
+        credit_cards = [mode_id for mode_id, mode_type in modes if mode_type == "credit_card"]
+        started = time.perf_counter()
+        created = 0
+        while created < args.rows:
+            batch = [
+                generate_expense(rnd, categories, weights, payment_modes, credit_cards, start, days, today, args.emi_ratio, args.paid_ratio)
+                for _ in range(min(args.batch_size, args.rows - created))
+            ]
+            db.connection().execute(insert(models.Expense.__table__), batch)
+            db.commit()
+            created += len(batch)
+            print(f"\rInserted {created}/{args.rows} expenses ({created / (time.perf_counter() - started):,.0f} rows/s)", end="", flush=True)
+        print()
+
+        budget_count = create_budgets(db, categories, start, today, rnd)
+        rollup_rows = crud.rebuild_monthly_category_totals(db)
+        emi_count = crud.ensure_emi_installments(db)
+        # Builds the index in one pass if the tables were just created
+        search.ensure_search_index(engine)
+    finally:
+        db.close()
+
+    print(f"Added {budget_count} budgets, {emi_count} EMI schedules and {rollup_rows} monthly rollup rows "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Statistical spending insights over a category x month matrix.
+
+Every month is compared with the months before it in a trailing window
+(rolling mean and sample standard deviation built from cumulative sums, so
+the whole history is scored in a few array operations). From those scores:
+
+- anomalies: the current month is already far above the category's normal
+- recurring spikes: the same calendar month stood out from the whole
+  history in more than one year, reported when that month is now or next
+- trend breaks: the last few complete months moved well away from the
+  months before them
+
+Months before a category's first expense don't count as zero spend.
+"""
+import calendar
+from typing import List, Sequence
+
+import numpy as np
+
+ROLLING_WINDOW = 12        # months of history each month is compared with
+MIN_HISTORY = 3            # months of history needed before scoring
+Z_THRESHOLD = 2.5          # |z| that counts as an anomaly
+SPIKE_Z_THRESHOLD = 2.0    # z of a past month (against all history) that counts as a spike
+RECENT_MONTHS = 3          # complete months compared for trend breaks
+MIN_TREND_CHANGE = 0.25    # relative shift a trend break must also reach
+
+
+def build_matrix(rows, months: Sequence[str]):
+    """Zero-filled categories x months matrix from (month, category, amount) rows"""
+    categories = sorted({category for _, category, _ in rows})
+    category_index = {category: index for index, category in enumerate(categories)}
+    month_index = {month: index for index, month in enumerate(months)}
+    matrix = np.zeros((len(categories), len(months)))
+    for month, category, amount in rows:
+        if month in month_index:
+            matrix[category_index[category], month_index[month]] += amount or 0
+    return categories, matrix
+
+
+def rolling_stats(matrix: np.ndarray, window: int = ROLLING_WINDOW):
+    """
+    Mean, sample std and number of active months of the trailing window before each month.
+
+    matrix is categories x months. Column t is compared with columns
+    [t - window, t); a category is active from its first non-zero month.
+    """
+    active = np.cumsum(matrix > 0, axis=1) > 0
+    values = np.where(active, matrix, 0.0)
+
+    def prefix(array):
+        return np.concatenate([np.zeros((array.shape[0], 1)), np.cumsum(array, axis=1)], axis=1)
+
+    sums, squares, counts = prefix(values), prefix(values ** 2), prefix(active.astype(np.float64))
+    end = np.arange(matrix.shape[1])
+    start = np.maximum(end - window, 0)
+
+    count = counts[:, end] - counts[:, start]
+    total = sums[:, end] - sums[:, start]
+    total_squares = squares[:, end] - squares[:, start]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        variance = (total_squares - count * mean ** 2) / (count - 1)
+    std = np.sqrt(np.clip(variance, 0.0, None))
+    return mean, std, count
+
+
+def z_scores(matrix: np.ndarray, window: int = ROLLING_WINDOW, min_history: int = MIN_HISTORY):
+    """z-score of every month against its trailing window; NaN where there's too little history"""
+    mean, std, count = rolling_stats(matrix, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (matrix - mean) / std
+    scores[(count < min_history) | ~(std > 1e-9)] = np.nan
+    return scores, mean
+
+
+def categories_with_history(categories: Sequence[str], matrix: np.ndarray, min_history: int = MIN_HISTORY):
+    """Categories whose last month can be scored against enough earlier months"""
+    if matrix.size == 0:
+        return set()
+    _, _, count = rolling_stats(matrix)
+    return {categories[row] for row in np.flatnonzero(count[:, -1] >= min_history)}
+
+
+def detect_anomalies(categories: Sequence[str], months: Sequence[str], matrix: np.ndarray) -> List[dict]:
+    """
+    Insights for the last month of the matrix (the current, partial month).
+
+    months are YYYY-MM strings in order, matrix is categories x months.
+    """
+    insights = []
+    if matrix.size == 0:
+        return insights
+    scores, mean = z_scores(matrix)
+    current = matrix.shape[1] - 1
+
+    # Spend so far this month already far above normal (partial months can't be judged low yet)
+    for row in np.flatnonzero(scores[:, current] >= Z_THRESHOLD):
+        category, amount = categories[row], float(matrix[row, current])
+        insights.append({
+            "type": "anomaly",
+            "title": f"Unusual {category} Spending",
+            "message": f"Your {category} spending this month is {amount:,.2f}, well above your usual {mean[row, current]:,.2f} "
+                       f"({scores[row, current]:.1f} standard deviations above the last {ROLLING_WINDOW} months).",
+            "severity": "alert",
+            "category": category,
+            "amount": amount
+        })
+
+    # Calendar months that spiked in more than one year, when one is now or next
+    calendar_months = np.array([int(month[5:7]) for month in months])
+    years = np.array([int(month[:4]) for month in months])
+    # Past months are scored against the whole history so the oldest ones count too
+    complete = matrix[:, :current]
+    active = np.cumsum(complete > 0, axis=1) > 0
+    history = np.where(active, complete, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spike_scores = (complete - np.nanmean(history, axis=1, keepdims=True)) / np.nanstd(history, axis=1, ddof=1, keepdims=True)
+    spikes = active & (np.nan_to_num(spike_scores, nan=0.0, posinf=0.0) >= SPIKE_Z_THRESHOLD)
+    for month_number, when in ((calendar_months[current], "this month"), (calendar_months[current] % 12 + 1, "next month")):
+        in_month = spikes & (calendar_months[:current] == month_number)
+        for row in np.flatnonzero(in_month.sum(axis=1) >= 2):
+            spike_columns = np.flatnonzero(in_month[row])
+            spike_years = len(set(years[spike_columns].tolist()))
+            if spike_years < 2:
+                continue
+            category = categories[row]
+            insights.append({
+                "type": "recurring_spike",
+                "title": f"Seasonal {category} Spending",
+                "message": f"Your {category} spending has spiked in {calendar.month_name[month_number]} in {spike_years} "
+                           f"different years. Plan ahead for {when}.",
+                "severity": "warning",
+                "category": category,
+                "amount": float(matrix[row, spike_columns[-1]])
+            })
+
+    # Level shifts across complete months: recent average vs the months before it
+    if complete.shape[1] >= RECENT_MONTHS + MIN_HISTORY:
+        recent = complete[:, -RECENT_MONTHS:]
+        prior_mean, prior_std, prior_count = rolling_stats(complete, ROLLING_WINDOW)
+        base = complete.shape[1] - RECENT_MONTHS
+        before_mean, before_std = prior_mean[:, base], prior_std[:, base]
+        recent_mean = recent.mean(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shift = (recent_mean - before_mean) / (before_std / np.sqrt(RECENT_MONTHS))
+            change = (recent_mean - before_mean) / before_mean
+        breaks = (
+            (prior_count[:, base] >= MIN_HISTORY) & (before_std > 1e-9) & (before_mean > 0)
+            & (np.abs(shift) >= Z_THRESHOLD) & (np.abs(change) >= MIN_TREND_CHANGE)
+        )
+        for row in np.flatnonzero(breaks):
+            category, percent = categories[row], float(change[row]) * 100
+            rising = percent > 0
+            insights.append({
+                "type": "trend_break",
+                "title": f"{category} Spending Trend {'Up' if rising else 'Down'}",
+                "message": f"Your {category} spending averaged {recent_mean[row]:,.2f} over the last {RECENT_MONTHS} months, "
+                           f"{abs(percent):.1f}% {'higher' if rising else 'lower'} than before.",
+                "severity": "warning" if rising else "info",
+                "category": category,
+                "amount": float(recent_mean[row])
+            })
+
+    return insights
+
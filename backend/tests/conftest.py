@@ -0,0 +1,45 @@
+"""
+Shared fixtures. Tests only ever touch throwaway SQLite files: DATABASE_URL
+points at a temporary directory before any backend module is imported, so
+expense_tracker.db (and a .env pointing elsewhere) is never used.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="expense-tracker-tests-"), "app.db")
+os.environ["DATABASE_ASYNC"] = "false"
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+import payment_mode_cache, schema_version, schemas
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A session on a new, fully set-up database"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    schema_version.ensure_schema(engine)
+    # Every test database starts at the same catalogue version
+    payment_mode_cache.cache.clear()
+    session = Session(bind=engine)
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def payment_mode(name: str = "Card", **fields) -> schemas.PaymentModeCreate:
+    return schemas.PaymentModeCreate(**{"name": name, "type": "credit_card", "icon": "CreditCard", "color": "#FF6B6B", **fields})
+
+
+def count_statements(db: Session) -> list:
+    """SQL statements executed on the session's engine from now on"""
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+
+import cold_start, database, main, payment_mode_cache, schema_version
+
+
+@pytest.fixture
+def app_engine(tmp_path, monkeypatch):
+    """Point the app at an empty database"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'cold.db'}")
+    monkeypatch.setattr(database, "_engine", engine)
+    monkeypatch.setitem(database.SessionLocal.kw, "bind", engine)
+    return engine
+
+
+def _start(monkeypatch):
+    """Stand-in for a new process: a new ColdStart (keeping the import timings), middleware stack and caches"""
+    record = cold_start.ColdStart()
+    record.import_started, record.import_finished = main.cold_start.import_started, main.cold_start.import_finished
+    monkeypatch.setattr(cold_start, "cold_start", record)
+    monkeypatch.setattr(main, "cold_start", record)
+    monkeypatch.setattr(main.app, "middleware_stack", None)
+    payment_mode_cache.cache.clear()
+    return record
+
+
+def test_first_start_creates_the_schema_and_records_timings(app_engine, monkeypatch):
+    _start(monkeypatch)
+    with TestClient(main.app) as client:
+        # Startup brought the empty database up to date before any request
+        assert "expenses" in inspect(app_engine).get_table_names()
+        assert schema_version.stored_fingerprint(app_engine) == schema_version.schema_fingerprint(app_engine.dialect)
+        assert client.get("/payment-modes/").json() == []
+        stats = client.get("/metrics/startup").json()
+
+    assert stats["schema_updated"] is True
+    assert stats["first_request_path"] == "/payment-modes/"
+    for phase in ("import_ms", "startup_ms", "first_request_ms"):
+        assert stats[phase] is not None and stats[phase] >= 0
+
+    # The next start finds the fingerprint and skips the update
+    _start(monkeypatch)
+    with TestClient(main.app) as client:
+        stats = client.get("/metrics/startup").json()
+    assert stats["schema_updated"] is False
+    assert stats["first_request_path"] == "/metrics/startup"
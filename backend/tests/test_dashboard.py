@@ -0,0 +1,39 @@
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy.orm import Session
+
+import crud, schemas
+from conftest import count_statements, payment_mode
+
+
+def test_summary_is_one_query_and_matches_the_single_endpoints(db):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    today = date.today()
+    for months_ago, category, amount in [(0, "Food", 400), (0, "Travel", 150), (1, "Food", 300), (9, "Food", 250),
+                                         (30, "Rent", 1000)]:
+        crud.create_expense(db, schemas.ExpenseCreate(
+            title=category, amount=amount, category=category, date=today - relativedelta(months=months_ago),
+            payment_mode_id=card.id
+        ))
+    month = today.strftime("%Y-%m")
+    for category, amount in [("Travel", 100), ("Food", 500), ("Health", 80), ("Food", 450)]:
+        crud.create_budget(db, schemas.BudgetCreate(category=category, amount=amount, month=month))
+    # Loaded for this worker already, as for every request after the first
+    crud.get_payment_modes(db)
+
+    reader = Session(bind=db.get_bind())
+    statements = count_statements(reader)
+    summary = crud.get_dashboard_summary(reader)
+    assert len(statements) == 1
+    reader.close()
+
+    assert summary["overview"]["total_expenses"] == 2100
+    assert summary["overview"]["total_expenses_this_month"] == 550
+    assert [(usage["category"], usage["budget_amount"], usage["spent_amount"]) for usage in summary["budget_usage"]] == [
+        ("Food", 500, 400), ("Food", 450, 400), ("Health", 80, 0), ("Travel", 100, 150)
+    ]
+    assert summary["budget_usage"] == crud.get_budget_usage(db)
+    assert summary["insights"] == crud.get_insights(db)
+    assert summary["expense_trends"] == crud.get_expense_trends(db)
+    assert summary["expense_trends"] == [{"date": today.strftime("%Y-%m-%d"), "amount": 550, "count": 2}]
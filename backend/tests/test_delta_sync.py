@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import crud, models, schemas
+from conftest import payment_mode
+
+
+def _create(db, count: int):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    return [
+        crud.create_expense(db, schemas.ExpenseCreate(
+            title=f"Lunch {index}", amount=10 + index, category="Food", date=date(2026, 10, 5), payment_mode_id=card.id
+        )).id
+        for index in range(count)
+    ]
+
+
+def _sync(db, token: str, limit: int):
+    """Follow next_token while has_more, returning the pages"""
+    pages = [crud.get_expense_changes(db, since=token, limit=limit)]
+    while pages[-1]["has_more"]:
+        pages.append(crud.get_expense_changes(db, since=pages[-1]["next_token"], limit=limit))
+    return pages
+
+
+def test_rows_sharing_a_timestamp_are_paged_once_each(db):
+    ids = _create(db, 3)
+    # One bulk write: every row gets the same updated_at
+    shared = (datetime.now(timezone.utc) - timedelta(hours=1)).replace(tzinfo=None, microsecond=250000)
+    db.query(models.Expense).update({models.Expense.updated_at: shared}, synchronize_session=False)
+    db.commit()
+    before = (shared - timedelta(minutes=1)).replace(tzinfo=timezone.utc)
+    token = crud.encode_sync_token((before, 0), (datetime.now(timezone.utc), 0))
+
+    pages = _sync(db, token, limit=1)
+    assert [[item.id for item in page["items"]] for page in pages] == [[ids[0]], [ids[1]], [ids[2]]]
+    assert not any(page["reset"] for page in pages)
+    # Read to the end: the next sync starts from now, not from the shared timestamp again
+    assert _sync(db, pages[-1]["next_token"], limit=1)[0]["items"] == []
+
+
+def test_deleted_expenses_are_reported_by_id(db):
+    token = crud.get_expense_changes(db)["next_token"]
+    kept, deleted, batch_deleted = _create(db, 3)
+    crud.delete_expense(db, deleted)
+    crud.apply_expense_batch(db, [schemas.ExpenseBatchOperation(op="delete", id=batch_deleted)])
+
+    pages = _sync(db, token, limit=1)
+    assert [item.id for page in pages for item in page["items"]] == [kept]
+    assert [expense_id for page in pages for expense_id in page["deleted_ids"]] == [deleted, batch_deleted]
+
+
+def test_an_expired_or_unreadable_token_asks_for_a_reload(db):
+    _create(db, 1)
+    expired_at = datetime.now(timezone.utc) - crud.SYNC_TOMBSTONE_RETENTION - timedelta(days=1)
+    now = datetime.now(timezone.utc).isoformat()
+    huge_id = base64.urlsafe_b64encode(json.dumps([now, 2 ** 63, now, 1e400]).encode()).decode()
+    for token in (crud.encode_sync_token((expired_at, 0), (expired_at, 0)), "not-a-token", "WzEsMl0", huge_id):
+        changes = crud.get_expense_changes(db, since=token)
+        assert changes["reset"] and changes["items"] == [] and changes["deleted_ids"] == []
+        # The token it hands out works
+        assert not crud.get_expense_changes(db, since=changes["next_token"])["reset"]
@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import crud, emi_calculator, main
+
+client = TestClient(main.app)
+
+
+def test_batch_matches_single_calculator():
+    result = emi_calculator.calculate_emi_batch(
+        principal=[100000, 50000, 24000], tenure=[12, 24, 6], interest_rate=[12, 0, 15.5], processing_fees=[199], gst=[35.82]
+    )
+    for index, (principal, tenure, rate) in enumerate([(100000, 12, 12), (50000, 24, 0), (24000, 6, 15.5)]):
+        single = crud.calculate_emi(principal, tenure, rate, 199, 35.82)
+        assert result["monthly_amount"][index] == single["monthly_amount"]
+        assert result["total_amount"][index] == single["total_amount"]
+
+
+@pytest.mark.parametrize("body", [
+    {"principal": [100000], "tenure": [3000000], "interest_rate": [12], "include_schedule": True},
+    {"principal": [100000], "tenure": [0], "interest_rate": [12]},
+    {"principal": [100000] * 1001, "tenure": [12], "interest_rate": [12]},
+    {"principal": [100000], "tenure": [12], "interest_rate": [1e9]},
+    {"principal": [-1], "tenure": [12], "interest_rate": [12]},
+])
+def test_batch_rejects_out_of_range_input(body):
+    assert client.post("/emi/calculate/batch", json=body).status_code == 422
+
+
+def test_batch_refuses_overflow_and_oversized_schedules():
+    response = client.post("/emi/calculate/batch", json={"principal": [1e308], "tenure": [600], "interest_rate": [100]})
+    assert response.status_code == 400
+    response = client.post("/emi/calculate/batch", json={
+        "principal": [100000] * 1000, "tenure": [600], "interest_rate": [12], "include_schedule": True
+    })
+    assert response.status_code == 400
+
+    response = client.post("/emi/calculate/batch", json={
+        "principal": [100000], "tenure": [600], "interest_rate": [12], "include_schedule": True
+    })
+    assert response.status_code == 200
+    assert len(response.json()["schedules"][0]["month"]) == 600
@@ -0,0 +1,64 @@
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+import crud, models, schemas
+from conftest import payment_mode
+
+
+def _per_row_progress(expense):
+    """The per-row loop get_emi_expenses replaced (with the installment count's float tolerance)"""
+    months_passed = crud.calculate_months_passed(expense.date)
+    if expense.is_paid:
+        total_paid = expense.paid_amount or expense.amount
+    else:
+        total_paid = expense.paid_amount or (months_passed * (expense.emi_monthly_amount or 0))
+        total_paid = min(total_paid, expense.emi_total_amount or expense.amount)
+    remaining_amount = (expense.emi_total_amount or expense.amount) - total_paid
+    if expense.emi_monthly_amount and expense.emi_monthly_amount > 0:
+        remaining_emi_count = max(0, expense.emi_tenure - int(total_paid / expense.emi_monthly_amount + 1e-9))
+    else:
+        remaining_emi_count = max(0, expense.emi_tenure - months_passed)
+    return remaining_emi_count, round(total_paid, 6), round(remaining_amount, 6)
+
+
+def test_emi_progress_matches_per_row_calculation(db):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    this_month = date.today().replace(day=1)
+    # (months ago, tenure, rate, fees, payments): running, ending this month, ended (fees above one
+    # installment), ended long ago, paid early, no-cost, fully paid
+    cases = [(2, 12, 14, 199, 0), (6, 6, 12, 250, 0), (7, 6, 12, 1200, 0), (30, 12, 16, 99, 0),
+             (1, 9, 13, 0, 3), (4, 3, 0, 0, 0), (3, 6, 15, 50, 6)]
+    for months_ago, tenure, rate, fees, payments in cases:
+        expense = crud.create_expense(db, schemas.ExpenseCreate(
+            title="Phone", amount=30000, category="Electronics", date=this_month - relativedelta(months=months_ago) + relativedelta(days=9),
+            payment_mode_id=card.id, is_emi=True, emi_tenure=tenure, emi_interest_rate=rate,
+            emi_processing_fees=fees, emi_gst=round(fees * 0.18, 2)
+        ))
+        for _ in range(payments):
+            crud.mark_expense_as_paid(db, expense.id)
+
+    results = {
+        emi.id: (emi.remaining_emi_count, round(emi.total_paid, 6), round(emi.remaining_amount, 6))
+        for emi in crud.get_emi_expenses(db)
+    }
+    expenses = db.query(models.Expense).order_by(models.Expense.id).all()
+    assert results == {expense.id: _per_row_progress(expense) for expense in expenses}
+    # The EMI that ended last month with fees above one installment is fully paid by time
+    ended = results[expenses[2].id]
+    assert ended[0] == 0 and ended[2] == 0
+
+
+def test_emis_of_a_deleted_payment_mode_still_serialize(db):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    expense = crud.create_expense(db, schemas.ExpenseCreate(
+        title="Phone", amount=12000, category="Electronics", date=date.today().replace(day=1), payment_mode_id=card.id,
+        is_emi=True, emi_tenure=3, emi_interest_rate=0, emi_processing_fees=0, emi_gst=0
+    ))
+    crud.delete_payment_mode(db, card.id)
+
+    [emi] = crud.get_emi_expenses(db)
+    assert (emi.id, emi.payment_mode) == (expense.id, None)
+    due_month = (date.today().replace(day=1) + relativedelta(months=1)).strftime("%Y-%m")
+    [due] = [schemas.EMIInstallmentDue(**row) for row in crud.get_emi_dues(db, month=due_month)]
+    assert (due.expense_id, due.payment_mode_id, due.payment_mode) == (expense.id, None, None)
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import crud, events, models
+
+
+def test_events_published_while_the_first_message_is_read_are_delivered(db, monkeypatch):
+    monkeypatch.setattr(events, "EVENTS_HEARTBEAT", 0.5)
+    broker = events.EventBroker(session_factory=lambda: Session(bind=db.get_bind()), poll_interval=60)
+
+    async def first_event():
+        stream = broker.stream()
+        assert (await stream.__anext__()).startswith("retry:")
+        # Published while the stream is suspended at its first message
+        broker.publish({"id": broker.last_id + 1, "type": "expense.created"})
+        try:
+            return await stream.__anext__()
+        finally:
+            await stream.aclose()
+
+    assert '"type":"expense.created"' in asyncio.run(first_event())
+
+
+def _commit_events(db, *event_ids):
+    db.execute(insert(models.ChangeEvent.__table__), [
+        {"id": event_id, "type": "expense.created", "data": "{}"} for event_id in event_ids
+    ])
+    db.commit()
+
+
+def _poll(broker, db):
+    """One poll of the broker, returning the ids it published"""
+    queue = asyncio.Queue()
+    broker._subscribers.add(queue)
+    broker.release(crud.get_change_events(db, broker.last_id, events.EVENTS_BATCH_SIZE))
+    broker._subscribers.discard(queue)
+    return [queue.get_nowait()["id"] for _ in range(queue.qsize())]
+
+
+def test_events_are_published_in_id_order_across_late_commits(db):
+    broker = events.EventBroker(session_factory=None, gap_wait=60)
+    broker.last_id = 0
+    # 2 was handed out before 3 but its transaction commits after 3's
+    _commit_events(db, 1, 3)
+    assert _poll(broker, db) == [1]
+    assert _poll(broker, db) == []
+    _commit_events(db, 2)
+    assert _poll(broker, db) == [2, 3]
+    # A client reconnecting with the last id it saw is replayed exactly what it missed
+    _commit_events(db, 4)
+    assert [event["id"] for event in crud.get_change_events(db, 3)] == [4]
+
+
+def test_a_gap_that_never_fills_stops_holding_events_back(db):
+    broker = events.EventBroker(session_factory=None, gap_wait=0.05)
+    broker.last_id = 0
+    # 2 and 4 were rolled back
+    _commit_events(db, 1, 3, 5)
+    assert _poll(broker, db) == [1]
+    time.sleep(0.05)
+    # Both gaps were seen at the same poll, so they expire together
+    assert _poll(broker, db) == [3, 5]
+    assert broker._held == {}
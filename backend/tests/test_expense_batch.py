@@ -0,0 +1,140 @@
+"""
+Batch writes (POST /expenses/batch, bill mark-paid) use set-based statements
+instead of the per-expense write paths; they must leave the same expenses,
+rollup and installments behind, and all or nothing of a batch.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import crud, models, payment_mode_cache, schema_version, schemas
+from conftest import payment_mode
+
+PAID_ON = date(2026, 10, 20)
+
+
+@pytest.fixture
+def twin(tmp_path):
+    """A second database, seeded like the first, to run the same writes one by one"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'twin.db'}")
+    schema_version.ensure_schema(engine)
+    session = Session(bind=engine)
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _seed(db):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    upi = crud.create_payment_mode(db, payment_mode("UPI", type="upi"))
+    ids = []
+    for title, amount, day, mode, emi_tenure in [
+        ("Lunch", 120, date(2026, 10, 2), card, None),
+        ("Taxi", 40, date(2026, 10, 5), card, None),
+        ("Books", 300, date(2026, 9, 28), upi, None),
+        ("Shoes", 90, date(2026, 10, 9), card, None),
+        ("Phone", 12000, date(2026, 9, 12), card, 6),
+        ("Laptop", 6000, date(2026, 10, 3), upi, 3),
+        ("Desk", 2400, date(2026, 10, 14), card, 12),
+    ]:
+        emi = {"is_emi": True, "emi_tenure": emi_tenure, "emi_interest_rate": 12, "emi_processing_fees": 0,
+               "emi_gst": 0} if emi_tenure else {}
+        ids.append(crud.create_expense(db, schemas.ExpenseCreate(
+            title=title, amount=amount, category=title, date=day, payment_mode_id=mode.id, **emi
+        )).id)
+    crud.mark_expense_as_paid(db, ids[3], paid_date=PAID_ON.isoformat())
+    crud.mark_expense_as_paid(db, ids[6], paid_date=PAID_ON.isoformat())
+    return card, upi, ids
+
+
+def _state(db):
+    """Expenses (without timestamps), rollup and installments as committed"""
+    reader = Session(bind=db.get_bind())
+    try:
+        skipped = {"created_at", "updated_at"}
+        columns = [column for column in models.Expense.__table__.columns if column.name not in skipped]
+        expenses = [tuple(row) for row in reader.query(*columns).order_by(models.Expense.id)]
+        totals = models.MonthlyCategoryTotal
+        rollup = sorted(
+            (row.month, row.category, row.payment_mode_id or 0, round(row.total_amount, 6), row.expense_count,
+             round(row.paid_amount, 6), round(row.emi_amount, 6))
+            for row in reader.query(totals).filter(totals.expense_count > 0)
+        )
+        installment = models.EmiInstallment
+        installments = [
+            (row.expense_id, row.installment_number, row.due_date, row.amount, row.is_paid, row.paid_date)
+            for row in reader.query(installment).order_by(installment.expense_id, installment.installment_number)
+        ]
+        return expenses, rollup, installments
+    finally:
+        reader.close()
+
+
+def test_a_batch_matches_the_same_writes_one_by_one(db, twin):
+    card, _, ids = _seed(db)
+    lunch, taxi, books, shoes, phone, laptop, desk = ids
+    crud.apply_expense_batch(db, [
+        schemas.ExpenseBatchOperation(op="update", id=lunch, changes=schemas.ExpenseUpdate(
+            amount=150, category="Dining", date="2026-09-30"
+        )),
+        schemas.ExpenseBatchOperation(op="update", id=laptop, changes=schemas.ExpenseUpdate(
+            payment_mode_id=card.id, emi_tenure=6
+        )),
+        schemas.ExpenseBatchOperation(op="delete", id=taxi),
+        schemas.ExpenseBatchOperation(op="mark_paid", id=books, paid_amount=250, paid_date=PAID_ON),
+        schemas.ExpenseBatchOperation(op="mark_paid", id=phone, paid_date=PAID_ON),
+        schemas.ExpenseBatchOperation(op="mark_unpaid", id=shoes),
+        schemas.ExpenseBatchOperation(op="mark_unpaid", id=desk),
+    ])
+
+    payment_mode_cache.cache.clear()
+    _seed(twin)
+    crud.update_expense(twin, lunch, schemas.ExpenseUpdate(amount=150, category="Dining", date="2026-09-30"))
+    crud.update_expense(twin, laptop, schemas.ExpenseUpdate(payment_mode_id=card.id, emi_tenure=6))
+    crud.delete_expense(twin, taxi)
+    crud.mark_expense_as_paid(twin, books, paid_amount=250, paid_date=PAID_ON.isoformat())
+    crud.mark_expense_as_paid(twin, phone, paid_date=PAID_ON.isoformat())
+    crud.mark_expense_as_unpaid(twin, shoes)
+    crud.mark_expense_as_unpaid(twin, desk)
+
+    assert _state(db) == _state(twin)
+    assert crud.verify_monthly_category_totals(db) == []
+
+
+def test_a_bill_mark_paid_matches_paying_each_expense(db, twin):
+    card, _, ids = _seed(db)
+    # October's unpaid card expenses: two plain ones and the next installment of the desk
+    assert crud.mark_bill_paid(db, card.id, month="10", year=2026, paid_date=PAID_ON) == 3
+
+    payment_mode_cache.cache.clear()
+    _seed(twin)
+    lunch, taxi, desk = ids[0], ids[1], ids[6]
+    for expense_id in (lunch, taxi, desk):
+        crud.mark_expense_as_paid(twin, expense_id, paid_date=PAID_ON.isoformat())
+
+    assert _state(db) == _state(twin)
+
+
+@pytest.mark.parametrize("bad_operation, message", [
+    ({"op": "archive", "id": 3}, "unknown op 'archive'"),
+    ({"op": "mark_paid", "id": 9999}, "Expenses not found: 9999"),
+    ({"op": "delete", "id": 1}, "expense 1 appears more than once"),
+    ({"op": "update", "id": 3}, "update needs changes"),
+])
+def test_a_failing_operation_rolls_back_the_whole_batch(db, bad_operation, message):
+    _, _, ids = _seed(db)
+    before = _state(db)
+    operations = [
+        schemas.ExpenseBatchOperation(op="update", id=ids[0], changes=schemas.ExpenseUpdate(amount=1)),
+        schemas.ExpenseBatchOperation(op="delete", id=ids[1]),
+        schemas.ExpenseBatchOperation(op="mark_paid", id=ids[4]),
+        schemas.ExpenseBatchOperation(**bad_operation),
+    ]
+    with pytest.raises(ValueError, match=message):
+        crud.apply_expense_batch(db, operations)
+    db.rollback()
+    assert _state(db) == before
@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+import crud, main, schemas
+from conftest import payment_mode
+
+
+def _seed(db):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    upi = crud.create_payment_mode(db, payment_mode("UPI", type="upi"))
+    # Several expenses per day, so pages end in the middle of a date
+    for index in range(23):
+        crud.create_expense(db, schemas.ExpenseCreate(
+            title=f"Expense {index}", amount=10 + index, category=("Food", "Travel")[index % 2],
+            date=date(2026, 10, 1 + (index * 7) % 5), payment_mode_id=(card, upi)[index % 3 == 0].id
+        ))
+
+
+def _walk(db, limit: int, **filters):
+    pages, cursor = [], None
+    while True:
+        expenses, cursor = crud.get_expenses_page(db, cursor=cursor, limit=limit, **filters)
+        pages.append([expense.id for expense in expenses])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 4, 5, 23, 50])
+def test_walking_the_cursor_gives_the_offset_order(db, limit):
+    _seed(db)
+    pages = _walk(db, limit)
+    assert [expense_id for page in pages for expense_id in page] == [expense.id for expense in crud.get_expenses(db)]
+    assert all(len(page) == limit for page in pages[:-1]) and 0 < len(pages[-1]) <= limit
+
+    filtered = _walk(db, limit, category="Travel")
+    assert [expense_id for page in filtered for expense_id in page] == [
+        expense.id for expense in crud.get_expenses(db, category="Travel")
+    ]
+
+
+def _cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor", "é", _cursor(5), _cursor(["2026-10-01"]), _cursor(["2026-13-01", 1]), _cursor(["2026-10-01", "1"]),
+    _cursor(["2026-10-01", 1.5]), _cursor(["2026-10-01", True]), _cursor(["2026-10-01", 2 ** 63]), _cursor(["2026-10-01", 1e400]),
+])
+def test_a_malformed_cursor_is_a_bad_request(db, cursor):
+    _seed(db)
+    main.app.dependency_overrides[main.get_read_db] = lambda: db
+    try:
+        client = TestClient(main.app)
+        for path in ("/expenses/page", "/expenses/compact"):
+            response = client.get(path, params={"cursor": cursor})
+            assert response.status_code == 400, (path, response.text)
+            assert response.json()["detail"].startswith("Invalid cursor")
+    finally:
+        main.app.dependency_overrides.clear()
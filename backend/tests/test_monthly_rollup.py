@@ -0,0 +1,31 @@
+from datetime import date
+
+import crud, models, schemas
+from conftest import payment_mode
+
+
+def _expense(payment_mode_id: int, amount: float = 50, category: str = "Food", **fields) -> schemas.ExpenseCreate:
+    return schemas.ExpenseCreate(
+        title="Lunch", amount=amount, category=category, date=date(2026, 10, 5), payment_mode_id=payment_mode_id, **fields
+    )
+
+
+def test_deleting_payment_mode_then_expense_keeps_rollup_in_sync(db):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    other = crud.create_payment_mode(db, payment_mode("Other"))
+    first = crud.create_expense(db, _expense(card.id, 50))
+    second = crud.create_expense(db, _expense(other.id, 20))
+
+    # Both modes' rows merge into the single row without a payment mode
+    crud.delete_payment_mode(db, card.id)
+    crud.delete_payment_mode(db, other.id)
+    table = models.MonthlyCategoryTotal
+    rows = db.query(table).filter(table.payment_mode_id.is_(None)).all()
+    assert [(row.month, row.category, row.total_amount, row.expense_count) for row in rows] == [("2026-10", "Food", 70, 2)]
+    assert crud.verify_monthly_category_totals(db) == []
+
+    crud.delete_expense(db, first.id)
+    assert crud.verify_monthly_category_totals(db) == []
+    crud.delete_expense(db, second.id)
+    assert crud.verify_monthly_category_totals(db) == []
+    assert db.query(table).count() == 0
@@ -0,0 +1,40 @@
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+import crud, schemas
+from conftest import count_statements, payment_mode
+
+
+def test_bills_resolve_payment_modes_once_per_session(db):
+    for index in range(5):
+        mode = crud.create_payment_mode(db, payment_mode(f"Card {index}"))
+        crud.create_expense(db, schemas.ExpenseCreate(
+            title="Lunch", amount=10, category="Food", date=date(2026, 10, 5), payment_mode_id=mode.id
+        ))
+    # Loaded for this worker already, so a new session (request) only checks its version
+    crud.get_payment_modes(db)
+
+    reader = Session(bind=db.get_bind())
+    statements = count_statements(reader)
+    bills = crud.get_bill_payment_modes(reader, month="10", year=2026, as_rows=True)
+    reader.close()
+    assert [bill["name"] for bill in bills] == [f"Card {index}" for index in range(5)]
+    assert all(bill["expenses"][0]["payment_mode"]["name"] == bill["name"] for bill in bills)
+    # Catalogue version, summaries, expenses: independent of the number of cards
+    assert len(statements) == 3
+
+
+def test_payment_mode_writes_are_seen_by_other_sessions(db):
+    mode = crud.create_payment_mode(db, payment_mode("Card"))
+    other = Session(bind=db.get_bind())
+    assert [mode.name for mode in crud.get_payment_modes(other)] == ["Card"]
+
+    crud.update_payment_mode(db, mode.id, schemas.PaymentModeUpdate(name="Renamed"))
+    # The writing session sees its change straight away, others from their next session
+    assert [mode.name for mode in crud.get_payment_modes(db)] == ["Renamed"]
+    assert [mode.name for mode in crud.get_payment_modes(other)] == ["Card"]
+    other.close()
+    other = Session(bind=db.get_bind())
+    assert [mode.name for mode in crud.get_payment_modes(other)] == ["Renamed"]
+    other.close()
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import events, profiling
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware, sample_rate=1, slow_ms=100)
+
+    @app.get("/slow")
+    def slow():
+        time.sleep(0.15)
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        def body():
+            for _ in range(3):
+                time.sleep(0.1)
+                yield "data: tick\n\n"
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    return app
+
+
+def test_streamed_responses_are_profiled_up_to_their_headers(caplog):
+    with TestClient(_app()) as client, caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        stream = client.get("/stream")
+        assert stream.text.count("tick") == 3
+        assert not caplog.records
+        slow = client.get("/slow")
+    assert [record.getMessage().split(":")[0] for record in caplog.records] == ["Slow request GET /slow -> 200"]
+    assert float(stream.headers["server-timing"].split("dur=")[1].split(",")[0]) < 100
+    assert float(slow.headers["server-timing"].split("dur=")[1].split(",")[0]) >= 150
+
+
+def test_the_events_poller_is_not_counted_against_the_request_that_started_it(db):
+    profiling.instrument_engine(db.get_bind())
+    broker = events.EventBroker(session_factory=lambda: Session(bind=db.get_bind()), poll_interval=0.01)
+
+    async def subscribe_and_poll():
+        profile = profiling.RequestProfile()
+        profiling._current_profile.set(profile)
+        queue = await broker.subscribe()
+        subscribed = profile.query_count
+        await asyncio.sleep(0.1)
+        broker.unsubscribe(queue)
+        await broker._task
+        return subscribed, profile.query_count
+
+    subscribed, total = asyncio.run(subscribe_and_poll())
+    # The subscription's own read is the request's, the polls after it are not
+    assert subscribed == 1
+    assert total == 1
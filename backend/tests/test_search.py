@@ -0,0 +1,67 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+import crud, main, schemas
+from conftest import payment_mode
+
+
+def _add(db, mode, title: str, day: date, description: str = None) -> int:
+    return crud.create_expense(db, schemas.ExpenseCreate(
+        title=title, description=description, amount=10, category="Food", date=day, payment_mode_id=mode.id
+    )).id
+
+
+def _search(db, q: str):
+    return [expense.id for expense in crud.search_expenses(db, q)]
+
+
+def test_words_match_as_prefixes_and_titles_rank_first(db):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    eats = _add(db, card, "Uber Eats", date(2026, 10, 1))
+    ride = _add(db, card, "Uber ride", date(2026, 10, 2))
+    # Newer, but the word is only in its description
+    lunch = _add(db, card, "Lunch", date(2026, 10, 9), description="ordered through uber eats")
+
+    assert _search(db, "uber eat") == [eats, lunch]
+    assert _search(db, "UBER") == [ride, eats, lunch]
+    assert _search(db, "ub ri") == [ride]
+    assert _search(db, "eatery") == []
+
+
+def test_the_index_follows_updates_and_deletes(db):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    coffee = _add(db, card, "Coffee beans", date(2026, 10, 1))
+    tea = _add(db, card, "Green tea", date(2026, 10, 2))
+    rent = _add(db, card, "Rent", date(2026, 10, 3))
+
+    crud.update_expense(db, coffee, schemas.ExpenseUpdate(title="Espresso"))
+    # Batch updates and deletes go through set-based statements rather than the ORM
+    crud.apply_expense_batch(db, [
+        schemas.ExpenseBatchOperation(op="update", id=tea, changes=schemas.ExpenseUpdate(description="matcha")),
+        schemas.ExpenseBatchOperation(op="delete", id=rent),
+    ])
+    assert _search(db, "coffee") == []
+    assert _search(db, "espresso") == [coffee]
+    assert _search(db, "matcha") == [tea]
+    assert _search(db, "green") == [tea]
+    assert _search(db, "rent") == []
+
+    crud.delete_expense(db, coffee)
+    assert _search(db, "espresso") == []
+
+
+def test_search_fields_select_the_response_columns(db):
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    expense_id = _add(db, card, "Uber Eats", date(2026, 10, 1))
+    main.app.dependency_overrides[main.get_read_db] = lambda: db
+    try:
+        client = TestClient(main.app)
+        assert client.get("/expenses/search", params={"q": "uber", "fields": "title"}).json() == [
+            {"id": expense_id, "title": "Uber Eats"}
+        ]
+        assert client.get("/expenses/search", params={"q": "uber"}).json()[0]["payment_mode"]["name"] == "Card"
+        assert client.get("/expenses/search", params={"q": "uber", "fields": "colour"}).status_code == 400
+        assert client.get("/expenses/search", params={"q": "  "}).status_code == 400
+    finally:
+        main.app.dependency_overrides.clear()
@@ -0,0 +1,104 @@
+"""
+Every write keeps the derived tables in step with expenses: the monthly
+rollup, the EMI installment ledger and the sync tombstones. A mixed
+sequence of writes runs through each write path, then all three are
+checked against the expenses table.
+"""
+from datetime import date
+
+import crud, models, schemas
+from conftest import payment_mode
+
+
+def _expense(payment_mode_id: int, amount: float, category: str, day: date, **fields) -> dict:
+    return {"title": f"{category} {amount}", "amount": amount, "category": category, "date": day,
+            "payment_mode_id": payment_mode_id, **fields}
+
+
+def _emi(payment_mode_id: int, amount: float, day: date, tenure: int) -> dict:
+    return _expense(payment_mode_id, amount, "Electronics", day, is_emi=True, emi_tenure=tenure,
+                    emi_interest_rate=12, emi_processing_fees=0, emi_gst=0)
+
+
+def assert_derived_tables_consistent(db, sync_token: str, deleted_ids):
+    assert crud.verify_monthly_category_totals(db) == []
+
+    expenses = db.query(models.Expense).all()
+    installments = {}
+    for installment in db.query(models.EmiInstallment).order_by(models.EmiInstallment.installment_number):
+        installments.setdefault(installment.expense_id, []).append(installment)
+    for expense in expenses:
+        rows = installments.pop(expense.id, [])
+        if not (expense.is_emi and expense.emi_tenure):
+            assert rows == [], f"expense {expense.id} is not an EMI but has installments"
+            continue
+        assert [row.installment_number for row in rows] == list(range(1, expense.emi_tenure + 1))
+        assert all(row.amount == expense.emi_monthly_amount for row in rows)
+        paid_count = crud._paid_installment_count(expense)
+        assert [row.is_paid for row in rows] == [number <= paid_count for number in range(1, expense.emi_tenure + 1)]
+    assert installments == {}, "installments left behind by deleted expenses"
+
+    # Everything happened after the token: every live expense is a change, every deleted one a tombstone
+    changes = crud.get_expense_changes(db, since=sync_token)
+    assert not changes["has_more"] and not changes["reset"]
+    assert sorted(item.id for item in changes["items"]) == sorted(expense.id for expense in expenses)
+    assert sorted(changes["deleted_ids"]) == sorted(deleted_ids)
+
+
+def test_mixed_writes_keep_derived_tables_consistent(db):
+    sync_token = crud.get_expense_changes(db)["next_token"]
+    card = crud.create_payment_mode(db, payment_mode("Card"))
+    upi = crud.create_payment_mode(db, payment_mode("UPI", type="upi"))
+    spare = crud.create_payment_mode(db, payment_mode("Spare"))
+    september, october = date(2026, 9, 12), date(2026, 10, 3)
+
+    created = [
+        crud.create_expense(db, schemas.ExpenseCreate(**values))
+        for values in (
+            _expense(card.id, 120, "Food", september),
+            _expense(card.id, 80, "Food", october),
+            _expense(upi.id, 40, "Travel", october),
+            _expense(spare.id, 60, "Food", october),
+            _emi(card.id, 12000, september, 6),
+            _emi(upi.id, 6000, october, 3),
+        )
+    ]
+    food_sept, food_oct, travel, spare_food, phone, laptop = (expense.id for expense in created)
+    imported = crud.bulk_create_expenses(db, enumerate([
+        _expense(upi.id, 15, "Food", october),
+        _expense(card.id, 300, "Shopping", september),
+        _emi(card.id, 2400, october, 12),
+    ], start=1))
+    assert imported["created"] == 3
+    assert_derived_tables_consistent(db, sync_token, [])
+
+    deleted_ids = []
+    # Moves between months, categories and payment modes, and EMI schedule changes
+    crud.update_expense(db, food_sept, schemas.ExpenseUpdate(date="2026-10-01", category="Groceries", amount=130))
+    crud.update_expense(db, travel, schemas.ExpenseUpdate(payment_mode_id=card.id))
+    crud.update_expense(db, laptop, schemas.ExpenseUpdate(emi_tenure=6))
+    crud.update_expense(db, food_oct, schemas.ExpenseUpdate(
+        is_emi=True, emi_tenure=3, amount=900, emi_interest_rate=0, emi_processing_fees=0, emi_gst=0
+    ))
+    # Payments, per expense, per bill and in a batch
+    crud.mark_expense_as_paid(db, phone)
+    crud.mark_expense_as_paid(db, phone)
+    crud.mark_expense_as_paid(db, travel)
+    crud.mark_expense_as_unpaid(db, travel)
+    crud.mark_bill_paid(db, card.id, month="10", year=2026)
+    crud.apply_expense_batch(db, [
+        schemas.ExpenseBatchOperation(op="mark_paid", id=laptop),
+        schemas.ExpenseBatchOperation(op="mark_unpaid", id=phone),
+        schemas.ExpenseBatchOperation(op="update", id=food_sept, changes=schemas.ExpenseUpdate(payment_mode_id=upi.id)),
+        schemas.ExpenseBatchOperation(op="delete", id=travel),
+    ])
+    deleted_ids.append(travel)
+    crud.delete_expense(db, laptop)
+    deleted_ids.append(laptop)
+    # Detaches spare_food from its payment mode, then removes it
+    crud.delete_payment_mode(db, spare.id)
+    crud.update_expense(db, spare_food, schemas.ExpenseUpdate(amount=75))
+    crud.delete_expense(db, spare_food)
+    deleted_ids.append(spare_food)
+
+    assert_derived_tables_consistent(db, sync_token, deleted_ids)
@@ -71,6 +71,41 @@ export interface Expense {
   paid_amount: number | null
 }
 
+export interface ExpensePage {
+  items: Expense[]
+  next_cursor: string | null
+}
+
+export type ExpenseCompact = Omit<Expense, 'payment_mode'>
+
+export interface CompactExpensePage {
+  items: ExpenseCompact[]
+  payment_modes: PaymentMode[]
+  next_cursor: string | null
+}
+
+export interface ExpenseChanges {
+  items: Expense[]
+  deleted_ids: number[]
+  payment_modes: PaymentMode[]
+  next_token: string
+  has_more: boolean
+  reset: boolean
+}
+
+export type ExpenseBatchOperation =
+  | { op: 'update'; id: number; changes: ExpenseUpdate }
+  | { op: 'delete'; id: number }
+  | { op: 'mark_paid'; id: number; paid_amount?: number; paid_date?: string }
+  | { op: 'mark_unpaid'; id: number }
+
+export interface ExpenseBatchResult {
+  updated: number
+  deleted: number
+  marked_paid: number
+  marked_unpaid: number
+}
+
 export interface ExpenseCreate {
   title: string
   amount: number
@@ -161,6 +196,22 @@ export interface ExpenseTrend {
   date: string
   amount: number
   count: number
+  group?: string | null
+}
+
+export interface ExpenseTrendParams {
+  from?: string
+  to?: string
+  bucket?: 'day' | 'week' | 'month' | 'year'
+  group_by?: 'category' | 'payment_mode'
+}
+
+export interface DashboardSummary {
+  overview: DashboardOverview
+  category_breakdown: CategoryBreakdown[]
+  budget_usage: BudgetUsage[]
+  insights: Insight[]
+  expense_trends: ExpenseTrend[]
 }
 
 // Payment Modes API
@@ -181,6 +232,34 @@ export const expensesApi = {
     category?: string
     payment_mode_id?: number
   }) => api.get<Expense[]>('/expenses/', { params }).then(res => res.data),
+  getPage: (params?: {
+    cursor?: string
+    limit?: number
+    start_date?: string
+    end_date?: string
+    category?: string
+    payment_mode_id?: number
+  }) => api.get<ExpensePage>('/expenses/page', { params }).then(res => res.data),
+  getCompactPage: (params?: {
+    cursor?: string
+    limit?: number
+    start_date?: string
+    end_date?: string
+    category?: string
+    payment_mode_id?: number
+  }) => api.get<CompactExpensePage>('/expenses/compact', { params }).then(res => res.data),
+  search: (q: string, params?: {
+    skip?: number
+    limit?: number
+    start_date?: string
+    end_date?: string
+    category?: string
+    payment_mode_id?: number
+  }) => api.get<Expense[]>('/expenses/search', { params: { q, ...params } }).then(res => res.data),
+  getChanges: (params?: { since?: string; limit?: number }) =>
+    api.get<ExpenseChanges>('/expenses/changes', { params }).then(res => res.data),
+  exportUrl: (format: 'csv' | 'ndjson', params?: Record<string, string | number>) =>
+    `${API_BASE_URL}/expenses/export?${new URLSearchParams({ format, ...params } as Record<string, string>)}`,
   create: (data: ExpenseCreate) => api.post<Expense>('/expenses/', data).then(res => res.data),
   update: (id: number, data: ExpenseUpdate) => api.put<Expense>(`/expenses/${id}`, data).then(res => res.data),
   delete: (id: number) => api.delete(`/expenses/${id}`).then(res => res.data),
@@ -188,6 +267,9 @@ export const expensesApi = {
     api.post(`/expenses/${id}/mark-paid`, { paid_amount, paid_date }).then(res => res.data),
   markExpenseAsUnpaid: (id: number) => 
     api.post(`/expenses/${id}/mark-unpaid`).then(res => res.data),
+  // All or nothing: one failing operation rejects the whole batch
+  batch: (operations: ExpenseBatchOperation[]) =>
+    api.post<ExpenseBatchResult>('/expenses/batch', { operations }).then(res => res.data),
 
   getEMIExpenses: () => api.get('/emi/').then(res => res.data),
 }
@@ -202,17 +284,58 @@ export const budgetsApi = {
 
 // Dashboard API
 export const dashboardApi = {
+  getSummary: () => api.get<DashboardSummary>('/dashboard/summary').then(res => res.data),
   getOverview: () => api.get<DashboardOverview>('/dashboard/overview').then(res => res.data),
   getCategoryBreakdown: () => api.get<CategoryBreakdown[]>('/dashboard/category-breakdown').then(res => res.data),
   getBudgetUsage: () => api.get<BudgetUsage[]>('/dashboard/budget-usage').then(res => res.data),
   getInsights: () => api.get<Insight[]>('/dashboard/insights').then(res => res.data),
-  getExpenseTrends: () => api.get<ExpenseTrend[]>('/dashboard/expense-trends').then(res => res.data),
+  getExpenseTrends: (params?: ExpenseTrendParams) =>
+    api.get<ExpenseTrend[]>('/dashboard/expense-trends', { params }).then(res => res.data),
+}
+
+export interface ExpenseContribution {
+  month: string | null
+  category: string
+  payment_mode_id: number | null
+  amount: number
+  paid_amount: number
+  emi_amount: number
+}
+
+export type ChangeEvent =
+  | {
+      id: number
+      type: 'expense.created' | 'expense.updated' | 'expense.deleted' | 'expense.paid' | 'expense.unpaid'
+      expense_id: number
+      before: ExpenseContribution | null
+      after: ExpenseContribution | null
+    }
+  | { id: number; type: 'expenses.imported'; count: number; months: string[] }
+  | { id: number; type: 'budget.created' | 'budget.updated' | 'budget.deleted'; budget_id: number; month: string; category: string }
+  | { id: number; type: 'payment_mode.created' | 'payment_mode.updated' | 'payment_mode.deleted'; payment_mode_id: number }
+  | { id: number; type: 'reset' }
+
+// Live change events; EventSource reconnects and resumes from the last event by itself
+export const subscribeToChanges = (onEvent: (event: ChangeEvent) => void) => {
+  const source = new EventSource(`${API_BASE_URL}/events`)
+  source.onmessage = message => onEvent(JSON.parse(message.data))
+  return () => source.close()
 }
 
 // Bills API
 export const billsApi = {
   getBills: (year: number, month: number) => 
     api.get(`/bills/?year=${year}&month=${String(month).padStart(2, '0')}`).then(res => res.data),
+  getBillSummaries: (year: number, month: number) =>
+    api.get(`/bills/?year=${year}&month=${String(month).padStart(2, '0')}&include_expenses=false`).then(res => res.data),
+  getBillExpenses: (paymentModeId: number, year: number, month: number, params?: { skip?: number; limit?: number }) =>
+    api.get<Expense[]>(`/bills/${paymentModeId}/expenses`, {
+      params: { year, month: String(month).padStart(2, '0'), ...params },
+    }).then(res => res.data),
+  markBillPaid: (paymentModeId: number, year: number, month: number, paid_date?: string) =>
+    api.post(`/bills/${paymentModeId}/mark-paid`, null, {
+      params: { year, month: String(month).padStart(2, '0'), paid_date },
+    }).then(res => res.data),
 }
 
 export default api
@@ -46,6 +46,7 @@ export default function Budgets() {
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['budgets'] })
       queryClient.invalidateQueries({ queryKey: ['budget-usage'] })
+      queryClient.invalidateQueries({ queryKey: ['dashboard-summary'] })
       toast({
         title: "Success",
         description: "Budget created successfully",
@@ -68,6 +69,7 @@ export default function Budgets() {
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['budgets'] })
       queryClient.invalidateQueries({ queryKey: ['budget-usage'] })
+      queryClient.invalidateQueries({ queryKey: ['dashboard-summary'] })
       toast({
         title: "Success",
         description: "Budget updated successfully",
@@ -90,6 +92,7 @@ export default function Budgets() {
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['budgets'] })
       queryClient.invalidateQueries({ queryKey: ['budget-usage'] })
+      queryClient.invalidateQueries({ queryKey: ['dashboard-summary'] })
       toast({
         title: "Success",
         description: "Budget deleted successfully",
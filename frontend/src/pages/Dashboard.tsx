@@ -50,32 +50,12 @@ const itemVariants = {
 
 export default function Dashboard() {
   const navigate = useNavigate()
-  const { data: overview, isLoading: overviewLoading } = useQuery({
-    queryKey: ['dashboard-overview'],
-    queryFn: dashboardApi.getOverview,
+  const { data: summary, isLoading } = useQuery({
+    queryKey: ['dashboard-summary'],
+    queryFn: dashboardApi.getSummary,
   })
 
-  const { data: categoryBreakdown, isLoading: breakdownLoading } = useQuery({
-    queryKey: ['category-breakdown'],
-    queryFn: dashboardApi.getCategoryBreakdown,
-  })
-
-  const { data: budgetUsage, isLoading: budgetLoading } = useQuery({
-    queryKey: ['budget-usage'],
-    queryFn: dashboardApi.getBudgetUsage,
-  })
-
-  const { data: insights, isLoading: insightsLoading } = useQuery({
-    queryKey: ['insights'],
-    queryFn: dashboardApi.getInsights,
-  })
-
-  const { data: trends, isLoading: trendsLoading } = useQuery({
-    queryKey: ['expense-trends'],
-    queryFn: dashboardApi.getExpenseTrends,
-  })
-
-  if (overviewLoading || breakdownLoading || budgetLoading || insightsLoading || trendsLoading) {
+  if (isLoading) {
     return (
       <div className="flex items-center justify-center min-h-[400px]">
         <div className="animate-spin rounded-full h-32 w-32 border-b-2 border-primary"></div>
@@ -83,6 +63,12 @@ export default function Dashboard() {
     )
   }
 
+  const overview = summary?.overview
+  const categoryBreakdown = summary?.category_breakdown
+  const budgetUsage = summary?.budget_usage
+  const insights = summary?.insights
+  const trends = summary?.expense_trends
+
   const COLORS = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8', '#F7DC6F']
 
   return (